@@ -0,0 +1,98 @@
+"""Indizes für Dashboard-, Generierungs- und Statistik-Abfragen
+
+Revision ID: 3f9a2c1d7b10
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+Die Tabellen selbst werden (noch) per create_all beim Start angelegt. Diese
+Migration ist deshalb idempotent (if_not_exists) und kann sowohl auf
+bestehende als auch auf frisch erzeugte Datenbanken angewendet werden.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9a2c1d7b10"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = sa.text("status = 'pending'")
+
+# Die Zeile, die von den Instanzen mit gleichem (task_id, due_date) wie {ref} bleibt
+_KEEPER_ID = """COALESCE(
+    (SELECT MIN(k.id) FROM task_instances k
+     WHERE k.task_id = {ref}.task_id AND k.due_date = {ref}.due_date
+       AND EXISTS (SELECT 1 FROM task_completions c WHERE c.task_instance_id = k.id)),
+    (SELECT MIN(k.id) FROM task_instances k
+     WHERE k.task_id = {ref}.task_id AND k.due_date = {ref}.due_date)
+)"""
+
+_DUPLICATE_IDS = f"""
+    SELECT ti.id FROM task_instances ti
+    WHERE ti.due_date IS NOT NULL AND ti.id <> {_KEEPER_ID.format(ref="ti")}
+"""
+
+
+def upgrade() -> None:
+    # Doppelte Instanzen (gleicher Task + Tag) auf eine Zeile reduzieren, sonst
+    # schlägt der Unique-Index fehl. Behalten wird die kleinste ID mit
+    # Completion, sonst die kleinste ID; Completions der übrigen Zeilen werden
+    # auf sie umgehängt (Punkte-Historie bleibt erhalten).
+    op.execute(
+        f"""
+        UPDATE task_completions SET task_instance_id = (
+            SELECT {_KEEPER_ID.format(ref="dup")}
+            FROM task_instances dup WHERE dup.id = task_completions.task_instance_id
+        )
+        WHERE task_instance_id IN ({_DUPLICATE_IDS})
+        """
+    )
+    op.execute(f"DELETE FROM task_instances WHERE id IN ({_DUPLICATE_IDS})")
+
+    op.create_index(
+        "uq_task_instances_task_id_due_date",
+        "task_instances",
+        ["task_id", "due_date"],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_task_instances_due_date_status",
+        "task_instances",
+        ["due_date", "status"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_task_instances_pending_due_date",
+        "task_instances",
+        ["due_date"],
+        postgresql_where=PENDING,
+        sqlite_where=PENDING,
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_task_completions_user_id_completed_at",
+        "task_completions",
+        ["user_id", "completed_at"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_task_completions_task_instance_id",
+        "task_completions",
+        ["task_instance_id"],
+        if_not_exists=True,
+    )
+    # user_achievements(user_id) deckt der bestehende Unique-Constraint
+    # (user_id, achievement_id) bereits als führende Spalte ab.
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_completions_task_instance_id", table_name="task_completions", if_exists=True)
+    op.drop_index("ix_task_completions_user_id_completed_at", table_name="task_completions", if_exists=True)
+    op.drop_index("ix_task_instances_pending_due_date", table_name="task_instances", if_exists=True)
+    op.drop_index("ix_task_instances_due_date_status", table_name="task_instances", if_exists=True)
+    op.drop_index("uq_task_instances_task_id_due_date", table_name="task_instances", if_exists=True)
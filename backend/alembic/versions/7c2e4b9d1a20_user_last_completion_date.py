@@ -0,0 +1,41 @@
+"""users.last_completion_date für inkrementelle Streaks
+
+Revision ID: 7c2e4b9d1a20
+Revises: 3f9a2c1d7b10
+Create Date: 2026-10-18 11:00:00.000000
+
+Befüllt die Spalte aus der Completion-Historie. current_streak und
+longest_streak lassen sich danach per POST /api/users/streaks/recompute
+vollständig neu berechnen.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2e4b9d1a20"
+down_revision: Union[str, None] = "3f9a2c1d7b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    if "last_completion_date" not in columns:
+        op.add_column("users", sa.Column("last_completion_date", sa.Date(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE users SET last_completion_date = (
+            SELECT MAX(date(c.completed_at)) FROM task_completions c
+            WHERE c.user_id = users.id
+        )
+        WHERE last_completion_date IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "last_completion_date")
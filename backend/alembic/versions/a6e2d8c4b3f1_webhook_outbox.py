@@ -0,0 +1,39 @@
+"""webhook_outbox: Durable Outbox für HA-Webhooks
+
+Revision ID: a6e2d8c4b3f1
+Revises: f4c1d9e2a6b8
+Create Date: 2026-10-18 18:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a6e2d8c4b3f1"
+down_revision: Union[str, None] = "f4c1d9e2a6b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("webhook_outbox"):
+        op.create_table(
+            "webhook_outbox",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("event_type", sa.String(50), nullable=False),
+            sa.Column("payload", sa.JSON(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("delivered_at", sa.DateTime(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("last_attempt_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index(
+            "ix_webhook_outbox_delivered_at_id", "webhook_outbox", ["delivered_at", "id"]
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_webhook_outbox_delivered_at_id", table_name="webhook_outbox")
+    op.drop_table("webhook_outbox")
@@ -0,0 +1,52 @@
+"""room_day_progress: Raum-Tageszähler für Raum-Bonus und Fortschritt
+
+Revision ID: b5d81e3f6c42
+Revises: 7c2e4b9d1a20
+Create Date: 2026-10-18 13:00:00.000000
+
+Legt die Tabelle an und baut die Zähler aus task_instances auf.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d81e3f6c42"
+down_revision: Union[str, None] = "7c2e4b9d1a20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("room_day_progress"):
+        op.create_table(
+            "room_day_progress",
+            sa.Column(
+                "room_id", sa.Integer(),
+                sa.ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True,
+            ),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("total_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("completed_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("skipped_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+    op.execute("DELETE FROM room_day_progress")
+    op.execute(
+        """
+        INSERT INTO room_day_progress (room_id, day, total_count, completed_count, skipped_count)
+        SELECT t.room_id, i.due_date, COUNT(i.id),
+               SUM(CASE WHEN i.status = 'completed' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN i.status = 'skipped' THEN 1 ELSE 0 END)
+        FROM task_instances i
+        JOIN tasks t ON t.id = i.task_id
+        WHERE i.due_date IS NOT NULL
+        GROUP BY t.room_id, i.due_date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("room_day_progress")
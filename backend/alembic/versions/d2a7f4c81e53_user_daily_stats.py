@@ -0,0 +1,57 @@
+"""user_daily_stats: Completions/Punkte je User, Tag und Raum
+
+Revision ID: d2a7f4c81e53
+Revises: b5d81e3f6c42
+Create Date: 2026-10-18 14:00:00.000000
+
+Legt das Statistik-Rollup an und füllt es aus task_completions.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2a7f4c81e53"
+down_revision: Union[str, None] = "b5d81e3f6c42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("user_daily_stats"):
+        op.create_table(
+            "user_daily_stats",
+            sa.Column(
+                "user_id", sa.Integer(),
+                sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True,
+            ),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column(
+                "room_id", sa.Integer(),
+                sa.ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True,
+            ),
+            sa.Column("completions", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("points", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("bonus_points", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index("ix_user_daily_stats_day", "user_daily_stats", ["day"])
+
+    op.execute("DELETE FROM user_daily_stats")
+    op.execute(
+        """
+        INSERT INTO user_daily_stats (user_id, day, room_id, completions, points, bonus_points)
+        SELECT c.user_id, DATE(c.completed_at), t.room_id, COUNT(c.id),
+               COALESCE(SUM(c.points_earned), 0), COALESCE(SUM(c.bonus_points), 0)
+        FROM task_completions c
+        JOIN task_instances i ON i.id = c.task_instance_id
+        JOIN tasks t ON t.id = i.task_id
+        GROUP BY c.user_id, DATE(c.completed_at), t.room_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_daily_stats_day", table_name="user_daily_stats")
+    op.drop_table("user_daily_stats")
@@ -0,0 +1,29 @@
+"""Index für Keyset-Pagination der Instanz-Liste
+
+Revision ID: e8b3c5a09f17
+Revises: d2a7f4c81e53
+Create Date: 2026-10-18 15:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b3c5a09f17"
+down_revision: Union[str, None] = "d2a7f4c81e53"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_task_instances_due_date_id",
+        "task_instances",
+        ["due_date", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_instances_due_date_id", table_name="task_instances", if_exists=True)
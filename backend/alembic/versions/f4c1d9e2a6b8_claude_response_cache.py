@@ -0,0 +1,40 @@
+"""claude_response_cache: Cache für Claude-Antworten
+
+Revision ID: f4c1d9e2a6b8
+Revises: e8b3c5a09f17
+Create Date: 2026-10-18 16:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f4c1d9e2a6b8"
+down_revision: Union[str, None] = "e8b3c5a09f17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("claude_response_cache"):
+        op.create_table(
+            "claude_response_cache",
+            sa.Column("cache_key", sa.String(64), primary_key=True),
+            sa.Column("model", sa.String(100), nullable=False),
+            sa.Column("response_text", sa.Text(), nullable=False),
+            sa.Column("input_tokens", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("output_tokens", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("hit_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("last_used_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index(
+            "ix_claude_response_cache_last_used_at", "claude_response_cache", ["last_used_at"]
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_claude_response_cache_last_used_at", table_name="claude_response_cache")
+    op.drop_table("claude_response_cache")
@@ -11,10 +11,33 @@ class Settings(BaseSettings):
     # Claude AI
     claude_api_key: str = ""
     claude_model: str = "claude-haiku-4-5-20250929"
+    claude_cache_ttl_hours: int = 168  # Gleiche Anfrage innerhalb einer Woche aus dem Cache
+    claude_cache_max_entries: int = 200
+    claude_prompt_token_budget: int = 1500  # Geschätzte Tokens für die Statistik im Prompt
+    claude_prompt_top_n: int = 10  # Max. User/Räume/Achievements im Prompt
 
     # Home Assistant
     ha_url: str = ""
     ha_webhook_id: str = ""
+    webhook_queue_size: int = 1000  # Max. wartende Events, darüber wird verworfen
+    webhook_batch_size: int = 50  # Max. Events pro POST
+    webhook_flush_interval: float = 0.2  # Sekunden, in denen Events gebündelt werden
+    webhook_max_retries: int = 3
+    webhook_retry_backoff: float = 0.5  # Sekunden, verdoppelt sich pro Versuch
+    webhook_outbox_sweep_interval: float = 30.0  # Sekunden bis zur Nachlieferung aus der Outbox
+    webhook_outbox_retention_hours: int = 24  # Zugestellte Outbox-Zeilen so lange behalten
+    webhook_outbox_max_age_hours: int = 72  # Unzugestellte Events danach verwerfen
+
+    # Task-Generierung
+    instance_backfill_days: int = 7  # Verpasste Tage, die beim Start nachgeholt werden
+    instance_horizon_days: int = 0  # Tage, die im Voraus generiert werden
+
+    # Caching
+    dashboard_cache_ttl: int = 300  # Sekunden, Fallback z.B. für Datumswechsel
+
+    # Event-Stream (SSE)
+    event_buffer_size: int = 500  # Events für Last-Event-ID-Replay
+    sse_keepalive_seconds: int = 15
 
     # Allgemein
     timezone: str = "Europe/Berlin"
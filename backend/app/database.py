@@ -19,3 +19,11 @@ async def get_db() -> AsyncSession:
         except Exception:
             await session.rollback()
             raise
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Session-Factory für Antworten, die nach dem Request weiterlesen (Streaming).
+
+    Sessions aus get_db sind geschlossen, bevor der Body gesendet wird.
+    """
+    return async_session
@@ -2,16 +2,27 @@ import logging
 from contextlib import asynccontextmanager
 from datetime import date
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import verify_api_key
 
 from app.config import settings
-from app.database import async_session, engine, Base
-from app.routers import gamification, rooms, summaries, tasks, users
+from app.database import async_session, engine, get_db
+from app.migrate import ensure_schema
+from app.routers import events, gamification, rooms, summaries, tasks, users
 from app.seed import seed_data
+from app.services.cache_service import mark_changed
+from app.services.claude_service import close_claude_client
+from app.services.dashboard_service import get_dashboard_json
+from app.services.event_bus import emit, event_bus
+from app.services.leaderboard_service import apply_event as apply_leaderboard_event
+from app.services.leaderboard_service import leaderboard_index
 from app.services.scheduler_service import start_scheduler, stop_scheduler
+from app.services.summary_job_service import summary_jobs
+from app.services.webhook_service import forward_event, get_outbox_backlog, webhook_dispatcher
+from app.utils.http_cache import etag_matches
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("chorequest")
@@ -19,21 +30,52 @@ logger = logging.getLogger("chorequest")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Tabellen erstellen (in Produktion: Alembic nutzen)
+    # Neue Datenbank anlegen bzw. prüfen, ob alle Migrationen gelaufen sind —
+    # ohne den Unique-Index aus 3f9a2c1d7b10 schlägt das ON CONFLICT der
+    # Instanz-Generierung fehl, ohne neue Spalten jede User-Abfrage
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(ensure_schema)
 
     # Seed-Daten einfügen
     async with async_session() as db:
         await seed_data(db)
 
-    # Task-Instanzen für heute generieren (falls noch nicht vorhanden)
-    from app.services.task_service import generate_task_instances_for_date
+    # Verpasste Tage nachholen, heute (und ggf. Vorausplanung) generieren
+    from app.services.task_service import backfill_task_instances
     async with async_session() as db:
-        count = await generate_task_instances_for_date(db, date.today())
+        start, end, count = await backfill_task_instances(
+            db,
+            date.today(),
+            settings.instance_backfill_days,
+            settings.instance_horizon_days,
+        )
+        if count > 0:
+            mark_changed(db)
+            emit(db, "instances_created", {
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "count": count,
+            })
         await db.commit()
         if count > 0:
-            logger.info("Startup: %d Task-Instanzen für heute erstellt", count)
+            logger.info("Startup: %d Task-Instanzen erstellt (%s bis %s)", count, start, end)
+
+    # Streaks, die während einer Downtime abgelaufen sind, zurücksetzen
+    from app.services.streak_service import expire_stale_streaks
+    async with async_session() as db:
+        if await expire_stale_streaks(db, date.today()) > 0:
+            mark_changed(db)
+        await db.commit()
+
+    # Leaderboard-Index aus dem Statistik-Rollup aufbauen und per Event pflegen
+    async with async_session() as db:
+        await leaderboard_index.rebuild(db)
+    event_bus.add_listener(apply_leaderboard_event)
+
+    # Domain-Events als Webhooks an Home Assistant weiterleiten (Delivery-Queue,
+    # Nachlieferung aus der Outbox)
+    webhook_dispatcher.start(async_session)
+    event_bus.add_listener(forward_event)
 
     # Scheduler starten
     start_scheduler()
@@ -42,6 +84,11 @@ async def lifespan(app: FastAPI):
 
     # Scheduler stoppen
     stop_scheduler()
+    await summary_jobs.shutdown()
+    await close_claude_client()
+    event_bus.remove_listener(forward_event)
+    await webhook_dispatcher.stop()
+    event_bus.remove_listener(apply_leaderboard_event)
 
 
 app = FastAPI(
@@ -57,6 +104,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Sonst für Browser anderer Origins nicht lesbar
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Router einbinden
@@ -65,6 +114,7 @@ app.include_router(rooms.router)
 app.include_router(tasks.router)
 app.include_router(gamification.router)
 app.include_router(summaries.router)
+app.include_router(events.router)
 
 
 @app.get("/api/health")
@@ -72,92 +122,16 @@ async def health_check():
     return {"status": "ok", "app": settings.app_name, "version": "0.1.0"}
 
 
-@app.get("/api/dashboard", dependencies=[Depends(verify_api_key)])
-async def dashboard():
-    """Kompakte Daten für Home Assistant Coordinator."""
-    from sqlalchemy import select, func
-    from sqlalchemy.orm import selectinload
-    from app.models.user import User
-    from app.models.room import Room
-    from app.models.task import Task, TaskInstance
+@app.get("/api/webhooks/status", dependencies=[Depends(verify_api_key)])
+async def webhook_status(db: AsyncSession = Depends(get_db)):
+    """Zustand der Webhook-Auslieferung an Home Assistant (Queue, Outbox, Latenz)."""
+    return {**webhook_dispatcher.metrics(), **await get_outbox_backlog(db)}
 
-    async with async_session() as db:
-        today = date.today()
-
-        # Heutige offene Tasks
-        tasks_today_result = await db.execute(
-            select(func.count(TaskInstance.id))
-            .where(TaskInstance.due_date == today)
-            .where(TaskInstance.status == "pending")
-        )
-        tasks_today = tasks_today_result.scalar() or 0
-
-        # Überfällige Tasks
-        overdue_result = await db.execute(
-            select(func.count(TaskInstance.id))
-            .where(TaskInstance.due_date < today)
-            .where(TaskInstance.status == "pending")
-        )
-        overdue = overdue_result.scalar() or 0
 
-        # User-Punkte
-        users_result = await db.execute(
-            select(User).order_by(User.total_points.desc())
-        )
-        user_list = users_result.scalars().all()
-
-        # Per-Room-Task-Aufschlüsselung
-        rooms_result = await db.execute(select(Room).order_by(Room.sort_order, Room.name))
-        rooms = rooms_result.scalars().all()
-
-        rooms_data = []
-        for room in rooms:
-            # Heutige pending Tasks für diesen Raum
-            room_tasks_result = await db.execute(
-                select(
-                    TaskInstance.id,
-                    Task.title,
-                    Task.base_points,
-                    TaskInstance.status,
-                    TaskInstance.assigned_user_id,
-                )
-                .join(Task, TaskInstance.task_id == Task.id)
-                .where(Task.room_id == room.id)
-                .where(TaskInstance.due_date == today)
-                .where(TaskInstance.status == "pending")
-            )
-            room_tasks = [
-                {
-                    "instance_id": row.id,
-                    "title": row.title,
-                    "base_points": row.base_points,
-                    "status": row.status,
-                    "assigned_user_id": row.assigned_user_id,
-                }
-                for row in room_tasks_result.all()
-            ]
-            rooms_data.append({
-                "room_id": room.id,
-                "room_name": room.name,
-                "ha_area_id": room.ha_area_id,
-                "icon": room.icon,
-                "tasks": room_tasks,
-            })
-
-        return {
-            "tasks_today": tasks_today,
-            "tasks_overdue": overdue,
-            "users": [
-                {
-                    "id": u.id,
-                    "username": u.username,
-                    "display_name": u.display_name,
-                    "ha_user_id": u.ha_user_id,
-                    "total_points": u.total_points,
-                    "weekly_points": u.weekly_points,
-                    "current_streak": u.current_streak,
-                }
-                for u in user_list
-            ],
-            "rooms": rooms_data,
-        }
+@app.get("/api/dashboard", dependencies=[Depends(verify_api_key)])
+async def dashboard(request: Request, db: AsyncSession = Depends(get_db)):
+    """Kompakte Daten für Home Assistant Coordinator."""
+    body, etag = await get_dashboard_json(db)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
@@ -0,0 +1,80 @@
+"""Bringt das Datenbankschema auf den Stand der neuesten Alembic-Revision.
+
+Aufruf (aus backend/, im Container vor uvicorn):
+    python -m app.migrate
+
+Neue Datenbanken werden per create_all angelegt und auf head gestempelt,
+bestehende per `alembic upgrade head` migriert.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Connection, inspect
+
+from app.database import Base, engine
+import app.models  # noqa: F401  (Tabellen in Base.metadata registrieren)
+
+logger = logging.getLogger("chorequest.migrate")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+class SchemaOutdatedError(RuntimeError):
+    """Die Datenbank steht nicht auf der neuesten Migration."""
+
+
+def alembic_config() -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return config
+
+
+def ensure_schema(conn: Connection) -> None:
+    """Legt eine leere Datenbank an (gestempelt auf head) oder prüft die Revision.
+
+    Eine bestehende Datenbank hinter head führt zu SchemaOutdatedError —
+    create_all ergänzt weder Spalten noch Indizes in vorhandenen Tabellen.
+    """
+    script = ScriptDirectory.from_config(alembic_config())
+    head = script.get_current_head()
+    context = MigrationContext.configure(conn)
+    current = context.get_current_revision()
+    if current == head:
+        return
+    if current is None and not inspect(conn).has_table("users"):
+        Base.metadata.create_all(conn)
+        context.stamp(script, "head")
+        logger.info("Neue Datenbank angelegt (Revision %s)", head)
+        return
+    raise SchemaOutdatedError(
+        f"Datenbankschema veraltet (Revision {current or 'ohne'}, erwartet {head}). "
+        f"Vor dem Start `python -m app.migrate` bzw. `alembic upgrade head` ausführen."
+    )
+
+
+async def _create_if_new() -> bool:
+    """Legt eine leere Datenbank an; False wenn schon Tabellen existieren."""
+    try:
+        async with engine.begin() as conn:
+            if await conn.run_sync(lambda c: inspect(c).has_table("users")):
+                return False
+            await conn.run_sync(ensure_schema)
+            return True
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    if not asyncio.run(_create_if_new()):
+        command.upgrade(alembic_config(), "head")
+
+
+if __name__ == "__main__":
+    main()
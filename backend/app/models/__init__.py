@@ -1,15 +1,27 @@
 from app.models.user import User
-from app.models.room import Room
+from app.models.room import Room, RoomDayProgress
 from app.models.task import Task, TaskInstance
-from app.models.completion import TaskCompletion, Achievement, UserAchievement, WeeklySummary
+from app.models.completion import (
+    TaskCompletion,
+    UserDailyStats,
+    Achievement,
+    UserAchievement,
+    WeeklySummary,
+    ClaudeResponseCache,
+    WebhookOutbox,
+)
 
 __all__ = [
     "User",
     "Room",
+    "RoomDayProgress",
     "Task",
     "TaskInstance",
     "TaskCompletion",
+    "UserDailyStats",
     "Achievement",
     "UserAchievement",
     "WeeklySummary",
+    "ClaudeResponseCache",
+    "WebhookOutbox",
 ]
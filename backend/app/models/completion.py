@@ -1,6 +1,6 @@
 from datetime import date, datetime
 
-from sqlalchemy import JSON, Date, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import JSON, Date, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -8,6 +8,11 @@ from app.database import Base
 
 class TaskCompletion(Base):
     __tablename__ = "task_completions"
+    __table_args__ = (
+        # Streaks, Wochen-/User-Statistiken: Completions eines Users im Zeitraum
+        Index("ix_task_completions_user_id_completed_at", "user_id", "completed_at"),
+        Index("ix_task_completions_task_instance_id", "task_instance_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     task_instance_id: Mapped[int] = mapped_column(
@@ -27,6 +32,33 @@ class TaskCompletion(Base):
     user: Mapped["User"] = relationship(back_populates="completions")  # noqa: F821
 
 
+class UserDailyStats(Base):
+    """Rollup der Completions je (User, Tag, Raum) für Statistiken.
+
+    Wird bei jeder Completion per Upsert gepflegt und lässt sich aus
+    task_completions neu aufbauen (stats_service.rebuild_user_daily_stats).
+    Tag ist das Datum von completed_at (UTC), Raum der Raum des Tasks zum
+    Zeitpunkt der Completion (beim Neuaufbau: der aktuelle).
+    """
+
+    __tablename__ = "user_daily_stats"
+    __table_args__ = (
+        # Wochen-/Zeitraum-Auswertungen über alle User
+        Index("ix_user_daily_stats_day", "day"),
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    room_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True
+    )
+    completions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    points: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    bonus_points: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
 class Achievement(Base):
     __tablename__ = "achievements"
 
@@ -70,3 +102,41 @@ class WeeklySummary(Base):
     summary_text: Mapped[str | None] = mapped_column(Text)
     suggested_tasks: Mapped[dict | None] = mapped_column(JSON)
     generated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ClaudeResponseCache(Base):
+    """Claude-Antworten, adressiert über den Hash aus Modell, System-Prompt und Payload."""
+
+    __tablename__ = "claude_response_cache"
+
+    cache_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    response_text: Mapped[str] = mapped_column(Text, nullable=False)
+    input_tokens: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    output_tokens: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    hit_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class WebhookOutbox(Base):
+    """Domain-Events für Home Assistant, geschrieben in der auslösenden Transaktion.
+
+    Der Webhook-Dispatcher markiert zugestellte Zeilen; was nicht zugestellt
+    wurde (HA nicht erreichbar, Queue voll, Prozess beendet), liefert der
+    Sweep nach.
+    """
+
+    __tablename__ = "webhook_outbox"
+    __table_args__ = (
+        # Sweep: unzugestellte Events in Reihenfolge
+        Index("ix_webhook_outbox_delivered_at_id", "delivered_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    delivered_at: Mapped[datetime | None] = mapped_column(DateTime)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_attempt_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -1,4 +1,6 @@
-from sqlalchemy import Integer, String, Numeric
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Integer, String, Numeric
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -17,3 +19,26 @@ class Room(Base):
     tasks: Mapped[list["Task"]] = relationship(  # noqa: F821
         back_populates="room", cascade="all, delete-orphan"
     )
+    day_progress: Mapped[list["RoomDayProgress"]] = relationship(
+        back_populates="room", cascade="all, delete-orphan"
+    )
+
+
+class RoomDayProgress(Base):
+    """Zähler der Instanzen eines Raums an einem Tag (Raum-Bonus, Fortschritt).
+
+    Wird bei Generierung, Completion und Skip gepflegt und lässt sich jederzeit
+    aus task_instances neu aufbauen (progress_service.rebuild_room_progress).
+    """
+
+    __tablename__ = "room_day_progress"
+
+    room_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    total_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    completed_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    skipped_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    room: Mapped["Room"] = relationship(back_populates="day_progress")
@@ -5,9 +5,11 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -38,6 +40,21 @@ class Task(Base):
 
 class TaskInstance(Base):
     __tablename__ = "task_instances"
+    __table_args__ = (
+        # Eine Instanz pro Task und Tag (Ziel von ON CONFLICT bei der Generierung)
+        Index("uq_task_instances_task_id_due_date", "task_id", "due_date", unique=True),
+        # Dashboard, Wochenstatistik: Filter auf Tag + Status
+        Index("ix_task_instances_due_date_status", "due_date", "status"),
+        # Keyset-Pagination der Instanz-Liste (Sortierung due_date, id)
+        Index("ix_task_instances_due_date_id", "due_date", "id"),
+        # Offene/überfällige Instanzen (partieller Index)
+        Index(
+            "ix_task_instances_pending_due_date",
+            "due_date",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     task_id: Mapped[int] = mapped_column(
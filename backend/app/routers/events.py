@@ -0,0 +1,70 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+
+from app.auth import verify_api_key
+from app.config import settings
+from app.services.event_bus import DomainEvent, event_bus
+
+router = APIRouter(prefix="/api/events", tags=["Events"], dependencies=[Depends(verify_api_key)])
+
+
+def format_sse(evt: DomainEvent) -> str:
+    """Formatiert ein Event im text/event-stream-Format."""
+    data = json.dumps(
+        {"event_type": evt.event_type, "timestamp": evt.created_at.isoformat(), **evt.data},
+        ensure_ascii=False,
+    )
+    return f"id: {event_bus.event_id(evt)}\nevent: {evt.event_type}\ndata: {data}\n\n"
+
+
+async def event_stream(
+    last_event_id: str | None,
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[str]:
+    """Liefert Replay ab Last-Event-ID und danach Live-Events bis zum Disconnect."""
+    # Abo, Replay und Stand synchron festhalten — so geht dazwischen nichts
+    # verloren und nichts wird doppelt geschickt
+    sub = event_bus.subscribe()
+    last_sent = event_bus.last_id
+    replay = event_bus.replay(last_event_id) if last_event_id else []
+    try:
+        yield "retry: 3000\n\n"
+        if replay is None:
+            # Lücke (Puffer übergelaufen oder Neustart): Client muss neu laden
+            yield f"id: {event_bus.epoch}-{last_sent}\nevent: resync\ndata: {{}}\n\n"
+        else:
+            for evt in replay:
+                yield format_sse(evt)
+
+        while not sub.overflowed:
+            try:
+                evt = await asyncio.wait_for(
+                    sub.queue.get(), timeout=settings.sse_keepalive_seconds
+                )
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            if evt.id <= last_sent:
+                continue
+            yield format_sse(evt)
+    finally:
+        event_bus.unsubscribe(sub)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    last_event_id: str | None = Header(None),
+):
+    """Server-Sent Events mit allen Domain-Events (Replay via Last-Event-ID)."""
+    return StreamingResponse(
+        event_stream(last_event_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,24 +14,136 @@ from app.schemas.achievement import (
     AchievementResponse,
     UserAchievementResponse,
 )
-from app.schemas.user import UserResponse
+from app.schemas.user import (
+    LeaderboardEntry,
+    LeaderboardRankResponse,
+    LeaderboardWindowResponse,
+    UserResponse,
+)
 from app.services.achievement_service import get_achievement_progress
+from app.services.cache_service import data_version
+from app.services.leaderboard_service import (
+    LeaderboardWindowError,
+    leaderboard_index,
+    window_bounds,
+)
+from app.services.stats_service import rollup_today
+from app.utils.http_cache import not_modified
 
 router = APIRouter(prefix="/api", tags=["Gamification"], dependencies=[Depends(verify_api_key)])
 
 
 @router.get("/leaderboard", response_model=list[UserResponse])
-async def get_leaderboard(db: AsyncSession = Depends(get_db)):
+async def get_leaderboard(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    cached = not_modified(request, response, data_version.etag("leaderboard"))
+    if cached is not None:
+        return cached
     result = await db.execute(select(User).order_by(User.total_points.desc()))
     return result.scalars().all()
 
 
 @router.get("/leaderboard/weekly", response_model=list[UserResponse])
-async def get_weekly_leaderboard(db: AsyncSession = Depends(get_db)):
+async def get_weekly_leaderboard(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    cached = not_modified(request, response, data_version.etag("leaderboard_weekly"))
+    if cached is not None:
+        return cached
     result = await db.execute(select(User).order_by(User.weekly_points.desc()))
     return result.scalars().all()
 
 
+LeaderboardWindow = Literal["today", "week", "month", "rolling_30d", "range"]
+
+
+def _window_bounds(window: str, start: date | None, end: date | None) -> tuple[date, date]:
+    try:
+        return window_bounds(window, rollup_today(), start, end)
+    except LeaderboardWindowError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/leaderboard/window/{window}", response_model=LeaderboardWindowResponse)
+async def get_window_leaderboard(
+    window: LeaderboardWindow,
+    request: Request,
+    response: Response,
+    start: date | None = None,
+    end: date | None = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Rangliste der Completion-Punkte im Zeitfenster (Top-k, seitenweise)."""
+    start_date, end_date = _window_bounds(window, start, end)
+    cached = not_modified(
+        request, response,
+        data_version.etag("leaderboard_window", start_date, end_date, offset, limit),
+    )
+    if cached is not None:
+        return cached
+
+    await leaderboard_index.ensure_loaded(db)
+    ranked = leaderboard_index.window(start_date, end_date)
+    page = ranked.top(offset, limit)
+    result = await db.execute(select(User).where(User.id.in_([user_id for _, user_id, _ in page])))
+    users = {u.id: u for u in result.scalars().all()}
+    entries = []
+    for rank, user_id, points in page:
+        user = users.get(user_id)
+        if user is None:
+            # Gelöschter User: bis zum nächsten Neuaufbau aus dem Index nehmen
+            leaderboard_index.discard_user(user_id)
+            continue
+        entries.append(LeaderboardEntry(
+            rank=rank,
+            user_id=user_id,
+            username=user.username,
+            display_name=user.display_name,
+            avatar_url=user.avatar_url,
+            points=points,
+        ))
+    return LeaderboardWindowResponse(
+        window=window,
+        start_date=start_date,
+        end_date=end_date,
+        total=len(ranked),
+        entries=entries,
+    )
+
+
+@router.get("/leaderboard/window/{window}/users/{user_id}", response_model=LeaderboardRankResponse)
+async def get_window_rank(
+    window: LeaderboardWindow,
+    user_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Platz und Punkte eines Users im Zeitfenster (ohne Completions: kein Platz)."""
+    start_date, end_date = _window_bounds(window, start, end)
+    if await db.get(User, user_id) is None:
+        raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
+
+    await leaderboard_index.ensure_loaded(db)
+    ranked = leaderboard_index.window(start_date, end_date)
+    return LeaderboardRankResponse(
+        window=window,
+        start_date=start_date,
+        end_date=end_date,
+        total=len(ranked),
+        user_id=user_id,
+        rank=ranked.rank(user_id),
+        points=ranked.points(user_id) or 0,
+    )
+
+
 @router.get("/achievements", response_model=list[AchievementResponse])
 async def list_achievements(db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Achievement).order_by(Achievement.id))
@@ -1,7 +1,8 @@
 import logging
+from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import verify_api_key
@@ -9,11 +10,15 @@ from app.database import get_db
 from app.models.room import Room
 from app.schemas.room import (
     RoomCreate,
+    RoomProgressResponse,
     RoomResponse,
     RoomSyncRequest,
     RoomSyncResponse,
     RoomUpdate,
 )
+from app.services.cache_service import data_version, mark_changed
+from app.services.progress_service import get_rooms_progress
+from app.utils.http_cache import not_modified
 
 logger = logging.getLogger("chorequest")
 
@@ -72,10 +77,27 @@ async def list_rooms(db: AsyncSession = Depends(get_db)):
     return result.scalars().all()
 
 
+@router.get("/progress", response_model=list[RoomProgressResponse])
+async def rooms_progress(
+    request: Request,
+    response: Response,
+    day: date | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Fortschritt aller Räume an einem Tag (Standard: heute) aus den Tageszählern."""
+    if day is None:
+        day = date.today()
+    cached = not_modified(request, response, data_version.etag("rooms_progress", day))
+    if cached is not None:
+        return cached
+    return await get_rooms_progress(db, day)
+
+
 @router.post("", response_model=RoomResponse, status_code=status.HTTP_201_CREATED)
 async def create_room(data: RoomCreate, db: AsyncSession = Depends(get_db)):
     room = Room(**data.model_dump())
     db.add(room)
+    mark_changed(db)
     await db.flush()
     await db.refresh(room)
     return room
@@ -83,19 +105,28 @@ async def create_room(data: RoomCreate, db: AsyncSession = Depends(get_db)):
 
 @router.post("/sync", response_model=RoomSyncResponse)
 async def sync_rooms(data: RoomSyncRequest, db: AsyncSession = Depends(get_db)):
-    """Synchronisiert Räume aus Home Assistant Areas."""
+    """Synchronisiert Räume aus Home Assistant Areas.
+
+    Beim Delta-Sync (full=false) werden nur die betroffenen Räume geladen;
+    entfernte Areas kommen über `removed`. Verknüpfungen allein über den
+    Namen und entfernte Areas ohne Raum werden als Warnung gemeldet.
+    """
     created: list[Room] = []
     updated: list[Room] = []
     warnings: list[str] = []
 
-    # Alle bestehenden Räume laden
-    result = await db.execute(select(Room))
+    incoming_ids = {a.area_id for a in data.areas}
+    query = select(Room)
+    if not data.full:
+        query = query.where(or_(
+            Room.ha_area_id.in_(incoming_ids | set(data.removed)),
+            func.lower(Room.name).in_({a.name.lower() for a in data.areas}),
+        ))
+    result = await db.execute(query)
     all_rooms = result.scalars().all()
     rooms_by_ha_id = {r.ha_area_id: r for r in all_rooms if r.ha_area_id}
     rooms_by_name = {r.name.lower(): r for r in all_rooms}
 
-    incoming_ids = {a.area_id for a in data.areas}
-
     for area in data.areas:
         if area.area_id in rooms_by_ha_id:
             # Bereits verknüpfter Raum — ggf. umbenennen
@@ -107,6 +138,11 @@ async def sync_rooms(data: RoomSyncRequest, db: AsyncSession = Depends(get_db)):
         elif area.name.lower() in rooms_by_name:
             # Raum mit gleichem Namen existiert — ha_area_id verknüpfen
             room = rooms_by_name[area.name.lower()]
+            previous = f", bisher {room.ha_area_id}" if room.ha_area_id else ""
+            warnings.append(
+                f"Raum '{room.name}' nur über den Namen mit HA-Area verknüpft "
+                f"(ha_area_id={area.area_id}{previous}). Bitte prüfen."
+            )
             room.ha_area_id = area.area_id
             updated.append(room)
             logger.info("Raum '%s' mit HA-Area verknüpft (ha_area_id=%s)", area.name, area.area_id)
@@ -116,21 +152,28 @@ async def sync_rooms(data: RoomSyncRequest, db: AsyncSession = Depends(get_db)):
                 ha_area_id=area.area_id,
                 icon=_icon_for_area(area.name),
             )
-            db.add(room)
             created.append(room)
             logger.info("Neuer Raum '%s' aus HA-Area erstellt (ha_area_id=%s)", area.name, area.area_id)
 
-    # Warnung für gelöschte Areas (kein automatisches Löschen)
-    for ha_id, room in existing_rooms.items():
-        if ha_id not in incoming_ids:
+    # Warnung für gelöschte Areas (kein automatisches Löschen); maßgeblich ist
+    # die Verknüpfung nach dem Abgleich oben
+    missing = set(data.removed) if not data.full else rooms_by_ha_id.keys() - incoming_ids
+    for ha_id in sorted(missing - incoming_ids):
+        room = rooms_by_ha_id.get(ha_id)
+        if room is not None and room.ha_area_id == ha_id:
             warnings.append(
                 f"Raum '{room.name}' (ha_area_id={ha_id}) existiert nicht mehr in HA. "
                 f"Manuelles Löschen erforderlich."
             )
-
+        elif not data.full:
+            warnings.append(f"Entfernte HA-Area {ha_id} ist mit keinem Raum verknüpft.")
+
+    if created or updated:
+        mark_changed(db)
+    # Neue Räume gehen gesammelt in einem INSERT raus; alle Werte sind gesetzt,
+    # ein Nachladen ist nicht nötig
+    db.add_all(created)
     await db.flush()
-    for room in created + updated:
-        await db.refresh(room)
 
     return RoomSyncResponse(
         created=[RoomResponse.model_validate(r) for r in created],
@@ -146,6 +189,7 @@ async def update_room(room_id: int, data: RoomUpdate, db: AsyncSession = Depends
         raise HTTPException(status_code=404, detail="Raum nicht gefunden")
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(room, key, value)
+    mark_changed(db)
     await db.flush()
     await db.refresh(room)
     return room
@@ -157,3 +201,4 @@ async def delete_room(room_id: int, db: AsyncSession = Depends(get_db)):
     if not room:
         raise HTTPException(status_code=404, detail="Raum nicht gefunden")
     await db.delete(room)
+    mark_changed(db)
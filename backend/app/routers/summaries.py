@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.auth import verify_api_key
-from app.database import get_db
+from app.database import get_db, get_session_factory
 from app.models.completion import WeeklySummary
 from app.schemas.summary import (
+    ClaudeUsageResponse,
     GenerateSummaryRequest,
-    GenerateSummaryResponse,
+    SummaryJobResponse,
     WeeklySummaryResponse,
 )
-from app.services.claude_service import generate_weekly_summary
+from app.services.claude_cache_service import get_cache_stats
+from app.services.summary_job_service import SummaryJob, summary_jobs
 
 router = APIRouter(
     prefix="/api/summaries",
@@ -45,15 +47,41 @@ async def get_latest_summary(db: AsyncSession = Depends(get_db)):
     return summary
 
 
-@router.post("/generate", response_model=GenerateSummaryResponse)
+def _job_response(job: SummaryJob, summary: WeeklySummary | None = None) -> SummaryJobResponse:
+    return SummaryJobResponse(
+        job_id=job.id,
+        status=job.status,
+        week_start=job.week_start,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        tokens_used=job.tokens_used,
+        summary=WeeklySummaryResponse.model_validate(summary) if summary else None,
+    )
+
+
+@router.get("/claude-usage", response_model=ClaudeUsageResponse)
+async def get_claude_usage(db: AsyncSession = Depends(get_db)):
+    """Token-Verbrauch und Trefferquote des Claude-Antwort-Caches."""
+    return await get_cache_stats(db)
+
+
+@router.post("/generate", response_model=SummaryJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def generate_summary(
     body: GenerateSummaryRequest | None = None,
-    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
 ):
-    """Wochen-Zusammenfassung manuell generieren."""
+    """Wochen-Zusammenfassung im Hintergrund generieren (Status über /jobs/{job_id})."""
     week_start = body.week_start if body else None
-    summary, tokens_used = await generate_weekly_summary(db, week_start)
-    return GenerateSummaryResponse(
-        summary=WeeklySummaryResponse.model_validate(summary),
-        tokens_used=tokens_used,
-    )
+    job = summary_jobs.submit(session_factory, week_start)
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=SummaryJobResponse)
+async def get_summary_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """Status eines Generierungs-Jobs; ist er fertig, mit der Zusammenfassung."""
+    job = summary_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    summary = await db.get(WeeklySummary, job.summary_id) if job.summary_id else None
+    return _job_response(job, summary)
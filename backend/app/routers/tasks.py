@@ -1,31 +1,40 @@
-from datetime import date, datetime
+from collections.abc import AsyncIterator
+from datetime import date, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import or_, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import selectinload
 
 from app.auth import verify_api_key
-from app.database import get_db
+from app.database import get_db, get_session_factory
 from app.models.task import Task, TaskInstance
-from app.models.room import Room
-from app.models.completion import TaskCompletion
 from app.models.user import User
 from app.schemas.task import (
     AssignRequest,
+    BatchCompleteRequest,
+    BatchCompleteResponse,
     CompleteRequest,
-    CompletionResponse,
     ExtendedCompletionResponse,
+    GenerateInstancesRequest,
+    GenerateInstancesResponse,
     TaskCreate,
     TaskInstanceResponse,
     TaskInstanceWithDetails,
     TaskResponse,
     TaskUpdate,
 )
-from app.services.points_service import calculate_points
-from app.services.streak_service import update_user_streak
-from app.services.achievement_service import check_and_unlock_achievements
-from app.services.webhook_service import notify_task_completed, notify_achievement_unlocked
+from app.services.cache_service import data_version, mark_changed
+from app.services.event_bus import emit
+from app.services.completion_service import (
+    CompletionError,
+    complete_task_instance,
+    complete_task_instances_batch,
+)
+from app.services.progress_service import increment_room_progress, rebuild_room_progress
+from app.services.task_service import MAX_GENERATION_DAYS, generate_task_instances_for_range
+from app.utils.http_cache import not_modified
 
 router = APIRouter(prefix="/api", tags=["Tasks"], dependencies=[Depends(verify_api_key)])
 
@@ -51,6 +60,7 @@ async def list_tasks(
 async def create_task(data: TaskCreate, db: AsyncSession = Depends(get_db)):
     task = Task(**data.model_dump())
     db.add(task)
+    mark_changed(db)
     await db.flush()
     await db.refresh(task)
     return task
@@ -69,8 +79,24 @@ async def update_task(task_id: int, data: TaskUpdate, db: AsyncSession = Depends
     task = await db.get(Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task nicht gefunden")
-    for key, value in data.model_dump(exclude_unset=True).items():
+    old_room_id = task.room_id
+    changes = data.model_dump(exclude_unset=True)
+    for key, value in changes.items():
         setattr(task, key, value)
+    if changes.keys() & {"recurrence", "recurrence_day", "is_active"}:
+        # Vorausgeplante Instanzen passen nicht mehr zur Regel — der
+        # nächste Generierungslauf legt sie neu an
+        await db.execute(
+            delete(TaskInstance)
+            .where(TaskInstance.task_id == task_id)
+            .where(TaskInstance.due_date > date.today())
+            .where(TaskInstance.status == "pending")
+        )
+        await rebuild_room_progress(db, date.today() + timedelta(days=1), room_ids=[task.room_id])
+    if task.room_id != old_room_id:
+        # Alle Instanzen des Tasks zählen jetzt zum neuen Raum
+        await rebuild_room_progress(db, room_ids=[old_room_id, task.room_id])
+    mark_changed(db)
     await db.flush()
     await db.refresh(task)
     return task
@@ -82,18 +108,82 @@ async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
     if not task:
         raise HTTPException(status_code=404, detail="Task nicht gefunden")
     await db.delete(task)
+    await rebuild_room_progress(db, room_ids=[task.room_id])
+    mark_changed(db)
 
 
 # === Task-Instanzen ===
 
+INSTANCES_PAGE_SIZE = 500
+MAX_INSTANCES_PAGE_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+# Platzhalter im Cursor für Instanzen ohne Fälligkeit (sortiert ans Ende)
+NULL_DUE_DATE_CURSOR = "none"
+
+
+def encode_instance_cursor(instance: TaskInstance) -> str:
+    """Cursor auf die Position nach dieser Instanz (Sortierung due_date NULLS LAST, id)."""
+    due = instance.due_date.isoformat() if instance.due_date else NULL_DUE_DATE_CURSOR
+    return f"{due}:{instance.id}"
+
+
+def decode_instance_cursor(cursor: str) -> tuple[date | None, int]:
+    raw_date, _, raw_id = cursor.partition(":")
+    try:
+        due = None if raw_date == NULL_DUE_DATE_CURSOR else date.fromisoformat(raw_date)
+        return due, int(raw_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+
+
+def instances_after(after_date: date | None, after_id: int):
+    """Keyset-Bedingung „nach (after_date, after_id)“ bei due_date NULLS LAST."""
+    if after_date is None:
+        return and_(TaskInstance.due_date.is_(None), TaskInstance.id > after_id)
+    return or_(
+        tuple_(TaskInstance.due_date, TaskInstance.id) > tuple_(after_date, after_id),
+        TaskInstance.due_date.is_(None),
+    )
+
+
+async def stream_instances_ndjson(
+    session_factory: async_sessionmaker[AsyncSession], query
+) -> AsyncIterator[bytes]:
+    """Eine JSON-Zeile pro Instanz, gelesen über einen serverseitigen Cursor."""
+    async with session_factory() as session:
+        result = await session.stream_scalars(
+            query.execution_options(yield_per=INSTANCES_PAGE_SIZE)
+        )
+        async for instance in result:
+            yield TaskInstanceWithDetails.model_validate(instance).model_dump_json().encode() + b"\n"
+
+
 @router.get("/instances", response_model=list[TaskInstanceWithDetails])
 async def list_instances(
+    request: Request,
+    response: Response,
     room_id: int | None = None,
     user_id: int | None = None,
     task_status: str | None = Query(None, alias="status"),
     due_date: date | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    after: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_INSTANCES_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
 ):
+    """Instanzen sortiert nach (due_date, id), seitenweise per Keyset-Cursor.
+
+    Ohne `limit` liefert eine Seite höchstens INSTANCES_PAGE_SIZE (500)
+    Instanzen — wer alle braucht, folgt dem Cursor. Gibt es weitere Treffer,
+    steht der Cursor für die nächste Seite im Header X-Next-Cursor (als
+    `after` übergeben). Instanzen ohne Fälligkeit kommen am Ende. Mit
+    `Accept: application/x-ndjson` kommen alle Treffer ab dem Cursor als
+    Stream, eine JSON-Zeile pro Instanz.
+    """
     query = select(TaskInstance).options(
         selectinload(TaskInstance.task),
         selectinload(TaskInstance.assigned_user),
@@ -106,13 +196,40 @@ async def list_instances(
         query = query.where(TaskInstance.status == task_status)
     if due_date is not None:
         query = query.where(TaskInstance.due_date == due_date)
-    result = await db.execute(query.order_by(TaskInstance.due_date))
-    return result.scalars().all()
+    if start_date is not None:
+        query = query.where(TaskInstance.due_date >= start_date)
+    if end_date is not None:
+        query = query.where(TaskInstance.due_date <= end_date)
+    if after is not None:
+        query = query.where(instances_after(*decode_instance_cursor(after)))
+    query = query.order_by(TaskInstance.due_date.nulls_last(), TaskInstance.id)
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        if limit is not None:
+            query = query.limit(limit)
+        return StreamingResponse(
+            stream_instances_ndjson(session_factory, query), media_type=NDJSON_MEDIA_TYPE
+        )
+
+    page_size = limit or INSTANCES_PAGE_SIZE
+    result = await db.execute(query.limit(page_size + 1))
+    instances = list(result.scalars().all())
+    if len(instances) > page_size:
+        instances = instances[:page_size]
+        response.headers["X-Next-Cursor"] = encode_instance_cursor(instances[-1])
+    return instances
 
 
 @router.get("/instances/today", response_model=list[TaskInstanceWithDetails])
-async def list_today_instances(db: AsyncSession = Depends(get_db)):
+async def list_today_instances(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
     today = date.today()
+    cached = not_modified(request, response, data_version.etag("instances_today", today))
+    if cached is not None:
+        return cached
     query = (
         select(TaskInstance)
         .options(
@@ -133,74 +250,49 @@ async def list_today_instances(db: AsyncSession = Depends(get_db)):
     return result.scalars().all()
 
 
+@router.post("/instances/generate", response_model=GenerateInstancesResponse)
+async def generate_instances(data: GenerateInstancesRequest, db: AsyncSession = Depends(get_db)):
+    """Instanzen für einen Datumsbereich erzeugen (Backfill oder Vorausplanung)."""
+    end_date = data.end_date or data.start_date
+    if end_date < data.start_date:
+        raise HTTPException(status_code=400, detail="end_date liegt vor start_date")
+    if (end_date - data.start_date).days >= MAX_GENERATION_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximal {MAX_GENERATION_DAYS} Tage pro Aufruf",
+        )
+    created = await generate_task_instances_for_range(db, data.start_date, end_date)
+    if created > 0:
+        mark_changed(db)
+        emit(db, "instances_created", {
+            "start_date": data.start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "count": created,
+        })
+    return GenerateInstancesResponse(
+        start_date=data.start_date, end_date=end_date, created=created
+    )
+
+
+@router.post("/instances/complete-batch", response_model=BatchCompleteResponse)
+async def complete_instances_batch(
+    data: BatchCompleteRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Mehrere Instanzen in einer Transaktion abschließen (Ergebnis pro Eintrag)."""
+    return await complete_task_instances_batch(db, data.items)
+
+
 @router.post("/instances/{instance_id}/complete", response_model=ExtendedCompletionResponse)
 async def complete_instance(
     instance_id: int,
     data: CompleteRequest,
     db: AsyncSession = Depends(get_db),
 ):
-    instance = await db.get(TaskInstance, instance_id)
-    if not instance:
-        raise HTTPException(status_code=404, detail="Task-Instanz nicht gefunden")
-    if instance.status != "pending":
-        raise HTTPException(status_code=400, detail="Task ist nicht mehr offen")
-
-    user = await db.get(User, data.user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
-
-    # Task und Raum laden
-    task = await db.get(Task, instance.task_id)
-    room = await db.get(Room, task.room_id)
-
-    # Instanz als erledigt markieren
-    instance.status = "completed"
-
-    # Streak aktualisieren (vor Punkteberechnung, damit Streak-Bonus stimmt)
-    streak_update = await update_user_streak(db, user)
-
-    # Punkte berechnen mit allen Boni
-    now = datetime.utcnow()
-    bonus_breakdown = await calculate_points(db, task, room, user, now)
-
-    # Completion erstellen
-    completion = TaskCompletion(
-        task_instance_id=instance_id,
-        user_id=data.user_id,
-        completed_at=now,
-        points_earned=bonus_breakdown.total_points,
-        bonus_points=bonus_breakdown.bonus_points,
-        notes=data.notes,
-    )
-    db.add(completion)
-
-    # Punkte dem User gutschreiben
-    user.total_points += bonus_breakdown.total_points
-    user.weekly_points += bonus_breakdown.total_points
-
-    await db.flush()
-
-    # Achievements prüfen (nach Punkteupdate)
-    unlocked = await check_and_unlock_achievements(db, user)
-
-    await db.refresh(completion)
-
-    # Webhooks an Home Assistant senden (fire-and-forget)
-    notify_task_completed(
-        instance_id, task.title, user.display_name or user.username,
-        bonus_breakdown.total_points, room.name,
-    )
-    for ach in unlocked:
-        notify_achievement_unlocked(
-            user.display_name or user.username, ach.name, ach.icon, ach.points_reward,
-        )
-
-    return ExtendedCompletionResponse(
-        completion=CompletionResponse.model_validate(completion),
-        bonus_breakdown=bonus_breakdown,
-        streak=streak_update,
-        unlocked_achievements=unlocked,
-    )
+    try:
+        return await complete_task_instance(db, instance_id, data.user_id, data.notes)
+    except CompletionError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
 
 
 @router.post("/instances/{instance_id}/skip", status_code=status.HTTP_200_OK)
@@ -211,6 +303,15 @@ async def skip_instance(instance_id: int, db: AsyncSession = Depends(get_db)):
     if instance.status != "pending":
         raise HTTPException(status_code=400, detail="Task ist nicht mehr offen")
     instance.status = "skipped"
+    task = await db.get(Task, instance.task_id)
+    await increment_room_progress(db, task.room_id, instance.due_date, skipped=1)
+    mark_changed(db)
+    emit(db, "task_skipped", {
+        "instance_id": instance_id,
+        "due_date": instance.due_date.isoformat() if instance.due_date else None,
+        "status": instance.status,
+        "task_id": instance.task_id,
+    })
     return {"detail": "Task übersprungen"}
 
 
@@ -229,6 +330,8 @@ async def assign_instance(
         raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
 
     instance.assigned_user_id = data.user_id
+    mark_changed(db)
+    emit(db, "instance_assigned", {"instance_id": instance_id, "user_id": data.user_id})
     await db.flush()
 
     # Task nachladen für Response
@@ -1,17 +1,17 @@
 import logging
-from datetime import date, timedelta
+from datetime import timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import verify_api_key
 from app.database import get_db
 from app.models.user import User
-from app.models.room import Room
-from app.models.task import Task, TaskInstance
-from app.models.completion import TaskCompletion, UserAchievement
+from app.models.completion import UserAchievement
 from app.schemas.user import (
+    StatsRebuildResponse,
+    StreakRecomputeResponse,
     UserCreate,
     UserResponse,
     UserStats,
@@ -19,6 +19,11 @@ from app.schemas.user import (
     UserSyncResponse,
     UserUpdate,
 )
+from app.services.cache_service import data_version, mark_changed
+from app.services.leaderboard_service import leaderboard_index
+from app.services.stats_service import get_user_room_totals, rebuild_user_daily_stats, rollup_today
+from app.services.streak_service import recompute_user_streaks
+from app.utils.http_cache import not_modified
 
 logger = logging.getLogger("chorequest")
 
@@ -26,7 +31,14 @@ router = APIRouter(prefix="/api/users", tags=["Users"], dependencies=[Depends(ve
 
 
 @router.get("", response_model=list[UserResponse])
-async def list_users(db: AsyncSession = Depends(get_db)):
+async def list_users(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    cached = not_modified(request, response, data_version.etag("users"))
+    if cached is not None:
+        return cached
     result = await db.execute(select(User).order_by(User.username))
     return result.scalars().all()
 
@@ -40,6 +52,7 @@ async def create_user(data: UserCreate, db: AsyncSession = Depends(get_db)):
     if not user.display_name:
         user.display_name = user.username.capitalize()
     db.add(user)
+    mark_changed(db)
     await db.flush()
     await db.refresh(user)
     return user
@@ -47,16 +60,32 @@ async def create_user(data: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @router.post("/sync", response_model=UserSyncResponse)
 async def sync_users(data: UserSyncRequest, db: AsyncSession = Depends(get_db)):
-    """Synchronisiert Benutzer aus Home Assistant Person-Entities."""
+    """Synchronisiert Benutzer aus Home Assistant Person-Entities.
+
+    Beim Delta-Sync (full=false) werden nur die betroffenen User geladen;
+    entfernte Personen kommen über `removed`, auch solche ohne User als Warnung.
+    """
     created: list[User] = []
     updated: list[User] = []
     warnings: list[str] = []
 
-    # Bestehende User mit ha_user_id laden
-    result = await db.execute(select(User).where(User.ha_user_id.isnot(None)))
+    incoming_ids = {p.person_id for p in data.persons}
+    query = select(User).where(User.ha_user_id.isnot(None))
+    if not data.full:
+        query = select(User).where(User.ha_user_id.in_(incoming_ids | set(data.removed)))
+    result = await db.execute(query)
     existing_users = {u.ha_user_id: u for u in result.scalars().all()}
 
-    incoming_ids = {p.person_id for p in data.persons}
+    # Username aus person_id ableiten (z.B. "person.lukas" → "lukas"); vergebene
+    # Namen für alle neuen Personen in einer Abfrage
+    new_persons = [p for p in data.persons if p.person_id not in existing_users]
+    candidates = {p.person_id: p.person_id.replace("person.", "").replace(".", "_") for p in new_persons}
+    taken: set[str] = set()
+    if candidates:
+        result = await db.execute(
+            select(User.username).where(User.username.in_(set(candidates.values())))
+        )
+        taken = set(result.scalars().all())
 
     for person in data.persons:
         if person.person_id in existing_users:
@@ -66,35 +95,37 @@ async def sync_users(data: UserSyncRequest, db: AsyncSession = Depends(get_db)):
                 updated.append(user)
                 logger.info("Benutzer '%s' umbenannt (ha_user_id=%s)", person.name, person.person_id)
         else:
-            # Username aus person_id ableiten (z.B. "person.lukas" → "lukas")
-            username = person.person_id.replace("person.", "").replace(".", "_")
-            # Prüfen ob Username schon existiert
-            existing_username = await db.execute(
-                select(User).where(User.username == username)
-            )
-            if existing_username.scalar_one_or_none():
+            username = candidates[person.person_id]
+            if username in taken:
                 username = f"{username}_ha"
+            taken.add(username)
 
             user = User(
                 username=username,
                 display_name=person.name,
                 ha_user_id=person.person_id,
             )
-            db.add(user)
             created.append(user)
             logger.info("Neuer Benutzer '%s' aus HA-Person erstellt (ha_user_id=%s)", person.name, person.person_id)
 
     # Warnung für gelöschte Personen (kein Delete, da Punkte erhalten bleiben)
-    for ha_id, user in existing_users.items():
-        if ha_id not in incoming_ids:
+    missing = set(data.removed) if not data.full else existing_users.keys() - incoming_ids
+    for ha_id in sorted(missing - incoming_ids):
+        user = existing_users.get(ha_id)
+        if user is not None:
             warnings.append(
                 f"Benutzer '{user.display_name}' (ha_user_id={ha_id}) existiert nicht mehr in HA. "
                 f"Benutzer bleibt erhalten (Punkte-Daten)."
             )
+        else:
+            warnings.append(f"Entfernte HA-Person {ha_id} ist mit keinem Benutzer verknüpft.")
 
+    if created or updated:
+        mark_changed(db)
+    # Neue User gehen gesammelt in einem INSERT raus; alle Werte sind gesetzt,
+    # ein Nachladen ist nicht nötig
+    db.add_all(created)
     await db.flush()
-    for user in created + updated:
-        await db.refresh(user)
 
     return UserSyncResponse(
         created=[UserResponse.model_validate(u) for u in created],
@@ -103,6 +134,24 @@ async def sync_users(data: UserSyncRequest, db: AsyncSession = Depends(get_db)):
     )
 
 
+@router.post("/streaks/recompute", response_model=StreakRecomputeResponse)
+async def recompute_streaks(db: AsyncSession = Depends(get_db)):
+    """Streak-Zustand aller User aus der Completion-Historie neu aufbauen."""
+    count = await recompute_user_streaks(db)
+    mark_changed(db)
+    return StreakRecomputeResponse(users=count)
+
+
+@router.post("/stats/rebuild", response_model=StatsRebuildResponse)
+async def rebuild_stats(db: AsyncSession = Depends(get_db)):
+    """Statistik-Rollup (Completions/Punkte je User, Tag und Raum) neu aufbauen."""
+    rows = await rebuild_user_daily_stats(db)
+    mark_changed(db)
+    # Leaderboard-Index beim nächsten Zugriff neu aus dem Rollup laden
+    leaderboard_index.clear()
+    return StatsRebuildResponse(rows=rows)
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
     user = await db.get(User, user_id)
@@ -118,6 +167,7 @@ async def update_user(user_id: int, data: UserUpdate, db: AsyncSession = Depends
         raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(user, key, value)
+    mark_changed(db)
     await db.flush()
     await db.refresh(user)
     return user
@@ -129,6 +179,7 @@ async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
     await db.delete(user)
+    mark_changed(db)
 
 
 @router.get("/{user_id}/stats", response_model=UserStats)
@@ -137,11 +188,15 @@ async def get_user_stats(user_id: int, db: AsyncSession = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
 
-    # Gesamtanzahl Completions
-    total_result = await db.execute(
-        select(func.count(TaskCompletion.id)).where(TaskCompletion.user_id == user_id)
-    )
-    total_completed = total_result.scalar() or 0
+    # Completions je Raum aus dem Statistik-Rollup: Gesamt, diese Woche
+    # (Montag bis heute) und Lieblingsraum in einer Abfrage
+    today = rollup_today()
+    week_start = today - timedelta(days=today.weekday())
+    room_totals = await get_user_room_totals(db, user_id, week_start)
+    total_completed = sum(total for _, _, total, _ in room_totals)
+    tasks_this_week = sum(recent for _, _, _, recent in room_totals)
+    favorite = max(room_totals, key=lambda row: row[2], default=None)
+    favorite_room = favorite[1] if favorite else None
 
     # Achievements
     achievements_result = await db.execute(
@@ -149,30 +204,6 @@ async def get_user_stats(user_id: int, db: AsyncSession = Depends(get_db)):
     )
     achievements_count = achievements_result.scalar() or 0
 
-    # Tasks diese Woche (Montag bis heute)
-    today = date.today()
-    week_start = today - timedelta(days=today.weekday())
-    weekly_result = await db.execute(
-        select(func.count(TaskCompletion.id))
-        .where(TaskCompletion.user_id == user_id)
-        .where(func.date(TaskCompletion.completed_at) >= week_start)
-    )
-    tasks_this_week = weekly_result.scalar() or 0
-
-    # Lieblingsraum: Raum mit den meisten Completions
-    favorite_room_result = await db.execute(
-        select(Room.name, func.count(TaskCompletion.id).label("cnt"))
-        .join(TaskInstance, TaskCompletion.task_instance_id == TaskInstance.id)
-        .join(Task, TaskInstance.task_id == Task.id)
-        .join(Room, Task.room_id == Room.id)
-        .where(TaskCompletion.user_id == user_id)
-        .group_by(Room.name)
-        .order_by(func.count(TaskCompletion.id).desc())
-        .limit(1)
-    )
-    fav_row = favorite_room_result.first()
-    favorite_room = fav_row.name if fav_row else None
-
     return UserStats(
         user=UserResponse.model_validate(user),
         tasks_completed_total=total_completed,
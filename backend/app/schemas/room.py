@@ -1,3 +1,5 @@
+from datetime import date
+
 from pydantic import BaseModel
 
 
@@ -28,6 +30,18 @@ class RoomResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class RoomProgressResponse(BaseModel):
+    room_id: int
+    room_name: str
+    icon: str
+    day: date
+    total: int
+    completed: int
+    skipped: int
+    pending: int
+    is_complete: bool
+
+
 # --- HA Sync Schemas ---
 
 
@@ -37,7 +51,11 @@ class HaAreaInput(BaseModel):
 
 
 class RoomSyncRequest(BaseModel):
+    """Voller Abgleich (alle Areas) oder Delta (neue/umbenannte plus entfernte)."""
+
     areas: list[HaAreaInput]
+    removed: list[str] = []
+    full: bool = True
 
 
 class RoomSyncResponse(BaseModel):
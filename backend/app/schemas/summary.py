@@ -26,6 +26,24 @@ class GenerateSummaryRequest(BaseModel):
     week_start: date | None = None
 
 
-class GenerateSummaryResponse(BaseModel):
-    summary: WeeklySummaryResponse
-    tokens_used: int
+class SummaryJobResponse(BaseModel):
+    job_id: str
+    status: str
+    week_start: date
+    created_at: datetime
+    finished_at: datetime | None = None
+    error: str | None = None
+    tokens_used: int = 0
+    summary: WeeklySummaryResponse | None = None
+
+
+class ClaudeUsageResponse(BaseModel):
+    entries: int
+    total_hits: int
+    total_tokens_saved: int
+    requests: int
+    cache_hits: int
+    hit_rate: float
+    input_tokens: int
+    output_tokens: int
+    tokens_saved: int
@@ -1,6 +1,6 @@
 from datetime import date, datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.schemas.room import RoomResponse
 from app.schemas.user import UserResponse
@@ -62,6 +62,17 @@ class TaskInstanceWithDetails(TaskInstanceResponse):
     assigned_user: UserResponse | None = None
 
 
+class GenerateInstancesRequest(BaseModel):
+    start_date: date
+    end_date: date | None = None
+
+
+class GenerateInstancesResponse(BaseModel):
+    start_date: date
+    end_date: date
+    created: int
+
+
 class CompleteRequest(BaseModel):
     user_id: int
     notes: str | None = None
@@ -112,3 +123,35 @@ class ExtendedCompletionResponse(BaseModel):
     bonus_breakdown: BonusBreakdown
     streak: StreakUpdate
     unlocked_achievements: list[UnlockedAchievement]
+
+
+class BatchCompleteItem(BaseModel):
+    instance_id: int
+    user_id: int
+    notes: str | None = None
+
+
+class BatchCompleteRequest(BaseModel):
+    items: list[BatchCompleteItem] = Field(min_length=1, max_length=100)
+
+
+class BatchCompleteItemResult(BaseModel):
+    instance_id: int
+    user_id: int
+    success: bool
+    error: str | None = None
+    completion: CompletionResponse | None = None
+    bonus_breakdown: BonusBreakdown | None = None
+
+
+class BatchUserResult(BaseModel):
+    user_id: int
+    total_points: int
+    weekly_points: int
+    streak: StreakUpdate
+    unlocked_achievements: list[UnlockedAchievement]
+
+
+class BatchCompleteResponse(BaseModel):
+    results: list[BatchCompleteItemResult]
+    users: list[BatchUserResult]
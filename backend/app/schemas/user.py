@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from pydantic import BaseModel
 
@@ -38,6 +38,41 @@ class UserStats(BaseModel):
     achievements_count: int
 
 
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: str
+    display_name: str | None
+    avatar_url: str | None
+    points: int
+
+
+class LeaderboardWindowResponse(BaseModel):
+    window: str
+    start_date: date
+    end_date: date
+    total: int
+    entries: list[LeaderboardEntry]
+
+
+class LeaderboardRankResponse(BaseModel):
+    window: str
+    start_date: date
+    end_date: date
+    total: int
+    user_id: int
+    rank: int | None
+    points: int
+
+
+class StreakRecomputeResponse(BaseModel):
+    users: int
+
+
+class StatsRebuildResponse(BaseModel):
+    rows: int
+
+
 # --- HA Sync Schemas ---
 
 
@@ -47,7 +82,11 @@ class HaPersonInput(BaseModel):
 
 
 class UserSyncRequest(BaseModel):
+    """Voller Abgleich (alle Personen) oder Delta (neue/umbenannte plus entfernte)."""
+
     persons: list[HaPersonInput]
+    removed: list[str] = []
+    full: bool = True
 
 
 class UserSyncResponse(BaseModel):
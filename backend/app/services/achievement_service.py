@@ -1,124 +1,177 @@
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
 
-from sqlalchemy import select, func
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.completion import Achievement, TaskCompletion, UserAchievement
-from app.models.task import Task
+from app.models.completion import Achievement, UserAchievement, UserDailyStats
 from app.models.user import User
 from app.schemas.task import UnlockedAchievement
 
 
-async def _get_total_completions(db: AsyncSession, user_id: int) -> int:
-    result = await db.execute(
-        select(func.count(TaskCompletion.id)).where(TaskCompletion.user_id == user_id)
-    )
-    return result.scalar() or 0
+@dataclass
+class AchievementCounters:
+    """In-Memory-Snapshot aller Zähler, gegen die Kriterien geprüft werden."""
 
+    total_tasks: int = 0
+    room_tasks: dict[int, int] = field(default_factory=dict)
+    current_streak: int = 0
+    weekly_points: int = 0
+    is_weekly_leader: bool = False
 
-async def _get_room_completions(db: AsyncSession, user_id: int, room_id: int) -> int:
-    result = await db.execute(
-        select(func.count(TaskCompletion.id))
-        .join(
-            Task,
-            TaskCompletion.task_instance.has(task_id=Task.id),
+
+# Kriterien-Typ -> Funktion (Zähler, Kriterium) -> (aktuell, ziel).
+# Neue Kriterien brauchen nur einen Eintrag hier (und ggf. einen Zähler).
+CriterionEvaluator = Callable[[AchievementCounters, dict], tuple[int, int]]
+
+
+def _eval_total_tasks(counters: AchievementCounters, criteria: dict) -> tuple[int, int]:
+    return counters.total_tasks, criteria.get("value", 0)
+
+
+def _eval_room_tasks(counters: AchievementCounters, criteria: dict) -> tuple[int, int]:
+    room_id = criteria.get("room_id")
+    if room_id:
+        current = counters.room_tasks.get(room_id, 0)
+    else:
+        # Beliebiger Raum - höchste Anzahl
+        current = max(counters.room_tasks.values(), default=0)
+    return current, criteria.get("value", 0)
+
+
+def _eval_streak(counters: AchievementCounters, criteria: dict) -> tuple[int, int]:
+    return counters.current_streak, criteria.get("value", 0)
+
+
+def _eval_weekly_winner(counters: AchievementCounters, criteria: dict) -> tuple[int, int]:
+    # User mit den meisten Weekly-Points (und überhaupt Punkten)
+    is_winner = counters.is_weekly_leader and counters.weekly_points > 0
+    return (1 if is_winner else 0), 1
+
+
+CRITERIA_EVALUATORS: dict[str, CriterionEvaluator] = {
+    "total_tasks": _eval_total_tasks,
+    "room_tasks": _eval_room_tasks,
+    "streak": _eval_streak,
+    "weekly_winner": _eval_weekly_winner,
+}
+
+# Kriterien, die Completion-Zähler aus der DB brauchen
+_COMPLETION_CRITERIA = {"total_tasks", "room_tasks"}
+
+
+def _check_criteria(counters: AchievementCounters, criteria: dict) -> tuple[bool, int, int]:
+    """Prüft ein Kriterium gegen den Snapshot. Gibt (erfüllt, aktuell, ziel) zurück."""
+    evaluator = CRITERIA_EVALUATORS.get(criteria.get("type"))
+    if evaluator is None:
+        return False, 0, 0
+    current, target = evaluator(counters, criteria)
+    return current >= target, current, target
+
+
+async def load_counters(
+    db: AsyncSession, users: Sequence[User], criteria_types: set[str] | None = None
+) -> dict[int, AchievementCounters]:
+    """Lädt die Zähler für alle übergebenen User mit konstanter Anzahl Abfragen.
+
+    Eine gruppierte Abfrage über das Statistik-Rollup liefert die Completions
+    je (User, Raum), daraus ergeben sich Gesamt- und Raum-Zähler; eine weitere
+    bestimmt den Wochen-Führenden. Abfragen für Kriterien, die nicht gebraucht werden
+    (criteria_types), entfallen.
+    """
+    counters = {
+        u.id: AchievementCounters(
+            current_streak=u.current_streak or 0,
+            weekly_points=u.weekly_points or 0,
         )
-        .where(TaskCompletion.user_id == user_id)
-    )
-    # Besser: über task_instances joinen
-    from app.models.task import TaskInstance
-    result = await db.execute(
-        select(func.count(TaskCompletion.id))
-        .join(TaskInstance, TaskCompletion.task_instance_id == TaskInstance.id)
-        .join(Task, TaskInstance.task_id == Task.id)
-        .where(TaskCompletion.user_id == user_id)
-        .where(Task.room_id == room_id)
-    )
-    return result.scalar() or 0
-
-
-async def _check_criteria(db: AsyncSession, user: User, criteria: dict) -> tuple[bool, int, int]:
-    """Prüft ob ein Achievement-Kriterium erfüllt ist. Gibt (erfüllt, aktuell, ziel) zurück."""
-    criteria_type = criteria.get("type")
-    target = criteria.get("value", 0)
-
-    if criteria_type == "total_tasks":
-        current = await _get_total_completions(db, user.id)
-        return current >= target, current, target
-
-    elif criteria_type == "room_tasks":
-        room_id = criteria.get("room_id")
-        if room_id:
-            current = await _get_room_completions(db, user.id, room_id)
-        else:
-            # Beliebiger Raum - höchste Anzahl
-            from app.models.task import TaskInstance
-            result = await db.execute(
-                select(Task.room_id, func.count(TaskCompletion.id).label("cnt"))
-                .join(TaskInstance, TaskCompletion.task_instance_id == TaskInstance.id)
-                .join(Task, TaskInstance.task_id == Task.id)
-                .where(TaskCompletion.user_id == user.id)
-                .group_by(Task.room_id)
-                .order_by(func.count(TaskCompletion.id).desc())
-                .limit(1)
-            )
-            row = result.first()
-            current = row.cnt if row else 0
-        return current >= target, current, target
+        for u in users
+    }
+    if not counters:
+        return counters
 
-    elif criteria_type == "streak":
-        current = user.current_streak
-        return current >= target, current, target
+    if criteria_types is None or criteria_types & _COMPLETION_CRITERIA:
+        result = await db.execute(
+            select(
+                UserDailyStats.user_id,
+                UserDailyStats.room_id,
+                func.sum(UserDailyStats.completions),
+            )
+            .where(UserDailyStats.user_id.in_(list(counters)))
+            .group_by(UserDailyStats.user_id, UserDailyStats.room_id)
+        )
+        for user_id, room_id, count in result.all():
+            snapshot = counters[user_id]
+            snapshot.total_tasks += int(count)
+            snapshot.room_tasks[room_id] = int(count)
 
-    elif criteria_type == "weekly_winner":
-        # Prüft ob der User die meisten Weekly-Points hat
-        from sqlalchemy import and_
+    if criteria_types is None or "weekly_winner" in criteria_types:
         result = await db.execute(
-            select(User.id)
-            .order_by(User.weekly_points.desc())
-            .limit(1)
+            select(User.id).order_by(User.weekly_points.desc(), User.id).limit(1)
         )
-        winner_id = result.scalar()
-        is_winner = winner_id == user.id and user.weekly_points > 0
-        return is_winner, 1 if is_winner else 0, 1
+        leader_id = result.scalar()
+        if leader_id in counters:
+            counters[leader_id].is_weekly_leader = True
 
-    return False, 0, 0
+    return counters
 
 
-async def check_and_unlock_achievements(
-    db: AsyncSession, user: User
-) -> list[UnlockedAchievement]:
-    """Prüft alle Achievements und schaltet neue frei."""
-    # Bereits freigeschaltete Achievements
-    result = await db.execute(
-        select(UserAchievement.achievement_id).where(UserAchievement.user_id == user.id)
-    )
-    unlocked_ids = set(result.scalars().all())
+async def check_and_unlock_achievements_batch(
+    db: AsyncSession, users: Sequence[User]
+) -> dict[int, list[UnlockedAchievement]]:
+    """Prüft alle Achievements für mehrere User und schaltet neue frei.
 
-    # Alle Achievements laden
-    result = await db.execute(select(Achievement))
-    all_achievements = result.scalars().all()
+    Die Anzahl der Abfragen hängt weder von der Zahl der Achievements noch
+    von der Zahl der User ab.
+    """
+    newly_unlocked: dict[int, list[UnlockedAchievement]] = {u.id: [] for u in users}
+    if not users:
+        return newly_unlocked
 
-    newly_unlocked = []
+    result = await db.execute(select(Achievement).order_by(Achievement.id))
+    all_achievements = result.scalars().all()
+    if not all_achievements:
+        return newly_unlocked
 
-    for achievement in all_achievements:
-        if achievement.id in unlocked_ids:
-            continue
-
-        fulfilled, _, _ = await _check_criteria(db, user, achievement.criteria)
-        if fulfilled:
-            user_achievement = UserAchievement(
-                user_id=user.id,
-                achievement_id=achievement.id,
-                unlocked_at=datetime.utcnow(),
-            )
-            db.add(user_achievement)
+    # Bereits freigeschaltete Achievements
+    result = await db.execute(
+        select(UserAchievement.user_id, UserAchievement.achievement_id)
+        .where(UserAchievement.user_id.in_(list(newly_unlocked)))
+    )
+    unlocked_pairs = set(result.tuples().all())
+
+    candidates = {
+        u.id: [a for a in all_achievements if (u.id, a.id) not in unlocked_pairs]
+        for u in users
+    }
+    criteria_types = {
+        a.criteria.get("type") for pending in candidates.values() for a in pending
+    }
+    if not criteria_types:
+        return newly_unlocked
+
+    counters = await load_counters(db, users, criteria_types)
+    now = datetime.utcnow()
+    new_rows: list[dict] = []
+
+    for user in users:
+        snapshot = counters[user.id]
+        for achievement in candidates[user.id]:
+            fulfilled, _, _ = _check_criteria(snapshot, achievement.criteria)
+            if not fulfilled:
+                continue
+
+            new_rows.append({
+                "user_id": user.id,
+                "achievement_id": achievement.id,
+                "unlocked_at": now,
+            })
 
             # Bonus-Punkte gutschreiben
             user.total_points += achievement.points_reward
             user.weekly_points += achievement.points_reward
 
-            newly_unlocked.append(UnlockedAchievement(
+            newly_unlocked[user.id].append(UnlockedAchievement(
                 id=achievement.id,
                 name=achievement.name,
                 description=achievement.description,
@@ -126,9 +179,21 @@ async def check_and_unlock_achievements(
                 points_reward=achievement.points_reward,
             ))
 
+    if new_rows:
+        # Ein (executemany-)INSERT für alle Freischaltungen
+        await db.execute(insert(UserAchievement), new_rows)
+
     return newly_unlocked
 
 
+async def check_and_unlock_achievements(
+    db: AsyncSession, user: User
+) -> list[UnlockedAchievement]:
+    """Prüft alle Achievements und schaltet neue frei."""
+    unlocked = await check_and_unlock_achievements_batch(db, [user])
+    return unlocked[user.id]
+
+
 async def get_achievement_progress(
     db: AsyncSession, user: User
 ) -> list[dict]:
@@ -143,9 +208,12 @@ async def get_achievement_progress(
     result = await db.execute(select(Achievement))
     all_achievements = result.scalars().all()
 
+    criteria_types = {a.criteria.get("type") for a in all_achievements}
+    snapshot = (await load_counters(db, [user], criteria_types))[user.id]
+
     progress_list = []
     for achievement in all_achievements:
-        _, current, target = await _check_criteria(db, user, achievement.criteria)
+        _, current, target = _check_criteria(snapshot, achievement.criteria)
         target = max(target, 1)  # Division durch 0 vermeiden
         progress_list.append({
             "achievement": achievement,
@@ -0,0 +1,119 @@
+"""In-Process-Cache: Datenversion und vorkodierter Dashboard-Snapshot."""
+
+import hashlib
+import json
+import logging
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger("chorequest.cache")
+
+_CHANGED_KEY = "chorequest_data_changed"
+
+
+class DataVersion:
+    """Monoton steigender Zähler, der bei jeder Datenänderung erhöht wird.
+
+    Die Epoche unterscheidet Prozess-Neustarts, damit ein Zähler, der wieder
+    bei 0 beginnt, nicht mit alten ETags der Clients kollidiert.
+    """
+
+    def __init__(self) -> None:
+        self._value = 0
+        self.epoch = secrets.token_hex(4)
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def etag(self, *scope) -> str:
+        """Starker ETag für den aktuellen Datenstand im gegebenen Scope."""
+        return make_etag(self.epoch, self._value, *scope)
+
+    def bump(self) -> int:
+        self._value += 1
+        return self._value
+
+
+data_version = DataVersion()
+
+
+def mark_changed(db: AsyncSession) -> None:
+    """Markiert die Session als ändernd — die Version steigt erst nach dem Commit.
+
+    So kann kein Poll zwischen Bump und Commit einen veralteten Stand unter der
+    neuen Version cachen.
+    """
+    db.sync_session.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    if session.info.pop(_CHANGED_KEY, False):
+        data_version.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def make_etag(*parts) -> str:
+    raw = "|".join(str(p) for p in parts).encode("utf-8")
+    return '"' + hashlib.sha1(raw).hexdigest()[:20] + '"'
+
+
+def encode_json(payload) -> bytes:
+    """Kodiert wie FastAPIs JSONResponse."""
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+@dataclass
+class _Snapshot:
+    version: int
+    day: date
+    created_at: float
+    body: bytes
+    etag: str
+
+
+class DashboardSnapshotCache:
+    """Hält den zuletzt gebauten Dashboard-Payload als fertige JSON-Bytes.
+
+    Gültig solange Datenversion und Datum übereinstimmen; die TTL greift als
+    Fallback für Änderungen, die nicht über die API laufen.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: _Snapshot | None = None
+
+    def get(self, version: int, day: date) -> tuple[bytes, str] | None:
+        snap = self._snapshot
+        if snap is None or snap.version != version or snap.day != day:
+            return None
+        if time.monotonic() - snap.created_at > settings.dashboard_cache_ttl:
+            return None
+        return snap.body, snap.etag
+
+    def put(self, version: int, day: date, body: bytes) -> str:
+        # ETag aus dem Inhalt, damit auch ein TTL-Neubau ohne Versionswechsel
+        # einen neuen ETag liefert, sobald sich die Daten geändert haben
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self._snapshot = _Snapshot(version, day, time.monotonic(), body, etag)
+        return etag
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+
+dashboard_cache = DashboardSnapshotCache()
@@ -0,0 +1,140 @@
+"""Persistenter Cache für Claude-Antworten und Zähler für Token-Verbrauch."""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.completion import ClaudeResponseCache
+
+logger = logging.getLogger("chorequest.claude")
+
+
+def cache_key(model: str, system_prompt: str, payload: str) -> str:
+    """SHA-256 über Modell, System-Prompt und Payload."""
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, payload):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@dataclass
+class ClaudeUsage:
+    """Zähler seit Prozessstart."""
+
+    requests: int = 0
+    cache_hits: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    tokens_saved: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return round(self.cache_hits / self.requests, 3) if self.requests else 0.0
+
+    def record_hit(self, entry: ClaudeResponseCache) -> None:
+        self.requests += 1
+        self.cache_hits += 1
+        self.tokens_saved += entry.input_tokens + entry.output_tokens
+
+    def record_call(self, input_tokens: int, output_tokens: int) -> None:
+        self.requests += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+
+    def reset(self) -> None:
+        self.requests = self.cache_hits = 0
+        self.input_tokens = self.output_tokens = self.tokens_saved = 0
+
+
+claude_usage = ClaudeUsage()
+
+
+async def lookup_cached_response(
+    session_factory: async_sessionmaker[AsyncSession], key: str
+) -> ClaudeResponseCache | None:
+    """Gültiger Cache-Eintrag (innerhalb der TTL) oder None; zählt Treffer mit."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.claude_cache_ttl_hours)
+    async with session_factory() as db:
+        entry = await db.get(ClaudeResponseCache, key)
+        if entry is None or entry.created_at < cutoff:
+            return None
+        entry.hit_count += 1
+        entry.last_used_at = datetime.utcnow()
+        await db.commit()
+    claude_usage.record_hit(entry)
+    return entry
+
+
+async def store_cached_response(
+    session_factory: async_sessionmaker[AsyncSession],
+    key: str,
+    model: str,
+    response_text: str,
+    input_tokens: int,
+    output_tokens: int,
+) -> None:
+    """Speichert eine Antwort und räumt abgelaufene bzw. überzählige Einträge ab."""
+    now = datetime.utcnow()
+    async with session_factory() as db:
+        await db.merge(ClaudeResponseCache(
+            cache_key=key,
+            model=model,
+            response_text=response_text,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            hit_count=0,
+            created_at=now,
+            last_used_at=now,
+        ))
+        await db.flush()
+        await _evict(db, now)
+        await db.commit()
+
+
+async def _evict(db: AsyncSession, now: datetime) -> None:
+    cutoff = now - timedelta(hours=settings.claude_cache_ttl_hours)
+    await db.execute(delete(ClaudeResponseCache).where(ClaudeResponseCache.created_at < cutoff))
+    # Über dem Limit: die am längsten nicht genutzten Einträge
+    keep = (
+        select(ClaudeResponseCache.cache_key)
+        .order_by(ClaudeResponseCache.last_used_at.desc())
+        .limit(settings.claude_cache_max_entries)
+    )
+    await db.execute(
+        delete(ClaudeResponseCache).where(ClaudeResponseCache.cache_key.not_in(keep.scalar_subquery()))
+    )
+
+
+async def get_cache_stats(db: AsyncSession) -> dict:
+    """Cache-Größe und Einsparung (persistent) plus Zähler seit Prozessstart."""
+    result = await db.execute(
+        select(
+            func.count(ClaudeResponseCache.cache_key),
+            func.coalesce(func.sum(ClaudeResponseCache.hit_count), 0),
+            func.coalesce(
+                func.sum(
+                    ClaudeResponseCache.hit_count
+                    * (ClaudeResponseCache.input_tokens + ClaudeResponseCache.output_tokens)
+                ),
+                0,
+            ),
+        )
+    )
+    entries, hits, tokens_saved = result.one()
+    return {
+        "entries": entries,
+        "total_hits": int(hits),
+        "total_tokens_saved": int(tokens_saved),
+        "requests": claude_usage.requests,
+        "cache_hits": claude_usage.cache_hits,
+        "hit_rate": claude_usage.hit_rate,
+        "input_tokens": claude_usage.input_tokens,
+        "output_tokens": claude_usage.output_tokens,
+        "tokens_saved": claude_usage.tokens_saved,
+    }
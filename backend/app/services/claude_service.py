@@ -3,14 +3,18 @@ import logging
 import re
 from datetime import date, datetime, timedelta
 
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.config import settings
-from app.models.completion import Achievement, TaskCompletion, UserAchievement, WeeklySummary
-from app.models.room import Room
-from app.models.task import Task, TaskInstance
-from app.models.user import User
+from app.models.completion import WeeklySummary
+from app.services.claude_cache_service import (
+    cache_key,
+    claude_usage,
+    lookup_cached_response,
+    store_cached_response,
+)
+from app.services.stats_service import collect_period_stats
 
 logger = logging.getLogger("chorequest.claude")
 
@@ -31,6 +35,10 @@ Antworte AUSSCHLIESSLICH mit validem JSON in folgendem Format:
   ]
 }
 
+Die Statistik kommt als kompaktes JSON: Tabellen mit "cols" (Spaltennamen) und
+"rows" (Zeilen). Ausgelassene Zeilen (User ohne Aktivität, leere Räume, alles
+außerhalb der Top-Liste) sind unter "omitted" gezählt.
+
 Regeln:
 - Zusammenfassung soll motivierend und positiv sein, aber auch ehrlich
 - Nenne konkrete Zahlen und Erfolge
@@ -43,118 +51,90 @@ async def gather_weekly_stats(
     db: AsyncSession, week_start: date, week_end: date
 ) -> dict:
     """Sammelt Statistiken für die angegebene Woche."""
-    # User-Daten
-    users_result = await db.execute(select(User))
-    users = users_result.scalars().all()
-
-    user_stats = []
-    for user in users:
-        # Completions dieser Woche
-        completions_result = await db.execute(
-            select(
-                func.count(TaskCompletion.id),
-                func.coalesce(func.sum(TaskCompletion.points_earned), 0),
-            )
-            .where(TaskCompletion.user_id == user.id)
-            .where(TaskCompletion.completed_at >= datetime.combine(week_start, datetime.min.time()))
-            .where(TaskCompletion.completed_at < datetime.combine(week_end + timedelta(days=1), datetime.min.time()))
-        )
-        row = completions_result.one()
-        user_stats.append({
-            "name": user.display_name or user.username,
-            "completions": row[0],
-            "points_earned": int(row[1]),
-            "current_streak": user.current_streak,
-            "weekly_points": user.weekly_points,
-        })
-
-    # Raum-Statistiken
-    rooms_result = await db.execute(select(Room))
-    rooms = rooms_result.scalars().all()
-
-    room_stats = []
-    for room in rooms:
-        # Task-Instanzen dieser Woche pro Raum
-        instances_result = await db.execute(
-            select(TaskInstance.status, func.count(TaskInstance.id))
-            .join(Task, TaskInstance.task_id == Task.id)
-            .where(Task.room_id == room.id)
-            .where(TaskInstance.due_date >= week_start)
-            .where(TaskInstance.due_date <= week_end)
-            .group_by(TaskInstance.status)
-        )
-        status_counts = {row[0]: row[1] for row in instances_result.all()}
-        room_stats.append({
-            "name": room.name,
-            "completed": status_counts.get("completed", 0),
-            "pending": status_counts.get("pending", 0),
-            "skipped": status_counts.get("skipped", 0),
-        })
-
-    # Achievements dieser Woche
-    achievements_result = await db.execute(
-        select(Achievement.name, User.display_name, User.username)
-        .join(UserAchievement, UserAchievement.achievement_id == Achievement.id)
-        .join(User, UserAchievement.user_id == User.id)
-        .where(UserAchievement.unlocked_at >= datetime.combine(week_start, datetime.min.time()))
-        .where(UserAchievement.unlocked_at < datetime.combine(week_end + timedelta(days=1), datetime.min.time()))
-    )
-    achievements = [
-        {"achievement": row[0], "user": row[1] or row[2]}
-        for row in achievements_result.all()
-    ]
-
-    # Gesamtstatistik
-    total_instances_result = await db.execute(
-        select(func.count(TaskInstance.id))
-        .where(TaskInstance.due_date >= week_start)
-        .where(TaskInstance.due_date <= week_end)
-    )
-    total_instances = total_instances_result.scalar() or 0
-
-    completed_instances_result = await db.execute(
-        select(func.count(TaskInstance.id))
-        .where(TaskInstance.due_date >= week_start)
-        .where(TaskInstance.due_date <= week_end)
-        .where(TaskInstance.status == "completed")
-    )
-    completed_instances = completed_instances_result.scalar() or 0
-
-    completion_rate = (
-        round(completed_instances / total_instances * 100, 1) if total_instances > 0 else 0
-    )
-
     return {
         "week_start": week_start.isoformat(),
         "week_end": week_end.isoformat(),
-        "users": user_stats,
-        "rooms": room_stats,
-        "achievements_unlocked": achievements,
-        "total_tasks": total_instances,
-        "completed_tasks": completed_instances,
-        "completion_rate_percent": completion_rate,
+        **await collect_period_stats(db, week_start, week_end),
     }
 
 
-async def call_claude_api(stats: dict) -> tuple[str, list[dict], int]:
-    """Ruft die Claude API auf und gibt (summary_text, suggested_tasks, tokens_used) zurück."""
-    import anthropic
+def estimate_tokens(text: str) -> int:
+    """Grobe Token-Schätzung (~4 Zeichen pro Token), ohne API-Aufruf."""
+    return len(text) // 4 + 1
 
-    client = anthropic.AsyncAnthropic(api_key=settings.claude_api_key)
 
-    response = await client.messages.create(
-        model=settings.claude_model,
-        max_tokens=1500,
-        temperature=0.7,
-        system=SYSTEM_PROMPT,
-        messages=[
-            {"role": "user", "content": json.dumps(stats, ensure_ascii=False)}
-        ],
-    )
+def _table(cols: list[str], rows: list[dict]) -> dict:
+    return {"cols": cols, "rows": [[row[c] for c in cols] for row in rows]}
 
-    raw_text = response.content[0].text
-    tokens_used = (response.usage.input_tokens or 0) + (response.usage.output_tokens or 0)
 
+def compact_stats(stats: dict, token_budget: int, top_n: int) -> str:
+    """Kodiert die Statistik kompakt als Prompt-Payload innerhalb des Token-Budgets.
+
+    User ohne Aktivität und Räume ohne Instanzen fallen weg; übrig bleiben die
+    Top-N User (nach Punkten) und Räume (nach offenen bzw. übersprungenen
+    Aufgaben). Passt das nicht ins Budget, wird N schrittweise halbiert.
+    """
+    users = sorted(
+        (u for u in stats["users"] if u["completions"] or u["points_earned"] or u["current_streak"]),
+        key=lambda u: (-u["points_earned"], -u["completions"], u["name"]),
+    )
+    rooms = sorted(
+        (r for r in stats["rooms"] if r["completed"] or r["pending"] or r["skipped"]),
+        key=lambda r: (-(r["pending"] + r["skipped"]), -r["completed"], r["name"]),
+    )
+    achievements = stats["achievements_unlocked"]
+
+    n = max(1, top_n)
+    while True:
+        payload = {
+            "week": [stats["week_start"], stats["week_end"]],
+            "totals": {
+                "tasks": stats["total_tasks"],
+                "completed": stats["completed_tasks"],
+                "rate_percent": stats["completion_rate_percent"],
+            },
+            "users": _table(
+                ["name", "completions", "points_earned", "current_streak", "weekly_points"],
+                users[:n],
+            ),
+            "rooms": _table(["name", "completed", "pending", "skipped"], rooms[:n]),
+            "achievements": _table(["achievement", "user"], achievements[:n]),
+        }
+        omitted = {
+            "users": len(stats["users"]) - min(n, len(users)),
+            "rooms": len(stats["rooms"]) - min(n, len(rooms)),
+            "achievements": max(0, len(achievements) - n),
+        }
+        if any(omitted.values()):
+            payload["omitted"] = omitted
+        text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        if estimate_tokens(text) <= token_budget or n == 1:
+            return text
+        n //= 2
+
+
+_client = None
+
+
+def get_claude_client():
+    """Geteilter, langlebiger Client (Verbindungspool wird wiederverwendet)."""
+    global _client
+    if _client is None:
+        import anthropic
+
+        _client = anthropic.AsyncAnthropic(api_key=settings.claude_api_key)
+    return _client
+
+
+async def close_claude_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def parse_claude_response(raw_text: str) -> tuple[str, list[dict]]:
+    """(summary_text, suggested_tasks) aus der Rohantwort."""
     # JSON parsen (Markdown-Codeblöcke strippen falls vorhanden)
     cleaned = re.sub(r"^```(?:json)?\s*\n?", "", raw_text.strip())
     cleaned = re.sub(r"\n?```\s*$", "", cleaned)
@@ -163,26 +143,104 @@ async def call_claude_api(stats: dict) -> tuple[str, list[dict], int]:
         data = json.loads(cleaned)
     except json.JSONDecodeError:
         logger.warning("Claude-Antwort konnte nicht als JSON geparst werden: %s", raw_text[:200])
-        return raw_text, [], tokens_used
+        return raw_text, []
 
-    summary_text = data.get("summary_text", raw_text)
-    suggested_tasks = data.get("suggested_tasks", [])
+    return data.get("summary_text", raw_text), data.get("suggested_tasks", [])
 
-    return summary_text, suggested_tasks, tokens_used
 
+async def call_claude_api(
+    stats: dict, session_factory: async_sessionmaker[AsyncSession]
+) -> tuple[str, list[dict], int]:
+    """Ruft die Claude API auf und gibt (summary_text, suggested_tasks, tokens_used) zurück.
 
-async def generate_weekly_summary(
-    db: AsyncSession, week_start: date | None = None
-) -> tuple[WeeklySummary, int]:
-    """Generiert eine Wochen-Zusammenfassung und speichert sie in der DB."""
-    # Montag der aktuellen/angegebenen Woche berechnen
+    Identische Anfragen (Modell, System-Prompt, Payload) kommen innerhalb der
+    TTL aus dem Antwort-Cache und kosten keine Tokens.
+    """
+    payload = compact_stats(stats, settings.claude_prompt_token_budget, settings.claude_prompt_top_n)
+    key = cache_key(settings.claude_model, SYSTEM_PROMPT, payload)
+    logger.info(
+        "Claude-Prompt: ca. %d Tokens (Payload %d, Budget %d)",
+        estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(payload),
+        estimate_tokens(payload),
+        settings.claude_prompt_token_budget,
+    )
+
+    cached = await lookup_cached_response(session_factory, key)
+    if cached is not None:
+        logger.info(
+            "Claude-Antwort aus dem Cache (%d Tokens gespart, Trefferquote %.0f%%)",
+            cached.input_tokens + cached.output_tokens,
+            claude_usage.hit_rate * 100,
+        )
+        return (*parse_claude_response(cached.response_text), 0)
+
+    response = await get_claude_client().messages.create(
+        model=settings.claude_model,
+        max_tokens=1500,
+        temperature=0.7,
+        system=SYSTEM_PROMPT,
+        messages=[
+            {"role": "user", "content": payload}
+        ],
+    )
+
+    raw_text = response.content[0].text
+    input_tokens = response.usage.input_tokens or 0
+    output_tokens = response.usage.output_tokens or 0
+    claude_usage.record_call(input_tokens, output_tokens)
+    await store_cached_response(
+        session_factory, key, settings.claude_model, raw_text, input_tokens, output_tokens
+    )
+
+    return (*parse_claude_response(raw_text), input_tokens + output_tokens)
+
+
+def week_bounds(week_start: date | None = None) -> tuple[date, date]:
+    """Montag und Sonntag der angegebenen (Standard: aktuellen) Woche."""
     if week_start is None:
         today = date.today()
         week_start = today - timedelta(days=today.weekday())  # Montag
+    return week_start, week_start + timedelta(days=6)  # Sonntag
 
-    week_end = week_start + timedelta(days=6)  # Sonntag
 
-    # Bestehende Summary für diese Woche löschen (für Re-Generierung)
+def _fallback_text(week_start: date, stats: dict, note: str) -> str:
+    return (
+        f"Wochen-Zusammenfassung KW {week_start.isocalendar()[1]}\n\n"
+        f"In dieser Woche wurden {stats['completed_tasks']} von {stats['total_tasks']} "
+        f"Aufgaben erledigt ({stats['completion_rate_percent']}%).\n\n"
+        f"{note}"
+    )
+
+
+async def build_summary_content(
+    stats: dict, week_start: date, session_factory: async_sessionmaker[AsyncSession]
+) -> tuple[str, list[dict], int]:
+    """(summary_text, suggested_tasks, tokens_used) per Claude oder Fallback-Text."""
+    if not settings.claude_api_key:
+        # Fallback ohne API-Key
+        logger.info("Kein Claude API-Key konfiguriert, verwende Fallback-Text")
+        return _fallback_text(
+            week_start, stats,
+            "Für eine KI-generierte Zusammenfassung bitte den Claude API-Key konfigurieren.",
+        ), [], 0
+    try:
+        return await call_claude_api(stats, session_factory)
+    except Exception as e:
+        logger.error("Fehler beim Claude API-Aufruf: %s", e)
+        return _fallback_text(
+            week_start, stats,
+            f"Die KI-Zusammenfassung konnte nicht generiert werden: {e}",
+        ), [], 0
+
+
+async def store_weekly_summary(
+    db: AsyncSession,
+    week_start: date,
+    week_end: date,
+    summary_text: str,
+    suggested_tasks: list[dict],
+) -> WeeklySummary:
+    """Speichert die Zusammenfassung und ersetzt eine bestehende derselben Woche."""
     existing_result = await db.execute(
         select(WeeklySummary).where(WeeklySummary.week_start == week_start)
     )
@@ -191,34 +249,6 @@ async def generate_weekly_summary(
         await db.delete(existing)
         await db.flush()
 
-    # Stats sammeln
-    stats = await gather_weekly_stats(db, week_start, week_end)
-
-    tokens_used = 0
-    summary_text = ""
-    suggested_tasks: list[dict] = []
-
-    if not settings.claude_api_key:
-        # Fallback ohne API-Key
-        logger.info("Kein Claude API-Key konfiguriert, verwende Fallback-Text")
-        summary_text = (
-            f"Wochen-Zusammenfassung KW {week_start.isocalendar()[1]}\n\n"
-            f"In dieser Woche wurden {stats['completed_tasks']} von {stats['total_tasks']} "
-            f"Aufgaben erledigt ({stats['completion_rate_percent']}%).\n\n"
-            "Für eine KI-generierte Zusammenfassung bitte den Claude API-Key konfigurieren."
-        )
-    else:
-        try:
-            summary_text, suggested_tasks, tokens_used = await call_claude_api(stats)
-        except Exception as e:
-            logger.error("Fehler beim Claude API-Aufruf: %s", e)
-            summary_text = (
-                f"Wochen-Zusammenfassung KW {week_start.isocalendar()[1]}\n\n"
-                f"In dieser Woche wurden {stats['completed_tasks']} von {stats['total_tasks']} "
-                f"Aufgaben erledigt ({stats['completion_rate_percent']}%).\n\n"
-                f"Die KI-Zusammenfassung konnte nicht generiert werden: {e}"
-            )
-
     summary = WeeklySummary(
         week_start=week_start,
         week_end=week_end,
@@ -229,6 +259,31 @@ async def generate_weekly_summary(
     db.add(summary)
     await db.flush()
     await db.refresh(summary)
+    return summary
+
+
+async def generate_weekly_summary(
+    session_factory: async_sessionmaker[AsyncSession], week_start: date | None = None
+) -> tuple[WeeklySummary, int]:
+    """Generiert eine Wochen-Zusammenfassung und speichert sie in der DB.
+
+    Statistik und Speichern laufen in je einer kurzen Session; während des
+    Claude-Aufrufs ist keine Session (und keine Verbindung) belegt.
+    """
+    week_start, week_end = week_bounds(week_start)
+
+    async with session_factory() as db:
+        stats = await gather_weekly_stats(db, week_start, week_end)
+
+    summary_text, suggested_tasks, tokens_used = await build_summary_content(
+        stats, week_start, session_factory
+    )
+
+    async with session_factory() as db:
+        summary = await store_weekly_summary(
+            db, week_start, week_end, summary_text, suggested_tasks
+        )
+        await db.commit()
 
     logger.info(
         "Wochen-Zusammenfassung KW %d generiert (%d Tokens)",
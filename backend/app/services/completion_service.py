@@ -0,0 +1,354 @@
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.completion import TaskCompletion
+from app.models.room import Room
+from app.models.task import Task, TaskInstance
+from app.models.user import User
+from app.schemas.task import (
+    BatchCompleteItem,
+    BatchCompleteItemResult,
+    BatchCompleteResponse,
+    BatchUserResult,
+    BonusBreakdown,
+    CompletionResponse,
+    ExtendedCompletionResponse,
+    StreakUpdate,
+    UnlockedAchievement,
+)
+from app.services.achievement_service import (
+    check_and_unlock_achievements,
+    check_and_unlock_achievements_batch,
+)
+from app.services.cache_service import mark_changed
+from app.services.event_bus import emit
+from app.services.points_service import calculate_points
+from app.services.progress_service import increment_room_progress, lock_room_progress
+from app.services.stats_service import record_completion_stats
+from app.services.streak_service import update_user_streak
+
+
+class CompletionError(Exception):
+    """Fachlicher Fehler beim Abschließen (wird im Router zu einer HTTP-Antwort)."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _user_totals(user: User) -> dict:
+    return {
+        "total_points": user.total_points,
+        "weekly_points": user.weekly_points,
+        "current_streak": user.current_streak,
+    }
+
+
+def _completion_event_data(
+    instance: TaskInstance, task: Task, room: Room, user: User, points: int
+) -> dict:
+    return {
+        "instance_id": instance.id,
+        "due_date": instance.due_date.isoformat() if instance.due_date else None,
+        "status": instance.status,
+        "task_id": task.id,
+        "task_title": task.title,
+        "room_id": room.id,
+        "room_name": room.name,
+        "user_id": user.id,
+        "user_name": user.display_name or user.username,
+        "points": points,
+    }
+
+
+def _achievement_event_data(user: User, ach: UnlockedAchievement) -> dict:
+    return {
+        "user_id": user.id,
+        "user_name": user.display_name or user.username,
+        "achievement_id": ach.id,
+        "achievement_name": ach.name,
+        "icon": ach.icon or "mdi:trophy",
+        "points_reward": ach.points_reward,
+    }
+
+
+def _count_completion(
+    room_counts: dict[int, tuple[int, int]], room_id: int, due_today: bool
+) -> bool:
+    """Zählt eine Completion im Tages-Snapshot mit; True wenn der Raum damit komplett ist."""
+    total, completed = room_counts.get(room_id, (0, 0))
+    if due_today:
+        completed += 1
+        room_counts[room_id] = (total, completed)
+    return total > 0 and completed >= total
+
+
+async def load_completion_context(
+    db: AsyncSession, instance_id: int, user_id: int
+) -> tuple[TaskInstance, Task, Room, User]:
+    """Lädt Instanz, Task, Raum und User in einer Abfrage.
+
+    Instanz- und User-Zeile werden gesperrt (SELECT ... FOR UPDATE, auf
+    SQLite ohne Wirkung), damit parallele Completions derselben Instanz
+    bzw. desselben Users nacheinander laufen und keine Punkte verloren gehen.
+    """
+    result = await db.execute(
+        select(TaskInstance, Task, Room, User)
+        .join(Task, TaskInstance.task_id == Task.id)
+        .join(Room, Task.room_id == Room.id)
+        .join(User, User.id == user_id)
+        .where(TaskInstance.id == instance_id)
+        .with_for_update(of=[TaskInstance, User])
+        .execution_options(populate_existing=True)
+    )
+    row = result.first()
+    if row is None:
+        # Nur im Fehlerfall: herausfinden, was fehlt
+        if await db.get(TaskInstance, instance_id) is None:
+            raise CompletionError(404, "Task-Instanz nicht gefunden")
+        raise CompletionError(404, "Benutzer nicht gefunden")
+
+    instance, task, room, user = row
+    if instance.status != "pending":
+        raise CompletionError(400, "Task ist nicht mehr offen")
+    return instance, task, room, user
+
+
+async def complete_task_instance(
+    db: AsyncSession,
+    instance_id: int,
+    user_id: int,
+    notes: str | None = None,
+) -> ExtendedCompletionResponse:
+    """Schließt eine Instanz ab: Streak, Punkte, Achievements, Events.
+
+    Kommt unabhängig von Historie und Zahl der Achievements mit zehn Statements
+    aus — ein Lade-Join, der Raum-Tageszähler, die Schreibzugriffe und die
+    gebündelte Achievement-Prüfung. Fest dazu kommen: ein Upsert, wenn der
+    Tageszähler fehlt (+1); INSERT und Belohnungs-UPDATE bei Freischaltungen (+2);
+    die Abfrage des Wochen-Führenden, solange ein weekly_winner-Achievement
+    offen ist (+1).
+    """
+    instance, task, room, user = await load_completion_context(db, instance_id, user_id)
+
+    # Ohne Autoflush: die Änderungen am User gehen gesammelt mit dem Flush unten
+    # raus, statt vor dem Raum-Aggregat ein eigenes UPDATE auszulösen
+    with db.no_autoflush:
+        # Streak aktualisieren (vor Punkteberechnung, damit Streak-Bonus stimmt)
+        streak_update = await update_user_streak(db, user)
+
+        # Punkte berechnen mit allen Boni; Raum-Bonus aus dem Tageszähler,
+        # in dem die aktuelle Instanz schon als erledigt zählt
+        now = datetime.utcnow()
+        today = now.date()
+        room_counts = await lock_room_progress(db, [room.id], today)
+        room_complete = _count_completion(room_counts, room.id, instance.due_date == today)
+        bonus_breakdown = await calculate_points(
+            db, task, room, user, now, room_complete=room_complete
+        )
+
+    # Instanz als erledigt markieren
+    instance.status = "completed"
+    mark_changed(db)
+
+    completion = TaskCompletion(
+        task_instance_id=instance.id,
+        user_id=user.id,
+        completed_at=now,
+        points_earned=bonus_breakdown.total_points,
+        bonus_points=bonus_breakdown.bonus_points,
+        notes=notes,
+    )
+    db.add(completion)
+
+    # Punkte dem User gutschreiben
+    user.total_points += bonus_breakdown.total_points
+    user.weekly_points += bonus_breakdown.total_points
+
+    await increment_room_progress(db, room.id, instance.due_date, completed=1)
+    await record_completion_stats(db, [{
+        "user_id": user.id,
+        "day": today,
+        "room_id": room.id,
+        "completions": 1,
+        "points": bonus_breakdown.total_points,
+        "bonus_points": bonus_breakdown.bonus_points,
+    }])
+    await db.flush()
+
+    # Achievements prüfen (nach Punkteupdate)
+    unlocked = await check_and_unlock_achievements(db, user)
+
+    # Events (SSE + HA-Webhook) nach dem Commit; enthalten absolute Punktestände,
+    # damit Konsumenten ihren Zustand ohne Neuladen patchen können
+    user_totals = _user_totals(user)
+    emit(db, "task_completed", {
+        **_completion_event_data(instance, task, room, user, bonus_breakdown.total_points),
+        **user_totals,
+    })
+    for ach in unlocked:
+        emit(db, "achievement_unlocked", {
+            **_achievement_event_data(user, ach),
+            **user_totals,
+        })
+
+    return ExtendedCompletionResponse(
+        completion=CompletionResponse.model_validate(completion),
+        bonus_breakdown=bonus_breakdown,
+        streak=streak_update,
+        unlocked_achievements=unlocked,
+    )
+
+
+async def complete_task_instances_batch(
+    db: AsyncSession, items: list[BatchCompleteItem]
+) -> BatchCompleteResponse:
+    """Schließt mehrere Instanzen in einer Transaktion ab.
+
+    Fehlerhafte Einträge (unbekannt, nicht mehr offen) landen als Fehler im
+    Ergebnis, ohne die übrigen abzubrechen. Streak und Achievements werden
+    einmal pro User ausgewertet; der Raum-Bonus folgt der Reihenfolge der
+    Einträge (der letzte offene Task eines Raums bekommt ihn). Statt eines
+    Events pro Completion wird ein gebündeltes "tasks_completed" emittiert.
+    """
+    now = datetime.utcnow()
+    today = now.date()
+
+    # Instanzen (nach ID sortiert gesperrt) und User in je einer Abfrage
+    result = await db.execute(
+        select(TaskInstance, Task, Room)
+        .join(Task, TaskInstance.task_id == Task.id)
+        .join(Room, Task.room_id == Room.id)
+        .where(TaskInstance.id.in_({item.instance_id for item in items}))
+        .order_by(TaskInstance.id)
+        .with_for_update(of=TaskInstance)
+        .execution_options(populate_existing=True)
+    )
+    contexts = {row[0].id: row for row in result.all()}
+    result = await db.execute(
+        select(User)
+        .where(User.id.in_({item.user_id for item in items}))
+        .order_by(User.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    users = {u.id: u for u in result.scalars().all()}
+
+    room_counts = await lock_room_progress(
+        db, {room.id for _, _, room in contexts.values()}, today
+    )
+    progress_increments: Counter[tuple[int, date | None]] = Counter()
+    stats_rows: dict[tuple[int, int], dict] = {}
+
+    streaks: dict[int, StreakUpdate] = {}
+    outcomes: list[tuple[BatchCompleteItem, str | None, TaskCompletion | None, BonusBreakdown | None]] = []
+    event_completions: list[dict] = []
+
+    with db.no_autoflush:
+        for item in items:
+            context = contexts.get(item.instance_id)
+            user = users.get(item.user_id)
+            if context is None:
+                outcomes.append((item, "Task-Instanz nicht gefunden", None, None))
+                continue
+            if user is None:
+                outcomes.append((item, "Benutzer nicht gefunden", None, None))
+                continue
+            instance, task, room = context
+            if instance.status != "pending":
+                outcomes.append((item, "Task ist nicht mehr offen", None, None))
+                continue
+
+            # Streak einmal pro User (weitere Completions am selben Tag ändern ihn nicht)
+            if user.id not in streaks:
+                streaks[user.id] = await update_user_streak(db, user)
+
+            room_complete = _count_completion(room_counts, room.id, instance.due_date == today)
+            bonus_breakdown = await calculate_points(
+                db, task, room, user, now, room_complete=room_complete
+            )
+            progress_increments[(room.id, instance.due_date)] += 1
+            stats = stats_rows.setdefault((user.id, room.id), {
+                "user_id": user.id,
+                "day": today,
+                "room_id": room.id,
+                "completions": 0,
+                "points": 0,
+                "bonus_points": 0,
+            })
+            stats["completions"] += 1
+            stats["points"] += bonus_breakdown.total_points
+            stats["bonus_points"] += bonus_breakdown.bonus_points
+
+            instance.status = "completed"
+            completion = TaskCompletion(
+                task_instance_id=instance.id,
+                user_id=user.id,
+                completed_at=now,
+                points_earned=bonus_breakdown.total_points,
+                bonus_points=bonus_breakdown.bonus_points,
+                notes=item.notes,
+            )
+            db.add(completion)
+            user.total_points += bonus_breakdown.total_points
+            user.weekly_points += bonus_breakdown.total_points
+
+            outcomes.append((item, None, completion, bonus_breakdown))
+            event_completions.append(
+                _completion_event_data(instance, task, room, user, bonus_breakdown.total_points)
+            )
+
+    batch_users = [users[user_id] for user_id in streaks]
+    unlocked_by_user: dict[int, list[UnlockedAchievement]] = {}
+    if batch_users:
+        mark_changed(db)
+        for (room_id, due_date), count in progress_increments.items():
+            await increment_room_progress(db, room_id, due_date, completed=count)
+        await record_completion_stats(db, list(stats_rows.values()))
+        await db.flush()
+        unlocked_by_user = await check_and_unlock_achievements_batch(db, batch_users)
+
+        emit(db, "tasks_completed", {
+            "completions": event_completions,
+            "users": [
+                {
+                    "user_id": user.id,
+                    "user_name": user.display_name or user.username,
+                    **_user_totals(user),
+                }
+                for user in batch_users
+            ],
+            "achievements": [
+                _achievement_event_data(user, ach)
+                for user in batch_users
+                for ach in unlocked_by_user[user.id]
+            ],
+        })
+
+    return BatchCompleteResponse(
+        results=[
+            BatchCompleteItemResult(
+                instance_id=item.instance_id,
+                user_id=item.user_id,
+                success=error is None,
+                error=error,
+                completion=CompletionResponse.model_validate(completion) if completion else None,
+                bonus_breakdown=bonus_breakdown,
+            )
+            for item, error, completion, bonus_breakdown in outcomes
+        ],
+        users=[
+            BatchUserResult(
+                user_id=user.id,
+                total_points=user.total_points,
+                weekly_points=user.weekly_points,
+                streak=streaks[user.id],
+                unlocked_achievements=unlocked_by_user[user.id],
+            )
+            for user in batch_users
+        ],
+    )
@@ -0,0 +1,162 @@
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.room import Room, RoomDayProgress
+from app.models.task import Task, TaskInstance
+from app.models.user import User
+from app.services.cache_service import dashboard_cache, data_version, encode_json
+from app.services.event_bus import event_bus
+from app.services.progress_service import progress_dict
+
+
+async def build_dashboard(db: AsyncSession, today: date | None = None) -> dict:
+    """Baut die kompakten Dashboard-Daten für den HA-Coordinator.
+
+    Kommt mit zwei Statements aus, unabhängig von der Anzahl der Räume:
+    eins für die User, eins für Räume LEFT JOIN Tageszähler LEFT JOIN heutige
+    offene Instanzen (inkl. der globalen Zähler als Skalar-Subqueries).
+    """
+    if today is None:
+        today = date.today()
+    # Event-Stand vor dem Lesen: Deltas danach sind im Payload ggf. schon enthalten
+    event_seq = event_bus.last_id
+
+    # User-Punkte
+    users_result = await db.execute(select(User).order_by(User.total_points.desc()))
+    user_list = users_result.scalars().all()
+
+    # Heutige offene Tasks
+    tasks_today_sq = (
+        select(func.count(TaskInstance.id))
+        .where(TaskInstance.due_date == today)
+        .where(TaskInstance.status == "pending")
+        .scalar_subquery()
+    )
+
+    # Überfällige Tasks
+    overdue_sq = (
+        select(func.count(TaskInstance.id))
+        .where(TaskInstance.due_date < today)
+        .where(TaskInstance.status == "pending")
+        .scalar_subquery()
+    )
+
+    # Heutige pending Tasks mit Raum-Zuordnung
+    pending_today = (
+        select(
+            TaskInstance.id.label("instance_id"),
+            Task.room_id,
+            Task.title,
+            Task.base_points,
+            TaskInstance.status,
+            TaskInstance.assigned_user_id,
+        )
+        .join(Task, TaskInstance.task_id == Task.id)
+        .where(TaskInstance.due_date == today)
+        .where(TaskInstance.status == "pending")
+        .subquery()
+    )
+
+    # Per-Room-Task-Aufschlüsselung in einem Durchgang
+    rows_result = await db.execute(
+        select(
+            Room.id.label("room_id"),
+            Room.name.label("room_name"),
+            Room.ha_area_id,
+            Room.icon,
+            RoomDayProgress.total_count,
+            RoomDayProgress.completed_count,
+            RoomDayProgress.skipped_count,
+            pending_today.c.instance_id,
+            pending_today.c.title,
+            pending_today.c.base_points,
+            pending_today.c.status,
+            pending_today.c.assigned_user_id,
+            tasks_today_sq.label("tasks_today"),
+            overdue_sq.label("tasks_overdue"),
+        )
+        .outerjoin(
+            RoomDayProgress,
+            (RoomDayProgress.room_id == Room.id) & (RoomDayProgress.day == today),
+        )
+        .outerjoin(pending_today, pending_today.c.room_id == Room.id)
+        .order_by(Room.sort_order, Room.name, Room.id, pending_today.c.instance_id)
+    )
+    rows = rows_result.all()
+
+    tasks_today = 0
+    overdue = 0
+    rooms_data: list[dict] = []
+    rooms_by_id: dict[int, dict] = {}
+    for row in rows:
+        tasks_today = row.tasks_today or 0
+        overdue = row.tasks_overdue or 0
+
+        room = rooms_by_id.get(row.room_id)
+        if room is None:
+            room = {
+                "room_id": row.room_id,
+                "room_name": row.room_name,
+                "ha_area_id": row.ha_area_id,
+                "icon": row.icon,
+                "progress": {
+                    key: value
+                    for key, value in progress_dict(
+                        row.room_id, row.total_count, row.completed_count, row.skipped_count
+                    ).items()
+                    if key != "room_id"
+                },
+                "tasks": [],
+            }
+            rooms_by_id[row.room_id] = room
+            rooms_data.append(room)
+
+        if row.instance_id is not None:
+            room["tasks"].append({
+                "instance_id": row.instance_id,
+                "title": row.title,
+                "base_points": row.base_points,
+                "status": row.status,
+                "assigned_user_id": row.assigned_user_id,
+            })
+
+    if not rows:
+        # Ohne Räume liefert der Join keine Zeile — Zähler separat holen
+        counts = await db.execute(select(tasks_today_sq, overdue_sq))
+        tasks_today, overdue = counts.one()
+
+    return {
+        "tasks_today": tasks_today,
+        "tasks_overdue": overdue,
+        "users": [
+            {
+                "id": u.id,
+                "username": u.username,
+                "display_name": u.display_name,
+                "ha_user_id": u.ha_user_id,
+                "total_points": u.total_points,
+                "weekly_points": u.weekly_points,
+                "current_streak": u.current_streak,
+            }
+            for u in user_list
+        ],
+        "rooms": rooms_data,
+        "event_epoch": event_bus.epoch,
+        "event_seq": event_seq,
+    }
+
+
+async def get_dashboard_json(db: AsyncSession) -> tuple[bytes, str]:
+    """Liefert (JSON-Bytes, ETag) des Dashboards, bevorzugt aus dem Snapshot-Cache."""
+    today = date.today()
+    # Version vor dem Lesen merken: ändert sich während des Baus etwas,
+    # passt der Snapshot beim nächsten Poll nicht mehr und wird neu gebaut.
+    version = data_version.value
+    cached = dashboard_cache.get(version, today)
+    if cached is not None:
+        return cached
+    body = encode_json(await build_dashboard(db, today))
+    etag = dashboard_cache.put(version, today, body)
+    return body, etag
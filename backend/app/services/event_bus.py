@@ -0,0 +1,144 @@
+"""In-Process Pub/Sub für ChoreQuest-Domain-Events (Quelle für den SSE-Stream)."""
+
+import asyncio
+import logging
+import secrets
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.completion import WebhookOutbox
+
+logger = logging.getLogger("chorequest.events")
+
+_PENDING_KEY = "chorequest_pending_events"
+
+
+@dataclass
+class DomainEvent:
+    id: int
+    event_type: str
+    data: dict
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    outbox_id: int | None = None  # Zeile in webhook_outbox, falls Webhooks aktiv
+
+
+class Subscription:
+    """Eine Abo-Queue; läuft sie voll, wird das Abo geschlossen statt zu blockieren."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.queue: asyncio.Queue[DomainEvent] = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class EventBus:
+    """Verteilt Events an alle Abonnenten und hält die letzten N im Ringpuffer."""
+
+    def __init__(self, buffer_size: int, queue_size: int = 1000) -> None:
+        self._buffer: deque[DomainEvent] = deque(maxlen=buffer_size)
+        self._subscribers: set[Subscription] = set()
+        self._queue_size = queue_size
+        self._listeners: list[Callable[[DomainEvent], None]] = []
+        self._last_id = 0
+        # Unterscheidet Prozess-Neustarts in der Event-ID (Format "<epoch>-<n>")
+        self.epoch = secrets.token_hex(4)
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: dict, outbox_id: int | None = None) -> DomainEvent:
+        self._last_id += 1
+        evt = DomainEvent(id=self._last_id, event_type=event_type, data=data, outbox_id=outbox_id)
+        self._buffer.append(evt)
+        for listener in self._listeners:
+            try:
+                listener(evt)
+            except Exception:
+                logger.exception("Event-Listener fehlgeschlagen (%s)", event_type)
+        for sub in list(self._subscribers):
+            try:
+                sub.queue.put_nowait(evt)
+            except asyncio.QueueFull:
+                # Langsamer Client: abhängen, er holt per Last-Event-ID nach
+                sub.overflowed = True
+                self._subscribers.discard(sub)
+                logger.warning("SSE-Abonnent zu langsam, Verbindung wird geschlossen")
+        return evt
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self._queue_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def add_listener(self, listener: Callable[[DomainEvent], None]) -> None:
+        """Registriert einen synchronen Callback, der jedes Event erhält."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[DomainEvent], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def event_id(self, evt: DomainEvent) -> str:
+        return f"{self.epoch}-{evt.id}"
+
+    def replay(self, last_event_id: str) -> list[DomainEvent] | None:
+        """Events nach last_event_id aus dem Puffer; None wenn Events verloren gingen."""
+        epoch, _, raw_id = last_event_id.partition("-")
+        if epoch != self.epoch or not raw_id.isdigit():
+            return None
+        after_id = int(raw_id)
+        if after_id >= self._last_id:
+            return []
+        if not self._buffer or self._buffer[0].id > after_id + 1:
+            return None
+        return [evt for evt in self._buffer if evt.id > after_id]
+
+    def clear(self) -> None:
+        self._buffer.clear()
+        self._subscribers.clear()
+        self._last_id = 0
+
+
+event_bus = EventBus(settings.event_buffer_size)
+
+
+def emit(db: AsyncSession, event_type: str, data: dict) -> None:
+    """Merkt ein Event vor; veröffentlicht wird erst nach erfolgreichem Commit.
+
+    Sind HA-Webhooks konfiguriert, geht das Event zusätzlich in die Outbox —
+    in derselben Transaktion, damit es einen Absturz oder ein nicht
+    erreichbares HA übersteht.
+    """
+    outbox = None
+    if settings.ha_url and settings.ha_webhook_id:
+        outbox = WebhookOutbox(event_type=event_type, payload=data)
+        db.add(outbox)
+    db.sync_session.info.setdefault(_PENDING_KEY, []).append((event_type, data, outbox))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    for event_type, data, outbox in session.info.pop(_PENDING_KEY, []):
+        # Identity statt outbox.id: lädt auch bei expire_on_commit nicht nach
+        outbox_id = inspect(outbox).identity[0] if outbox is not None else None
+        event_bus.publish(event_type, data, outbox_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,199 @@
+"""Zeitfenster-Leaderboards aus einem In-Memory-Index.
+
+Der Index hält die Completion-Punkte je (Tag, User) aus dem Statistik-Rollup
+und pro angefragtem Zeitfenster eine sortierte Rangliste. Completions werden
+über den Event-Bus inkrementell eingerechnet; beim Start (bzw. beim ersten
+Zugriff) wird er aus user_daily_stats aufgebaut.
+
+Alle Tage laufen im Takt des Rollups (UTC, stats_service.rollup_today) —
+Index, Events und Fenstergrenzen dürfen nicht gegen die lokale Uhr versetzt sein.
+"""
+
+import logging
+from bisect import bisect_left, insort
+from calendar import monthrange
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.completion import UserDailyStats
+from app.services.event_bus import DomainEvent
+
+logger = logging.getLogger("chorequest.leaderboard")
+
+WINDOWS = ("today", "week", "month", "rolling_30d", "range")
+
+
+class LeaderboardWindowError(ValueError):
+    """Ungültiges Zeitfenster (wird im Router zu 422)."""
+
+
+def window_bounds(
+    window: str, today: date, start: date | None = None, end: date | None = None
+) -> tuple[date, date]:
+    """Erster und letzter Tag (inklusive) eines benannten Zeitfensters."""
+    if window == "today":
+        return today, today
+    if window == "week":
+        monday = today - timedelta(days=today.weekday())
+        return monday, monday + timedelta(days=6)
+    if window == "month":
+        return today.replace(day=1), today.replace(day=monthrange(today.year, today.month)[1])
+    if window == "rolling_30d":
+        return today - timedelta(days=29), today
+    if window == "range":
+        if start is None or end is None:
+            raise LeaderboardWindowError("Zeitraum braucht start und end")
+        if start > end:
+            raise LeaderboardWindowError("start liegt nach end")
+        return start, end
+    raise LeaderboardWindowError(f"Unbekanntes Zeitfenster: {window}")
+
+
+class RankedScores:
+    """Punkte je User plus nach (Punkte absteigend, User-ID) sortierte Liste.
+
+    Rang-Abfrage per Binärsuche in O(log n); ein Update verschiebt einen
+    Eintrag (Suche O(log n), Einfügen in die Liste O(n) — bei Haushaltsgrößen
+    vernachlässigbar).
+    """
+
+    def __init__(self, scores: dict[int, int] | None = None) -> None:
+        self._scores: dict[int, int] = dict(scores or {})
+        self._order: list[tuple[int, int]] = sorted(
+            (-points, user_id) for user_id, points in self._scores.items()
+        )
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, user_id: int, points: int) -> None:
+        old = self._scores.get(user_id)
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, user_id))]
+        new = (old or 0) + points
+        self._scores[user_id] = new
+        insort(self._order, (-new, user_id))
+
+    def discard(self, user_id: int) -> None:
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, user_id))]
+
+    def points(self, user_id: int) -> int | None:
+        return self._scores.get(user_id)
+
+    def rank(self, user_id: int) -> int | None:
+        """Platz des Users (1-basiert, gleiche Punkte = gleicher Platz)."""
+        points = self._scores.get(user_id)
+        if points is None:
+            return None
+        return bisect_left(self._order, (-points,)) + 1
+
+    def top(self, offset: int = 0, limit: int = 10) -> list[tuple[int, int, int]]:
+        """(Platz, User-ID, Punkte) für einen Ausschnitt der Rangliste."""
+        page = self._order[offset:offset + limit]
+        return [(self.rank(user_id), user_id, -neg_points) for neg_points, user_id in page]
+
+
+class LeaderboardIndex:
+    """Tagespunkte je User und gecachte Ranglisten je Zeitfenster."""
+
+    def __init__(self, max_windows: int = 16) -> None:
+        self._daily: dict[date, dict[int, int]] = {}
+        self._windows: OrderedDict[tuple[date, date], RankedScores] = OrderedDict()
+        self._max_windows = max_windows
+        self._loaded = False
+        self._dirty = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Lädt die Tagespunkte aus dem Rollup (eine gruppierte Abfrage).
+
+        Kommen währenddessen Completions herein, ist unklar, ob die Abfrage sie
+        schon enthält — dann wird erneut geladen.
+        """
+        for _ in range(3):
+            self._dirty = False
+            result = await db.execute(
+                select(UserDailyStats.day, UserDailyStats.user_id, func.sum(UserDailyStats.points))
+                .group_by(UserDailyStats.day, UserDailyStats.user_id)
+            )
+            daily: dict[date, dict[int, int]] = {}
+            for day, user_id, points in result.all():
+                daily.setdefault(day, {})[user_id] = int(points)
+            if not self._dirty:
+                break
+        self._daily = daily
+        self._windows.clear()
+        self._loaded = True
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if not self._loaded:
+            await self.rebuild(db)
+
+    def record(self, user_id: int, day: date, points: int) -> None:
+        """Rechnet eine Completion in Tagespunkte und betroffene Ranglisten ein."""
+        if not self._loaded:
+            self._dirty = True
+            return
+        day_scores = self._daily.setdefault(day, {})
+        day_scores[user_id] = day_scores.get(user_id, 0) + points
+        for (start, end), ranked in self._windows.items():
+            if start <= day <= end:
+                ranked.add(user_id, points)
+
+    def discard_user(self, user_id: int) -> None:
+        for day_scores in self._daily.values():
+            day_scores.pop(user_id, None)
+        for ranked in self._windows.values():
+            ranked.discard(user_id)
+
+    def window(self, start: date, end: date) -> RankedScores:
+        """Rangliste für [start, end]; wird beim ersten Zugriff aus den Tagespunkten gebaut."""
+        key = (start, end)
+        ranked = self._windows.get(key)
+        if ranked is None:
+            scores: dict[int, int] = {}
+            for day, day_scores in self._daily.items():
+                if start <= day <= end:
+                    for user_id, points in day_scores.items():
+                        scores[user_id] = scores.get(user_id, 0) + points
+            ranked = RankedScores(scores)
+            self._windows[key] = ranked
+            if len(self._windows) > self._max_windows:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+        return ranked
+
+    def clear(self) -> None:
+        self._daily.clear()
+        self._windows.clear()
+        self._loaded = False
+        self._dirty = False
+
+
+leaderboard_index = LeaderboardIndex()
+
+
+def apply_event(evt: DomainEvent) -> None:
+    """Event-Bus-Listener: Completions in den Index einrechnen.
+
+    Der Tag ist der (UTC-)Tag des Events — es wird direkt nach dem Commit der
+    Completion veröffentlicht und stimmt damit mit dem Rollup-Tag überein.
+    """
+    if evt.event_type == "task_completed":
+        completions = [evt.data]
+    elif evt.event_type == "tasks_completed":
+        completions = evt.data["completions"]
+    else:
+        return
+    day = evt.created_at.date()
+    for completion in completions:
+        leaderboard_index.record(completion["user_id"], day, completion["points"])
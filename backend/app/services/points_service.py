@@ -1,40 +1,22 @@
 from datetime import date, datetime
 
-from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.completion import TaskCompletion
 from app.models.room import Room
-from app.models.task import Task, TaskInstance
+from app.models.task import Task
 from app.models.user import User
 from app.schemas.task import BonusBreakdown
+from app.services.progress_service import lock_room_progress
 
 
 async def check_room_completion(db: AsyncSession, room_id: int, target_date: date) -> bool:
-    """Prüft ob alle Tasks eines Raums am gegebenen Tag erledigt sind."""
-    # Alle Instanzen des Raums für den Tag
-    total_result = await db.execute(
-        select(func.count(TaskInstance.id))
-        .join(Task)
-        .where(Task.room_id == room_id)
-        .where(TaskInstance.due_date == target_date)
-    )
-    total = total_result.scalar() or 0
-
-    if total == 0:
-        return False
+    """Prüft ob alle Tasks eines Raums am gegebenen Tag erledigt sind.
 
-    # Erledigte Instanzen (inkl. der aktuellen, die gerade completed wird)
-    completed_result = await db.execute(
-        select(func.count(TaskInstance.id))
-        .join(Task)
-        .where(Task.room_id == room_id)
-        .where(TaskInstance.due_date == target_date)
-        .where(TaskInstance.status == "completed")
-    )
-    completed = completed_result.scalar() or 0
-
-    return completed >= total
+    Liest den gepflegten Tageszähler (room_day_progress) statt zu aggregieren.
+    """
+    counts = await lock_room_progress(db, [room_id], target_date)
+    total, completed = counts.get(room_id, (0, 0))
+    return total > 0 and completed >= total
 
 
 async def calculate_points(
@@ -43,8 +25,13 @@ async def calculate_points(
     room: Room,
     user: User,
     completion_time: datetime,
+    room_complete: bool | None = None,
 ) -> BonusBreakdown:
-    """Berechnet Punkte mit allen Boni."""
+    """Berechnet Punkte mit allen Boni.
+
+    room_complete: ob der Raum mit dieser Completion heute komplett ist; ohne
+    Angabe wird der aktuelle Tageszähler gelesen.
+    """
     base_points = task.base_points
     room_multiplier = float(room.point_multiplier)
 
@@ -57,8 +44,9 @@ async def calculate_points(
     streak_bonus = streak_multiplier - 1.0  # z.B. 1.1 -> 0.1
 
     # Raum-Completion-Bonus: +50% wenn alle Tasks des Raums erledigt
-    today = completion_time.date()
-    room_complete = await check_room_completion(db, room.id, today)
+    if room_complete is None:
+        today = completion_time.date()
+        room_complete = await check_room_completion(db, room.id, today)
     room_completion_bonus = 0.5 if room_complete else 0.0
 
     # Gesamtberechnung
@@ -0,0 +1,176 @@
+"""Raum-Fortschritt pro Tag: gepflegte Zähler statt Aggregation pro Request."""
+
+from collections.abc import Iterable
+from datetime import date
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.room import Room, RoomDayProgress
+from app.models.task import Task, TaskInstance
+from app.utils.sql import dialect_insert
+
+_PROGRESS_COLUMNS = ["room_id", "day", "total_count", "completed_count", "skipped_count"]
+
+
+def _progress_source():
+    """Aggregat der Instanzen je Raum und Tag in der Spaltenfolge von _PROGRESS_COLUMNS."""
+    return (
+        select(
+            Task.room_id,
+            TaskInstance.due_date,
+            func.count(TaskInstance.id),
+            func.coalesce(func.sum(case((TaskInstance.status == "completed", 1), else_=0)), 0),
+            func.coalesce(func.sum(case((TaskInstance.status == "skipped", 1), else_=0)), 0),
+        )
+        .join(Task, TaskInstance.task_id == Task.id)
+        .where(TaskInstance.due_date.is_not(None))
+        .group_by(Task.room_id, TaskInstance.due_date)
+    )
+
+
+def _upsert_from_instances(db: AsyncSession, room_ids: Iterable[int], day: date):
+    """INSERT ... SELECT der Zähler eines Tages aus task_instances mit ON CONFLICT-Ziel.
+
+    Der Aufrufer ergänzt das DO UPDATE für den Fall, dass die Zeile inzwischen existiert.
+    """
+    source = (
+        _progress_source()
+        .where(Task.room_id.in_(set(room_ids)))
+        .where(TaskInstance.due_date == day)
+    )
+    return dialect_insert(db, RoomDayProgress).from_select(_PROGRESS_COLUMNS, source)
+
+
+async def rebuild_room_progress(
+    db: AsyncSession,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    room_ids: Iterable[int] | None = None,
+) -> None:
+    """Baut die Zähler im Bereich aus task_instances neu auf (DELETE + INSERT ... SELECT).
+
+    Ohne Grenzen wird alles neu aufgebaut. Für seltene Pfade (Task gelöscht
+    oder verschoben, Generierung) und als Reparatur gedacht.
+    """
+    await db.flush()
+
+    delete_stmt = delete(RoomDayProgress)
+    source = _progress_source()
+    if start_date is not None:
+        delete_stmt = delete_stmt.where(RoomDayProgress.day >= start_date)
+        source = source.where(TaskInstance.due_date >= start_date)
+    if end_date is not None:
+        delete_stmt = delete_stmt.where(RoomDayProgress.day <= end_date)
+        source = source.where(TaskInstance.due_date <= end_date)
+    if room_ids is not None:
+        room_ids = set(room_ids)
+        delete_stmt = delete_stmt.where(RoomDayProgress.room_id.in_(room_ids))
+        source = source.where(Task.room_id.in_(room_ids))
+
+    await db.execute(delete_stmt)
+    await db.execute(insert(RoomDayProgress).from_select(_PROGRESS_COLUMNS, source))
+
+
+async def lock_room_progress(
+    db: AsyncSession, room_ids: Iterable[int], day: date
+) -> dict[int, tuple[int, int]]:
+    """(Gesamt, erledigt) je Raum am Tag, Zeilen gesperrt bis zum Commit.
+
+    Fehlen Zeilen (z.B. Instanzen außerhalb der Generierung angelegt), legt ein
+    einzelner Upsert sie aus task_instances an und liefert sie zurück — ein
+    Statement bei vorhandenen Zählern, zwei bei kalten.
+    """
+    room_ids = set(room_ids)
+    if not room_ids:
+        return {}
+
+    stmt = (
+        select(RoomDayProgress.room_id, RoomDayProgress.total_count, RoomDayProgress.completed_count)
+        .where(RoomDayProgress.room_id.in_(room_ids))
+        .where(RoomDayProgress.day == day)
+        .order_by(RoomDayProgress.room_id)
+        .with_for_update()
+    )
+    counts = {room_id: (total, done) for room_id, total, done in (await db.execute(stmt)).all()}
+
+    missing = room_ids - counts.keys()
+    if missing:
+        # Hat ein paralleler Request die Zeile inzwischen angelegt, bleiben seine
+        # Zähler stehen; das leere DO UPDATE sperrt sie und liefert sie zurück
+        upsert = _upsert_from_instances(db, missing, day)
+        result = await db.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[RoomDayProgress.room_id, RoomDayProgress.day],
+                set_={"total_count": RoomDayProgress.total_count},
+            ).returning(
+                RoomDayProgress.room_id, RoomDayProgress.total_count, RoomDayProgress.completed_count
+            )
+        )
+        counts.update({room_id: (total, done) for room_id, total, done in result.all()})
+    return counts
+
+
+async def increment_room_progress(
+    db: AsyncSession,
+    room_id: int,
+    day: date | None,
+    completed: int = 0,
+    skipped: int = 0,
+) -> None:
+    """Zählt erledigte/übersprungene Instanzen eines Raum-Tags hoch — immer ein Statement.
+
+    Gibt es die Zeile noch nicht, legt der Upsert sie aus task_instances an —
+    der Statuswechsel muss dafür schon in der Session stehen.
+    """
+    if day is None:
+        return
+    upsert = _upsert_from_instances(db, [room_id], day)
+    await db.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[RoomDayProgress.room_id, RoomDayProgress.day],
+            set_={
+                "completed_count": RoomDayProgress.completed_count + completed,
+                "skipped_count": RoomDayProgress.skipped_count + skipped,
+            },
+        ).execution_options(synchronize_session=False)
+    )
+
+
+async def get_rooms_progress(db: AsyncSession, day: date) -> list[dict]:
+    """Fortschritt aller Räume an einem Tag — ein Lesezugriff auf die Zähler."""
+    result = await db.execute(
+        select(
+            Room.id,
+            Room.name,
+            Room.icon,
+            RoomDayProgress.total_count,
+            RoomDayProgress.completed_count,
+            RoomDayProgress.skipped_count,
+        )
+        .outerjoin(
+            RoomDayProgress,
+            (RoomDayProgress.room_id == Room.id) & (RoomDayProgress.day == day),
+        )
+        .order_by(Room.sort_order, Room.name, Room.id)
+    )
+    return [
+        progress_dict(room_id, total, completed, skipped) | {
+            "room_name": name,
+            "icon": icon,
+            "day": day,
+        }
+        for room_id, name, icon, total, completed, skipped in result.all()
+    ]
+
+
+def progress_dict(room_id: int, total: int | None, completed: int | None, skipped: int | None) -> dict:
+    total, completed, skipped = total or 0, completed or 0, skipped or 0
+    return {
+        "room_id": room_id,
+        "total": total,
+        "completed": completed,
+        "skipped": skipped,
+        "pending": max(0, total - completed - skipped),
+        "is_complete": total > 0 and completed >= total,
+    }
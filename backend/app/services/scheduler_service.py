@@ -1,11 +1,13 @@
 import logging
-from datetime import date
+from datetime import date, timedelta
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from app.config import settings
 from app.database import async_session
+from app.services.cache_service import mark_changed
+from app.services.event_bus import emit
 
 logger = logging.getLogger("chorequest.scheduler")
 
@@ -13,32 +15,67 @@ scheduler = AsyncIOScheduler(timezone=settings.timezone)
 
 
 async def _generate_daily_tasks():
-    """Erstellt Task-Instanzen für den heutigen Tag."""
-    from app.services.task_service import generate_task_instances_for_date
+    """Erstellt Task-Instanzen für heute und den konfigurierten Vorausplanungs-Horizont."""
+    from app.services.task_service import generate_task_instances_for_range
 
     today = date.today()
+    end = today + timedelta(days=max(settings.instance_horizon_days, 0))
     async with async_session() as db:
-        count = await generate_task_instances_for_date(db, today)
+        count = await generate_task_instances_for_range(db, today, end)
+        if count > 0:
+            mark_changed(db)
+            emit(db, "instances_created", {
+                "start_date": today.isoformat(),
+                "end_date": end.isoformat(),
+                "count": count,
+            })
         await db.commit()
-    logger.info("Tägliche Task-Generierung: %d Instanzen erstellt für %s", count, today)
+    logger.info("Tägliche Task-Generierung: %d Instanzen erstellt für %s bis %s", count, today, end)
+
+
+async def _expire_streaks():
+    """Setzt Streaks von Usern ohne Completion seit vorgestern zurück."""
+    from app.services.streak_service import expire_stale_streaks
+
+    async with async_session() as db:
+        count = await expire_stale_streaks(db, date.today())
+        if count > 0:
+            mark_changed(db)
+        await db.commit()
+    if count > 0:
+        logger.info("Streaks zurückgesetzt: %d Benutzer", count)
 
 
 async def _reset_weekly_points():
     """Setzt die wöchentlichen Punkte aller User zurück (Sonntags)."""
     from sqlalchemy import select, update
     from app.models.user import User
-    from app.services.achievement_service import check_and_unlock_achievements
+    from app.services.achievement_service import check_and_unlock_achievements_batch
 
     async with async_session() as db:
-        # Vorher Weekly-Winner-Achievement prüfen
+        # Vorher Weekly-Winner-Achievement prüfen (alle User in einem Durchgang)
         result = await db.execute(select(User).order_by(User.weekly_points.desc()))
         users = result.scalars().all()
+        unlocked_by_user = await check_and_unlock_achievements_batch(db, users)
 
         for user in users:
-            await check_and_unlock_achievements(db, user)
+            for ach in unlocked_by_user[user.id]:
+                emit(db, "achievement_unlocked", {
+                    "user_id": user.id,
+                    "user_name": user.display_name or user.username,
+                    "achievement_id": ach.id,
+                    "achievement_name": ach.name,
+                    "icon": ach.icon or "mdi:trophy",
+                    "points_reward": ach.points_reward,
+                    "total_points": user.total_points,
+                    "weekly_points": user.weekly_points,
+                    "current_streak": user.current_streak,
+                })
 
         # Weekly Points auf 0 setzen
         await db.execute(update(User).values(weekly_points=0))
+        mark_changed(db)
+        emit(db, "points_reset", {"scope": "weekly"})
         await db.commit()
 
     logger.info("Wöchentliche Punkte zurückgesetzt")
@@ -46,14 +83,12 @@ async def _reset_weekly_points():
 
 async def _generate_weekly_summary():
     """Generiert die wöchentliche KI-Zusammenfassung (Sonntags vor dem Reset)."""
-    from app.services.claude_service import generate_weekly_summary
+    from app.services.summary_job_service import summary_jobs
 
-    async with async_session() as db:
-        summary, tokens_used = await generate_weekly_summary(db)
-        await db.commit()
-
-    kw = summary.week_start.isocalendar()[1]
-    logger.info("Wöchentliche KI-Zusammenfassung KW %d generiert (%d Tokens)", kw, tokens_used)
+    # Über die Job-Queue, damit eine parallele manuelle Anfrage nicht doppelt generiert
+    job = await summary_jobs.wait(summary_jobs.submit(async_session))
+    if job.status != "done":
+        logger.error("Wöchentliche KI-Zusammenfassung fehlgeschlagen: %s", job.error)
 
 
 async def _check_overdue_tasks():
@@ -74,6 +109,17 @@ async def _check_overdue_tasks():
         logger.warning("Überfällige Tasks: %d", overdue_count)
 
 
+async def _purge_webhook_outbox():
+    """Räumt zugestellte und zu alte Events aus der Webhook-Outbox."""
+    from app.services.webhook_service import purge_webhook_outbox
+
+    async with async_session() as db:
+        delivered, expired = await purge_webhook_outbox(db)
+        await db.commit()
+    if delivered or expired:
+        logger.info("Webhook-Outbox bereinigt: %d zugestellt, %d verworfen", delivered, expired)
+
+
 def start_scheduler():
     """Startet den APScheduler mit allen geplanten Jobs."""
     # Täglich um 00:05 Task-Instanzen generieren
@@ -84,6 +130,14 @@ def start_scheduler():
         replace_existing=True,
     )
 
+    # Täglich um 00:10 abgelaufene Streaks zurücksetzen
+    scheduler.add_job(
+        _expire_streaks,
+        CronTrigger(hour=0, minute=10, timezone=settings.timezone),
+        id="expire_streaks",
+        replace_existing=True,
+    )
+
     # Sonntag 19:00: Wöchentliche KI-Zusammenfassung generieren
     scheduler.add_job(
         _generate_weekly_summary,
@@ -108,6 +162,14 @@ def start_scheduler():
         replace_existing=True,
     )
 
+    # Stündlich (:30): Webhook-Outbox bereinigen
+    scheduler.add_job(
+        _purge_webhook_outbox,
+        CronTrigger(minute=30, timezone=settings.timezone),
+        id="purge_webhook_outbox",
+        replace_existing=True,
+    )
+
     scheduler.start()
     logger.info("Scheduler gestartet mit %d Jobs", len(scheduler.get_jobs()))
 
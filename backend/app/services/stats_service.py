@@ -0,0 +1,209 @@
+"""Statistik-Rollup je (User, Tag, Raum): gepflegt beim Schreiben, gelesen als Bereichsabfrage."""
+
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.completion import Achievement, TaskCompletion, UserAchievement, UserDailyStats
+from app.models.room import Room, RoomDayProgress
+from app.models.task import Task, TaskInstance
+from app.models.user import User
+from app.utils.sql import dialect_insert
+
+
+def rollup_today() -> date:
+    """Heutiger Tag im Takt des Rollups — Datum von completed_at, also UTC."""
+    return datetime.utcnow().date()
+
+
+async def record_completion_stats(db: AsyncSession, rows: list[dict]) -> None:
+    """Addiert Completions auf das Rollup (ein Upsert, bei mehreren Zeilen executemany).
+
+    rows: {"user_id", "day", "room_id", "completions", "points", "bonus_points"}
+    """
+    if not rows:
+        return
+    stmt = dialect_insert(db, UserDailyStats)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserDailyStats.user_id, UserDailyStats.day, UserDailyStats.room_id],
+        set_={
+            "completions": UserDailyStats.completions + stmt.excluded.completions,
+            "points": UserDailyStats.points + stmt.excluded.points,
+            "bonus_points": UserDailyStats.bonus_points + stmt.excluded.bonus_points,
+        },
+    )
+    await db.execute(stmt, rows)
+
+
+async def rebuild_user_daily_stats(
+    db: AsyncSession,
+    user_ids: Iterable[int] | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> int:
+    """Baut das Rollup aus task_completions neu auf (DELETE + INSERT ... SELECT).
+
+    Gibt die Anzahl geschriebener Rollup-Zeilen zurück.
+    """
+    await db.flush()
+
+    day_col = func.date(TaskCompletion.completed_at)
+    delete_stmt = delete(UserDailyStats)
+    source = (
+        select(
+            TaskCompletion.user_id,
+            day_col,
+            Task.room_id,
+            func.count(TaskCompletion.id),
+            func.coalesce(func.sum(TaskCompletion.points_earned), 0),
+            func.coalesce(func.sum(TaskCompletion.bonus_points), 0),
+        )
+        .join(TaskInstance, TaskCompletion.task_instance_id == TaskInstance.id)
+        .join(Task, TaskInstance.task_id == Task.id)
+        .group_by(TaskCompletion.user_id, day_col, Task.room_id)
+    )
+    if user_ids is not None:
+        user_ids = set(user_ids)
+        delete_stmt = delete_stmt.where(UserDailyStats.user_id.in_(user_ids))
+        source = source.where(TaskCompletion.user_id.in_(user_ids))
+    if start_date is not None:
+        delete_stmt = delete_stmt.where(UserDailyStats.day >= start_date)
+        source = source.where(TaskCompletion.completed_at >= _day_start(start_date))
+    if end_date is not None:
+        delete_stmt = delete_stmt.where(UserDailyStats.day <= end_date)
+        source = source.where(TaskCompletion.completed_at < _day_start(end_date + timedelta(days=1)))
+
+    await db.execute(delete_stmt)
+    result = await db.execute(
+        insert(UserDailyStats).from_select(
+            ["user_id", "day", "room_id", "completions", "points", "bonus_points"], source
+        )
+    )
+    return max(result.rowcount or 0, 0)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+async def get_user_room_totals(
+    db: AsyncSession, user_id: int, since: date
+) -> list[tuple[int, str | None, int, int]]:
+    """(room_id, Raumname, Completions gesamt, Completions seit `since`) je Raum eines Users."""
+    result = await db.execute(
+        select(
+            UserDailyStats.room_id,
+            Room.name,
+            func.sum(UserDailyStats.completions),
+            func.coalesce(
+                func.sum(case((UserDailyStats.day >= since, UserDailyStats.completions), else_=0)), 0
+            ),
+        )
+        .outerjoin(Room, UserDailyStats.room_id == Room.id)
+        .where(UserDailyStats.user_id == user_id)
+        .group_by(UserDailyStats.room_id, Room.name)
+    )
+    return [(room_id, name, int(total), int(recent)) for room_id, name, total, recent in result.all()]
+
+
+async def collect_period_stats(db: AsyncSession, start_date: date, end_date: date) -> dict:
+    """User-, Raum-, Achievement- und Gesamtstatistik für einen Zeitraum (inklusive).
+
+    Drei Abfragen unabhängig von Zeitraum, User- und Raumzahl: User mit dem
+    aggregierten Statistik-Rollup, Räume mit den aggregierten Tageszählern
+    (daraus auch die Gesamtzahlen) und die freigeschalteten Achievements.
+    """
+    user_totals = (
+        select(
+            UserDailyStats.user_id,
+            func.sum(UserDailyStats.completions).label("completions"),
+            func.sum(UserDailyStats.points).label("points"),
+        )
+        .where(UserDailyStats.day >= start_date)
+        .where(UserDailyStats.day <= end_date)
+        .group_by(UserDailyStats.user_id)
+        .cte("user_totals")
+    )
+    result = await db.execute(
+        select(
+            User.display_name,
+            User.username,
+            User.current_streak,
+            User.weekly_points,
+            func.coalesce(user_totals.c.completions, 0),
+            func.coalesce(user_totals.c.points, 0),
+        )
+        .outerjoin(user_totals, user_totals.c.user_id == User.id)
+        .order_by(User.id)
+    )
+    users = [
+        {
+            "name": display_name or username,
+            "completions": int(completions),
+            "points_earned": int(points),
+            "current_streak": current_streak,
+            "weekly_points": weekly_points,
+        }
+        for display_name, username, current_streak, weekly_points, completions, points in result.all()
+    ]
+
+    room_totals = (
+        select(
+            RoomDayProgress.room_id,
+            func.sum(RoomDayProgress.total_count).label("total"),
+            func.sum(RoomDayProgress.completed_count).label("completed"),
+            func.sum(RoomDayProgress.skipped_count).label("skipped"),
+        )
+        .where(RoomDayProgress.day >= start_date)
+        .where(RoomDayProgress.day <= end_date)
+        .group_by(RoomDayProgress.room_id)
+        .cte("room_totals")
+    )
+    result = await db.execute(
+        select(
+            Room.name,
+            func.coalesce(room_totals.c.total, 0),
+            func.coalesce(room_totals.c.completed, 0),
+            func.coalesce(room_totals.c.skipped, 0),
+        )
+        .outerjoin(room_totals, room_totals.c.room_id == Room.id)
+        .order_by(Room.sort_order, Room.name, Room.id)
+    )
+    rooms = []
+    total_tasks = completed_tasks = 0
+    for name, total, completed, skipped in result.all():
+        total, completed, skipped = int(total), int(completed), int(skipped)
+        total_tasks += total
+        completed_tasks += completed
+        rooms.append({
+            "name": name,
+            "completed": completed,
+            "pending": max(0, total - completed - skipped),
+            "skipped": skipped,
+        })
+
+    result = await db.execute(
+        select(Achievement.name, User.display_name, User.username)
+        .join(UserAchievement, UserAchievement.achievement_id == Achievement.id)
+        .join(User, UserAchievement.user_id == User.id)
+        .where(UserAchievement.unlocked_at >= _day_start(start_date))
+        .where(UserAchievement.unlocked_at < _day_start(end_date + timedelta(days=1)))
+        .order_by(UserAchievement.unlocked_at)
+    )
+    achievements = [
+        {"achievement": name, "user": display_name or username}
+        for name, display_name, username in result.all()
+    ]
+
+    return {
+        "users": users,
+        "rooms": rooms,
+        "achievements_unlocked": achievements,
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_tasks,
+        "completion_rate_percent": (
+            round(completed_tasks / total_tasks * 100, 1) if total_tasks > 0 else 0
+        ),
+    }
@@ -1,6 +1,6 @@
 from datetime import date, timedelta
 
-from sqlalchemy import select, func, distinct
+from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.completion import TaskCompletion
@@ -17,45 +17,95 @@ def get_streak_bonus_multiplier(streak_days: int) -> float:
     return 1.0
 
 
-async def update_user_streak(db: AsyncSession, user: User) -> StreakUpdate:
-    """Aktualisiert den Streak eines Benutzers basierend auf aufeinanderfolgenden Tagen."""
-    today = date.today()
+async def update_user_streak(
+    db: AsyncSession, user: User, completion_date: date | None = None
+) -> StreakUpdate:
+    """Aktualisiert den Streak inkrementell für eine Completion am gegebenen Tag.
 
-    # Alle Tage mit Completions für diesen User, absteigend sortiert
-    completion_date_col = func.date(TaskCompletion.completed_at).label("completion_date")
-    result = await db.execute(
-        select(distinct(completion_date_col))
-        .where(TaskCompletion.user_id == user.id)
-        .order_by(completion_date_col.desc())
-    )
-    completion_dates = [row[0] for row in result.all()]
-
-    if not completion_dates:
-        user.current_streak = 0
-        return StreakUpdate(
-            current_streak=0,
-            longest_streak=user.longest_streak,
-            streak_bonus_active=False,
-        )
+    O(1): nutzt nur den gespeicherten Stand (letzter Completion-Tag, aktueller
+    und längster Streak) — unabhängig davon, wie lang die Historie ist.
+    """
+    today = completion_date or date.today()
+    last = user.last_completion_date
 
-    # Streak berechnen: aufeinanderfolgende Tage rückwärts von heute
-    streak = 0
-    expected_date = today
+    if last is None or last < today - timedelta(days=1):
+        # Erste Completion oder Lücke: neuer Streak
+        user.current_streak = 1
+    elif last == today - timedelta(days=1):
+        user.current_streak = (user.current_streak or 0) + 1
+    # last == today (oder Zeitstempel aus der Vergangenheit): Streak bleibt
 
-    for d in completion_dates:
-        if d == expected_date:
-            streak += 1
-            expected_date -= timedelta(days=1)
-        elif d < expected_date:
-            # Lücke gefunden
-            break
-
-    user.current_streak = streak
-    if streak > user.longest_streak:
-        user.longest_streak = streak
+    if last is None or today > last:
+        user.last_completion_date = today
+    if user.current_streak > (user.longest_streak or 0):
+        user.longest_streak = user.current_streak
 
     return StreakUpdate(
         current_streak=user.current_streak,
         longest_streak=user.longest_streak,
-        streak_bonus_active=get_streak_bonus_multiplier(streak) > 1.0,
+        streak_bonus_active=get_streak_bonus_multiplier(user.current_streak) > 1.0,
+    )
+
+
+async def expire_stale_streaks(db: AsyncSession, today: date) -> int:
+    """Setzt Streaks ohne Completion gestern oder heute auf 0 (ein UPDATE)."""
+    result = await db.execute(
+        update(User)
+        .where(User.current_streak > 0)
+        .where(
+            (User.last_completion_date.is_(None))
+            | (User.last_completion_date < today - timedelta(days=1))
+        )
+        .values(current_streak=0)
     )
+    return max(result.rowcount or 0, 0)
+
+
+def _streaks_from_dates(days: list[date], today: date) -> tuple[int, int]:
+    """Berechnet (aktueller, längster) Streak aus aufsteigend sortierten Tagen."""
+    longest = run = 0
+    prev: date | None = None
+    for d in days:
+        run = run + 1 if prev is not None and d == prev + timedelta(days=1) else 1
+        longest = max(longest, run)
+        prev = d
+    current = run if prev is not None and prev >= today - timedelta(days=1) else 0
+    return current, longest
+
+
+async def recompute_user_streaks(
+    db: AsyncSession, today: date | None = None, user_ids: list[int] | None = None
+) -> int:
+    """Baut den Streak-Zustand aus der Completion-Historie neu auf (Reparatur).
+
+    Eine Abfrage über alle (User, Tag)-Paare; gedacht für Migrationen oder
+    nach manuellen Datenkorrekturen, nicht für den Request-Pfad.
+    """
+    if today is None:
+        today = date.today()
+
+    completion_date_col = func.date(TaskCompletion.completed_at)
+    query = (
+        select(TaskCompletion.user_id, completion_date_col)
+        .distinct()
+        .order_by(TaskCompletion.user_id, completion_date_col)
+    )
+    users_query = select(User)
+    if user_ids is not None:
+        query = query.where(TaskCompletion.user_id.in_(user_ids))
+        users_query = users_query.where(User.id.in_(user_ids))
+
+    result = await db.execute(query)
+    days_by_user: dict[int, list[date]] = {}
+    for user_id, day in result.all():
+        if isinstance(day, str):  # SQLite liefert date() als String
+            day = date.fromisoformat(day)
+        days_by_user.setdefault(user_id, []).append(day)
+
+    users = (await db.execute(users_query)).scalars().all()
+    for user in users:
+        days = days_by_user.get(user.id, [])
+        user.current_streak, user.longest_streak = _streaks_from_dates(days, today)
+        user.last_completion_date = days[-1] if days else None
+
+    return len(users)
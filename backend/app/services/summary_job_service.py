@@ -0,0 +1,107 @@
+"""Hintergrund-Jobs für die Generierung von Wochen-Zusammenfassungen."""
+
+import asyncio
+import logging
+import secrets
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.claude_service import generate_weekly_summary, week_bounds
+
+logger = logging.getLogger("chorequest.summaries")
+
+
+@dataclass
+class SummaryJob:
+    id: str
+    week_start: date
+    status: str = "queued"  # queued | running | done | failed
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+    summary_id: int | None = None
+    tokens_used: int = 0
+    error: str | None = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+
+class SummaryJobQueue:
+    """Führt Generierungen nacheinander als asyncio-Tasks aus.
+
+    Eine zweite Anfrage für dieselbe Woche bekommt den laufenden Job zurück,
+    statt Claude ein weiteres Mal aufzurufen. Abgeschlossene Jobs bleiben
+    abrufbar, bis max_jobs überschritten ist.
+    """
+
+    def __init__(self, max_jobs: int = 100, concurrency: int = 1) -> None:
+        self._jobs: OrderedDict[str, SummaryJob] = OrderedDict()
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._max_jobs = max_jobs
+        self._concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def get(self, job_id: str) -> SummaryJob | None:
+        return self._jobs.get(job_id)
+
+    def submit(
+        self, session_factory: async_sessionmaker[AsyncSession], week_start: date | None = None
+    ) -> SummaryJob:
+        """Reiht die Generierung ein (oder gibt den aktiven Job derselben Woche zurück)."""
+        week_start, _ = week_bounds(week_start)
+        for job in self._jobs.values():
+            if job.week_start == week_start and job.active:
+                return job
+
+        job = SummaryJob(id=secrets.token_hex(8), week_start=week_start)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, session_factory))
+        self._prune()
+        return job
+
+    async def _run(self, job: SummaryJob, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                summary, tokens_used = await generate_weekly_summary(session_factory, job.week_start)
+            job.summary_id = summary.id
+            job.tokens_used = tokens_used
+            job.status = "done"
+        except Exception as e:
+            logger.exception("Zusammenfassung KW %d fehlgeschlagen", job.week_start.isocalendar()[1])
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._tasks.pop(job.id, None)
+
+    async def wait(self, job: SummaryJob) -> SummaryJob:
+        """Wartet, bis der Job abgeschlossen ist (Scheduler, Tests)."""
+        task = self._tasks.get(job.id)
+        if task is not None:
+            await asyncio.shield(task)
+        return job
+
+    def _prune(self) -> None:
+        # Älteste abgeschlossene Jobs verwerfen
+        for job_id in [j.id for j in self._jobs.values() if not j.active]:
+            if len(self._jobs) <= self._max_jobs:
+                break
+            del self._jobs[job_id]
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def clear(self) -> None:
+        self._jobs.clear()
+        self._tasks.clear()
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+
+
+summary_jobs = SummaryJobQueue()
@@ -1,57 +1,180 @@
-from datetime import date
+from datetime import date, datetime, time, timedelta
 
-from sqlalchemy import select, func
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Integer,
+    Interval,
+    and_,
+    bindparam,
+    cast,
+    column,
+    exists,
+    extract,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    true,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.task import Task, TaskInstance
+from app.services.progress_service import rebuild_room_progress
+from app.utils.sql import dialect_insert
 
+# Obergrenze für eine einzelne Generierung (Backfill/Vorausplanung)
+MAX_GENERATION_DAYS = 366
 
-async def generate_task_instances_for_date(db: AsyncSession, target_date: date) -> int:
-    """Erstellt Task-Instanzen für alle aktiven Tasks am gegebenen Datum."""
-    created_count = 0
-    weekday = target_date.weekday()  # 0=Montag, 6=Sonntag
-    day_of_month = target_date.day
-
-    # Alle aktiven Tasks laden
-    result = await db.execute(select(Task).where(Task.is_active == True))  # noqa: E712
-    tasks = result.scalars().all()
-
-    for task in tasks:
-        should_create = False
-
-        if task.recurrence == "daily":
-            should_create = True
-        elif task.recurrence == "weekly":
-            should_create = (task.recurrence_day == weekday)
-        elif task.recurrence == "monthly":
-            should_create = (task.recurrence_day == day_of_month)
-        elif task.recurrence == "once":
-            # Einmalige Tasks: nur erstellen wenn noch keine Instanz existiert
-            existing = await db.execute(
-                select(func.count(TaskInstance.id))
-                .where(TaskInstance.task_id == task.id)
-            )
-            if existing.scalar() == 0:
-                should_create = True
 
-        if not should_create:
-            continue
+def _insert_ignoring_conflicts(db: AsyncSession):
+    """Dialektspezifisches INSERT mit ON CONFLICT DO NOTHING (PostgreSQL/SQLite)."""
+    return dialect_insert(db, TaskInstance).on_conflict_do_nothing(
+        index_elements=[TaskInstance.task_id, TaskInstance.due_date]
+    )
+
 
-        # Duplikat-Prüfung: Gibt es schon eine Instanz für diesen Task und Tag?
-        existing = await db.execute(
-            select(func.count(TaskInstance.id))
-            .where(TaskInstance.task_id == task.id)
-            .where(TaskInstance.due_date == target_date)
+def _days_subquery(db: AsyncSession, start_date: date, end_date: date):
+    """Tage des Bereichs als Subquery (due_date, weekday, day_of_month, day_start, day_end).
+
+    PostgreSQL erzeugt die Tage per generate_series, SQLite bekommt sie als
+    eine VALUES-Liste — in beiden Fällen ein FROM-Element statt eines
+    SELECTs pro Tag.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        series = (
+            func.generate_series(
+                cast(literal(start_date, Date), DateTime),
+                cast(literal(end_date, Date), DateTime),
+                literal(timedelta(days=1), Interval),
+            )
+            .table_valued("day")
+            .render_derived(name="series")
         )
-        if existing.scalar() > 0:
-            continue
+        return select(
+            cast(series.c.day, Date).label("due_date"),
+            # ISO-Wochentag 1..7 -> 0=Montag, 6=Sonntag
+            (cast(extract("isodow", series.c.day), Integer) - 1).label("weekday"),
+            cast(extract("day", series.c.day), Integer).label("day_of_month"),
+            series.c.day.label("day_start"),
+            (series.c.day + literal(timedelta(days=1), Interval)).label("day_end"),
+        ).subquery("days")
 
-        instance = TaskInstance(
-            task_id=task.id,
-            due_date=target_date,
-            status="pending",
+    rows, params = [], []
+    for i in range((end_date - start_date).days + 1):
+        day = start_date + timedelta(days=i)
+        rows.append(f"(:d{i}, :w{i}, :m{i}, :s{i}, :e{i})")
+        params += [
+            bindparam(f"d{i}", day, Date),
+            bindparam(f"w{i}", day.weekday(), Integer),  # 0=Montag, 6=Sonntag
+            bindparam(f"m{i}", day.day, Integer),
+            bindparam(f"s{i}", datetime.combine(day, time.min), DateTime),
+            bindparam(f"e{i}", datetime.combine(day + timedelta(days=1), time.min), DateTime),
+        ]
+    return (
+        text(
+            "SELECT column1 AS due_date, column2 AS weekday, column3 AS day_of_month, "
+            "column4 AS day_start, column5 AS day_end FROM (VALUES " + ", ".join(rows) + ")"
+        )
+        .bindparams(*params)
+        .columns(
+            column("due_date", Date),
+            column("weekday", Integer),
+            column("day_of_month", Integer),
+            column("day_start", DateTime),
+            column("day_end", DateTime),
         )
-        db.add(instance)
-        created_count += 1
+        .subquery("days")
+    )
+
+
+async def generate_task_instances_for_range(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+) -> int:
+    """Erstellt Task-Instanzen für alle aktiven Tasks im Datumsbereich (inklusive).
+
+    Ein einziges INSERT ... SELECT über Tasks × Tage; Duplikate verhindert der
+    Unique-Constraint (task_id, due_date) per ON CONFLICT DO NOTHING. Tasks
+    bekommen keine Instanzen für Tage vor ihrer Erstellung. Wurde etwas
+    angelegt, werden die Raum-Tageszähler des Bereichs neu aufgebaut.
+    """
+    if end_date < start_date:
+        return 0
+    if (end_date - start_date).days >= MAX_GENERATION_DAYS:
+        raise ValueError(f"Bereich größer als {MAX_GENERATION_DAYS} Tage")
+
+    days = _days_subquery(db, start_date, end_date)
+
+    # Einmalige Tasks: genau eine Instanz, wenn noch keine existiert — am
+    # ersten Tag des Bereichs, bzw. am Erstellungstag, falls der Task erst
+    # innerhalb des Bereichs angelegt wurde
+    has_instance = exists().where(TaskInstance.task_id == Task.id)
+    once_rule = and_(
+        Task.recurrence == "once",
+        ~has_instance,
+        or_(days.c.due_date == start_date, Task.created_at >= days.c.day_start),
+    )
+
+    due_tasks = (
+        select(
+            Task.id,
+            days.c.due_date,
+            literal("pending"),
+            literal(datetime.utcnow()),
+        )
+        .join(days, true())
+        .where(Task.is_active == True)  # noqa: E712
+        .where(Task.created_at < days.c.day_end)
+        .where(
+            or_(
+                Task.recurrence == "daily",
+                and_(Task.recurrence == "weekly", Task.recurrence_day == days.c.weekday),
+                and_(Task.recurrence == "monthly", Task.recurrence_day == days.c.day_of_month),
+                once_rule,
+            )
+        )
+    )
+
+    stmt = _insert_ignoring_conflicts(db).from_select(
+        ["task_id", "due_date", "status", "created_at"], due_tasks
+    )
+    result = await db.execute(stmt)
+    created = max(result.rowcount or 0, 0)
+    if created:
+        # Raum-Tageszähler für den Bereich nachziehen
+        await rebuild_room_progress(db, start_date, end_date)
+    return created
+
+
+async def generate_task_instances_for_date(db: AsyncSession, target_date: date) -> int:
+    """Erstellt Task-Instanzen für alle aktiven Tasks am gegebenen Datum."""
+    return await generate_task_instances_for_range(db, target_date, target_date)
+
+
+async def backfill_task_instances(
+    db: AsyncSession,
+    today: date,
+    max_backfill_days: int,
+    horizon_days: int = 0,
+) -> tuple[date, date, int]:
+    """Holt verpasste Tage seit der letzten Generierung nach und plant voraus.
+
+    Gibt (start, ende, anzahl) zurück. Der Backfill beginnt am Tag nach der
+    jüngsten Instanz bis heute, höchstens max_backfill_days zurück.
+    """
+    result = await db.execute(
+        select(func.max(TaskInstance.due_date)).where(TaskInstance.due_date <= today)
+    )
+    last_due = result.scalar()
+
+    start = today
+    if last_due is not None:
+        start = max(last_due + timedelta(days=1), today - timedelta(days=max_backfill_days))
+        start = min(start, today)
+    end = today + timedelta(days=max(horizon_days, 0))
 
-    return created_count
+    count = await generate_task_instances_for_range(db, start, end)
+    return start, end, count
@@ -2,67 +2,319 @@
 
 import asyncio
 import logging
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 
 import httpx
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.config import settings
+from app.models.completion import WebhookOutbox
+from app.services.event_bus import DomainEvent, event_bus
 
 logger = logging.getLogger("chorequest.webhook")
 
 
-async def _send_webhook(event_type: str, data: dict) -> None:
-    """Sendet einen Webhook an Home Assistant (fire-and-forget)."""
+def webhook_url() -> str | None:
     if not settings.ha_url or not settings.ha_webhook_id:
-        return
+        return None
+    return f"{settings.ha_url}/api/webhook/{settings.ha_webhook_id}"
+
+
+@dataclass
+class WebhookStats:
+    sent_events: int = 0
+    sent_batches: int = 0
+    retries: int = 0
+    failed_events: int = 0
+    dropped_events: int = 0
+    redelivered_events: int = 0
+
+
+@dataclass
+class QueuedEvent:
+    payload: dict
+    outbox_id: int | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class WebhookDispatcher:
+    """Begrenzte Queue mit einem Worker, der Events gebündelt an HA schickt.
+
+    Events innerhalb eines Flush-Fensters gehen als ein POST raus (ein
+    einzelnes Event unverändert, mehrere als {"event_type": "batch",
+    "events": [...]}). Fehlgeschlagene Sendungen werden mit exponentiellem
+    Backoff wiederholt. Ist die Queue voll, wird das Event verworfen — HA
+    erkennt die Lücke an der Sequenznummer und lädt neu.
+
+    Mit Session-Factory wird die Outbox gepflegt: zugestellte Events werden
+    markiert, und ein periodischer Sweep liefert unzugestellte nach
+    (at-least-once; ohne Sequenznummer, HA lädt dann komplett neu).
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self._transport = transport
+        self._queue: asyncio.Queue[QueuedEvent] | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._worker: asyncio.Task | None = None
+        self._sweeper: asyncio.Task | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        # Outbox-IDs in Queue oder Zustellung (der Sweep überspringt sie)
+        self._inflight: set[int] = set()
+        self._latencies: deque[float] = deque(maxlen=200)
+        self.stats = WebhookStats()
 
-    url = f"{settings.ha_url}/api/webhook/{settings.ha_webhook_id}"
-    payload = {"event_type": event_type, **data}
-
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.post(url, json=payload)
-            logger.debug("Webhook gesendet: %s -> %d", event_type, resp.status_code)
-    except Exception as e:
-        logger.warning("Webhook fehlgeschlagen (%s): %s", event_type, e)
-
-
-def notify_task_completed(
-    instance_id: int,
-    task_title: str,
-    user_name: str,
-    points: int,
-    room_name: str,
-) -> None:
-    """Benachrichtigt HA über eine erledigte Aufgabe (fire-and-forget)."""
-    asyncio.create_task(
-        _send_webhook(
-            "task_completed",
-            {
-                "instance_id": instance_id,
-                "task_title": task_title,
-                "user_name": user_name,
-                "points": points,
-                "room_name": room_name,
-            },
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self, session_factory: async_sessionmaker[AsyncSession] | None = None) -> None:
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._queue = asyncio.Queue(maxsize=settings.webhook_queue_size)
+        self._client = httpx.AsyncClient(
+            timeout=5.0,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+            transport=self._transport,
         )
+        self._worker = asyncio.create_task(self._run())
+        if session_factory is not None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    def enqueue(
+        self, payload: dict, outbox_id: int | None = None, created_at: datetime | None = None
+    ) -> bool:
+        """Reiht ein Event ein; False wenn es verworfen wurde (Queue voll oder gestoppt).
+
+        Verworfene Events mit Outbox-Zeile holt der Sweep später nach.
+        """
+        if self._queue is None or not self.running:
+            self.stats.dropped_events += 1
+            return False
+        try:
+            self._queue.put_nowait(
+                QueuedEvent(payload, outbox_id, created_at or datetime.utcnow())
+            )
+        except asyncio.QueueFull:
+            self.stats.dropped_events += 1
+            logger.warning("Webhook-Queue voll, Event %s verworfen", payload.get("event_type"))
+            return False
+        if outbox_id is not None:
+            self._inflight.add(outbox_id)
+        return True
+
+    async def sweep(self) -> int:
+        """Reiht unzugestellte Outbox-Events ein, die älter als ein Sweep-Intervall sind.
+
+        Gibt die Anzahl eingereihter Events zurück.
+        """
+        if self._session_factory is None or not self.running or webhook_url() is None:
+            return 0
+        free = settings.webhook_queue_size - self.depth
+        if free <= 0:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.webhook_outbox_sweep_interval)
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(WebhookOutbox)
+                .where(WebhookOutbox.delivered_at.is_(None))
+                .where(WebhookOutbox.created_at < cutoff)
+                .where(or_(
+                    WebhookOutbox.last_attempt_at.is_(None),
+                    WebhookOutbox.last_attempt_at < cutoff,
+                ))
+                .order_by(WebhookOutbox.id)
+                .limit(free)
+            )
+            rows = result.scalars().all()
+
+        count = 0
+        for row in rows:
+            if row.id in self._inflight:
+                continue
+            payload = {**row.payload, "event_type": row.event_type, "redelivered": True}
+            if not self.enqueue(payload, row.id, row.created_at):
+                break
+            count += 1
+        if count:
+            self.stats.redelivered_events += count
+            logger.info("Webhook-Outbox: %d Events zur Nachlieferung eingereiht", count)
+        return count
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.webhook_outbox_sweep_interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Webhook-Outbox-Sweep fehlgeschlagen")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Arbeitet die Queue ab (höchstens `timeout` Sekunden) und schließt den Client.
+
+        Was dabei nicht mehr rausgeht, bleibt in der Outbox für den nächsten Start.
+        """
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        if self._worker is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Webhook-Queue beim Beenden nicht leer (%d Events)", self.depth)
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._queue = None
+        self._inflight.clear()
+
+    def metrics(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            "running": self.running,
+            "queue_depth": self.depth,
+            "queue_size": settings.webhook_queue_size,
+            "sent_events": self.stats.sent_events,
+            "sent_batches": self.stats.sent_batches,
+            "retries": self.stats.retries,
+            "failed_events": self.stats.failed_events,
+            "dropped_events": self.stats.dropped_events,
+            "redelivered_events": self.stats.redelivered_events,
+            # Zeit vom Event bis zur bestätigten Zustellung (letzte 200 Events)
+            "latency_p50_ms": round(statistics.median(latencies) * 1000) if latencies else None,
+            "latency_p95_ms": (
+                round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000)
+                if latencies else None
+            ),
+            "latency_max_ms": round(latencies[-1] * 1000) if latencies else None,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            # Flush-Fenster: weitere Events einsammeln
+            deadline = time.monotonic() + settings.webhook_flush_interval
+            while len(batch) < settings.webhook_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                delivered = await self._deliver([item.payload for item in batch])
+                await self._record_outcome(batch, delivered)
+            except Exception:
+                logger.exception("Webhook-Auslieferung fehlgeschlagen")
+            finally:
+                for item in batch:
+                    self._inflight.discard(item.outbox_id)
+                    self._queue.task_done()
+
+    async def _record_outcome(self, batch: list[QueuedEvent], delivered: bool) -> None:
+        now = datetime.utcnow()
+        if delivered:
+            self._latencies.extend((now - item.created_at).total_seconds() for item in batch)
+        ids = [item.outbox_id for item in batch if item.outbox_id is not None]
+        if not ids or self._session_factory is None:
+            return
+        values = {"attempts": WebhookOutbox.attempts + 1, "last_attempt_at": now}
+        if delivered:
+            values["delivered_at"] = now
+        async with self._session_factory() as db:
+            await db.execute(update(WebhookOutbox).where(WebhookOutbox.id.in_(ids)).values(**values))
+            await db.commit()
+
+    async def _deliver(self, batch: list[dict]) -> bool:
+        url = webhook_url()
+        if url is None:
+            return False
+        body = batch[0] if len(batch) == 1 else {"event_type": "batch", "events": batch}
+
+        for attempt in range(settings.webhook_max_retries + 1):
+            if attempt:
+                self.stats.retries += 1
+                await asyncio.sleep(settings.webhook_retry_backoff * 2 ** (attempt - 1))
+            try:
+                resp = await self._client.post(url, json=body)
+            except httpx.HTTPError as e:
+                logger.warning("Webhook fehlgeschlagen (Versuch %d): %s", attempt + 1, e)
+                continue
+            if resp.status_code < 400:
+                self.stats.sent_events += len(batch)
+                self.stats.sent_batches += 1
+                logger.debug("Webhook gesendet: %d Events -> %d", len(batch), resp.status_code)
+                return True
+            logger.warning("Webhook abgelehnt (Versuch %d): HTTP %d", attempt + 1, resp.status_code)
+            if resp.status_code < 500 and resp.status_code != 429:
+                break  # Client-Fehler: Wiederholen hilft nicht
+
+        self.stats.failed_events += len(batch)
+        return False
+
+
+webhook_dispatcher = WebhookDispatcher()
+
+
+async def get_outbox_backlog(db: AsyncSession) -> dict:
+    """Unzugestellte Outbox-Events und Alter des ältesten."""
+    result = await db.execute(
+        select(func.count(WebhookOutbox.id), func.min(WebhookOutbox.created_at))
+        .where(WebhookOutbox.delivered_at.is_(None))
     )
+    backlog, oldest = result.one()
+    return {
+        "outbox_backlog": backlog,
+        "outbox_oldest_age_seconds": (
+            round((datetime.utcnow() - oldest).total_seconds()) if oldest else None
+        ),
+    }
 
 
-def notify_achievement_unlocked(
-    user_name: str,
-    achievement_name: str,
-    icon: str | None,
-    points_reward: int,
-) -> None:
-    """Benachrichtigt HA über ein freigeschaltetes Achievement (fire-and-forget)."""
-    asyncio.create_task(
-        _send_webhook(
-            "achievement_unlocked",
-            {
-                "user_name": user_name,
-                "achievement_name": achievement_name,
-                "icon": icon or "mdi:trophy",
-                "points_reward": points_reward,
-            },
-        )
+async def purge_webhook_outbox(db: AsyncSession, now: datetime | None = None) -> tuple[int, int]:
+    """Löscht zugestellte Zeilen nach der Aufbewahrungszeit und zu alte unzugestellte.
+
+    Gibt (gelöscht zugestellt, verworfen unzugestellt) zurück.
+    """
+    now = now or datetime.utcnow()
+    delivered = await db.execute(
+        delete(WebhookOutbox)
+        .where(WebhookOutbox.delivered_at < now - timedelta(hours=settings.webhook_outbox_retention_hours))
+    )
+    expired = await db.execute(
+        delete(WebhookOutbox)
+        .where(WebhookOutbox.delivered_at.is_(None))
+        .where(WebhookOutbox.created_at < now - timedelta(hours=settings.webhook_outbox_max_age_hours))
+    )
+    if expired.rowcount:
+        logger.warning("Webhook-Outbox: %d nie zugestellte Events verworfen", expired.rowcount)
+    return delivered.rowcount, expired.rowcount
+
+
+def forward_event(evt: DomainEvent) -> None:
+    """Leitet ein Domain-Event als Webhook an HA weiter (über die Delivery-Queue).
+
+    Epoche und Sequenznummer erlauben dem HA-Coordinator, Lücken zu erkennen
+    und nur dann komplett neu zu laden.
+    """
+    if webhook_url() is None:
+        return
+    webhook_dispatcher.enqueue(
+        {"event_type": evt.event_type, "event_epoch": event_bus.epoch, "event_seq": evt.id, **evt.data},
+        evt.outbox_id,
+        evt.created_at,
     )
@@ -0,0 +1,22 @@
+"""Hilfsfunktionen für bedingte Requests (ETag / If-None-Match)."""
+
+from fastapi import Request, Response, status
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Prüft ob einer der ETags aus If-None-Match passt (schwacher Vergleich laut RFC 9110)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Setzt den ETag-Header; gibt eine 304-Antwort zurück, wenn der Client aktuell ist."""
+    response.headers["ETag"] = etag
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
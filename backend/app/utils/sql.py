@@ -0,0 +1,12 @@
+"""Dialektspezifische SQL-Helfer (PostgreSQL in Produktion, SQLite in Tests)."""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_insert(db: AsyncSession, table):
+    """INSERT des aktiven Dialekts — unterstützt ON CONFLICT DO NOTHING/UPDATE."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
@@ -0,0 +1,170 @@
+"""Benchmark: Statements und Latenz pro Completion (POST /instances/{id}/complete).
+
+Legt Räume, Tasks, Achievements und eine Completion-Historie an und schließt
+danach offene Instanzen einzeln ab — jede in eigener Session mit Commit, wie
+ein Request. Gemessen werden die SQL-Statements pro Completion sowie p50/p99
+der Latenz.
+
+Aufruf (aus backend/):
+    python -m benchmarks.bench_completion
+    python -m benchmarks.bench_completion --url postgresql+asyncpg://user:pw@localhost/bench
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models import Achievement, Room, Task, TaskCompletion, TaskInstance, User
+from app.services.completion_service import complete_task_instance
+from app.services.progress_service import rebuild_room_progress
+from app.services.stats_service import rebuild_user_daily_stats
+
+
+async def seed(
+    session: AsyncSession, history_days: int, rooms: int, tasks_per_room: int,
+    users: int, achievements: int,
+) -> list[int]:
+    """Erzeugt Stammdaten, Historie und die heute offenen Instanzen (Rückgabe: IDs)."""
+    rng = random.Random(42)
+    today = date.today()
+    start = today - timedelta(days=history_days)
+
+    user_objs = [User(username=f"user{i}", display_name=f"User {i}") for i in range(users)]
+    room_objs = [Room(name=f"Raum {i}", sort_order=i) for i in range(rooms)]
+    session.add_all(user_objs + room_objs)
+    await session.flush()
+
+    task_objs = [
+        Task(
+            title=f"Task {r.id}-{i}",
+            room_id=r.id,
+            recurrence="daily",
+            created_at=datetime.combine(start, datetime.min.time()),
+        )
+        for r in room_objs
+        for i in range(tasks_per_room)
+    ]
+    kinds = ["total_tasks", "room_tasks", "streak", "weekly_winner"]
+    session.add_all(task_objs)
+    session.add_all([
+        Achievement(
+            name=f"Achievement {i}",
+            criteria={"type": kinds[i % len(kinds)], "value": 10_000 + i},
+            points_reward=10,
+        )
+        for i in range(achievements)
+    ])
+    await session.flush()
+
+    instance_rows = [
+        {
+            "task_id": task.id,
+            "due_date": start + timedelta(days=offset),
+            "status": "pending" if offset == history_days else "completed",
+        }
+        for offset in range(history_days + 1)
+        for task in task_objs
+    ]
+    await session.execute(TaskInstance.__table__.insert(), instance_rows)
+
+    result = await session.execute(
+        select(TaskInstance.id, TaskInstance.due_date).where(TaskInstance.status == "completed")
+    )
+    completion_rows = [
+        {
+            "task_instance_id": inst_id,
+            "user_id": rng.choice(user_objs).id,
+            "completed_at": datetime.combine(due, datetime.min.time()) + timedelta(hours=rng.randint(7, 21)),
+            "points_earned": 10,
+            "bonus_points": 0,
+        }
+        for inst_id, due in result.all()
+    ]
+    await session.execute(TaskCompletion.__table__.insert(), completion_rows)
+    await rebuild_room_progress(session)
+    await rebuild_user_daily_stats(session)
+    await session.commit()
+
+    result = await session.execute(
+        select(TaskInstance.id).where(TaskInstance.status == "pending").order_by(TaskInstance.id)
+    )
+    pending = list(result.scalars().all())
+    print(f"Seed: {len(instance_rows)} Instanzen, {len(completion_rows)} Completions, "
+          f"{achievements} Achievements, {len(pending)} offen")
+    return pending
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///bench_completion.db")
+    parser.add_argument("--history-days", type=int, default=180)
+    parser.add_argument("--rooms", type=int, default=12)
+    parser.add_argument("--tasks-per-room", type=int, default=8)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--achievements", type=int, default=40)
+    args = parser.parse_args()
+
+    if args.url.startswith("sqlite") and os.path.exists("bench_completion.db"):
+        os.remove("bench_completion.db")
+
+    engine = create_async_engine(args.url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        pending = await seed(
+            session, args.history_days, args.rooms, args.tasks_per_room,
+            args.users, args.achievements,
+        )
+
+    statements: list[str] = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+
+    rng = random.Random(7)
+    latencies: list[float] = []
+    counts: list[int] = []
+    for instance_id in pending:
+        statements.clear()
+        t0 = time.perf_counter()
+        async with session_factory() as session:
+            await complete_task_instance(session, instance_id, rng.randint(1, args.users))
+            await session.commit()
+        latencies.append((time.perf_counter() - t0) * 1000)
+        counts.append(len(statements))
+
+    event.remove(engine.sync_engine, "before_cursor_execute", _count)
+
+    print(f"\nCompletions: {len(latencies)}")
+    print(f"Statements pro Completion: min {min(counts)}, max {max(counts)}, "
+          f"Median {statistics.median(counts):.0f}")
+    # Abweichungen vom Grundwert: Freischaltungen und offene weekly_winner-Achievements
+    print("Verteilung: " + ", ".join(f"{n}×{c}" for n, c in sorted(Counter(counts).items())))
+    print(f"Latenz p50: {percentile(latencies, 50):.2f} ms")
+    print(f"Latenz p99: {percentile(latencies, 99):.2f} ms")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+"""Benchmark: Query-Pläne und Laufzeiten der Hot-Path-Abfragen mit/ohne Indizes.
+
+Legt eine Datenbank mit einem Jahr Historie an und misst die Abfragen
+einmal ohne und einmal mit allen in den Models deklarierten Indizes
+(Primärschlüssel und Unique-Constraints bleiben in beiden Läufen).
+
+Aufruf (aus backend/):
+    python -m benchmarks.bench_indexes
+    python -m benchmarks.bench_indexes --url postgresql+asyncpg://user:pw@localhost/bench
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models import Room, Task, TaskCompletion, TaskInstance, User
+
+def model_indexes() -> list:
+    """Alle Indizes aus Base.metadata — neue Indizes landen automatisch im Vergleich."""
+    return [index for table in Base.metadata.sorted_tables for index in table.indexes]
+
+
+async def seed(session: AsyncSession, days: int, rooms: int, tasks_per_room: int, users: int) -> None:
+    """Erzeugt Räume, Tasks und `days` Tage Instanzen + Completions."""
+    rng = random.Random(42)
+    today = date.today()
+    start = today - timedelta(days=days)
+
+    user_objs = [User(username=f"user{i}", display_name=f"User {i}") for i in range(users)]
+    room_objs = [Room(name=f"Raum {i}", sort_order=i) for i in range(rooms)]
+    session.add_all(user_objs + room_objs)
+    await session.flush()
+
+    task_objs = [
+        Task(
+            title=f"Task {r.id}-{i}",
+            room_id=r.id,
+            recurrence="daily",
+            created_at=datetime.combine(start, datetime.min.time()),
+        )
+        for r in room_objs
+        for i in range(tasks_per_room)
+    ]
+    session.add_all(task_objs)
+    await session.flush()
+
+    instance_rows = []
+    for offset in range(days + 1):
+        day = start + timedelta(days=offset)
+        for task in task_objs:
+            status = "pending" if day == today else rng.choices(
+                ["completed", "skipped", "pending"], [0.8, 0.1, 0.1]
+            )[0]
+            instance_rows.append({"task_id": task.id, "due_date": day, "status": status})
+    await session.execute(TaskInstance.__table__.insert(), instance_rows)
+
+    result = await session.execute(
+        select(TaskInstance.id, TaskInstance.due_date).where(TaskInstance.status == "completed")
+    )
+    completion_rows = [
+        {
+            "task_instance_id": inst_id,
+            "user_id": rng.choice(user_objs).id,
+            "completed_at": datetime.combine(due, datetime.min.time()) + timedelta(hours=rng.randint(7, 21)),
+            "points_earned": 10,
+            "bonus_points": 0,
+        }
+        for inst_id, due in result.all()
+    ]
+    await session.execute(TaskCompletion.__table__.insert(), completion_rows)
+    await session.commit()
+    print(f"Seed: {len(instance_rows)} Instanzen, {len(completion_rows)} Completions")
+
+
+def hot_queries(user_id: int) -> dict:
+    today = date.today()
+    week_start = today - timedelta(days=today.weekday())
+    return {
+        "dashboard: heute offen pro Raum": (
+            select(TaskInstance.id, Task.room_id, Task.title)
+            .join(Task, TaskInstance.task_id == Task.id)
+            .where(TaskInstance.due_date == today)
+            .where(TaskInstance.status == "pending")
+        ),
+        "dashboard: überfällig (count)": (
+            select(func.count(TaskInstance.id))
+            .where(TaskInstance.due_date < today)
+            .where(TaskInstance.status == "pending")
+        ),
+        "instances/today": (
+            select(TaskInstance.id).where(
+                or_(
+                    TaskInstance.due_date == today,
+                    (TaskInstance.due_date < today) & (TaskInstance.status == "pending"),
+                )
+            )
+        ),
+        "Instanz je Task + Tag": (
+            select(TaskInstance.id)
+            .where(TaskInstance.task_id == 1)
+            .where(TaskInstance.due_date == today)
+        ),
+        "User-Completions der Woche": (
+            select(func.count(TaskCompletion.id))
+            .where(TaskCompletion.user_id == user_id)
+            .where(TaskCompletion.completed_at >= datetime.combine(week_start, datetime.min.time()))
+        ),
+    }
+
+
+async def explain(conn, stmt) -> list[str]:
+    dialect = conn.dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN "
+    result = await conn.exec_driver_sql(prefix + sql)
+    if dialect.name == "sqlite":
+        return [row[-1] for row in result.all()]
+    return [row[0] for row in result.all()]
+
+
+async def measure(engine, label: str, runs: int) -> dict[str, float]:
+    print(f"\n=== {label} ===")
+    timings: dict[str, float] = {}
+    async with engine.connect() as conn:
+        for name, stmt in hot_queries(user_id=1).items():
+            plan = await explain(conn, stmt)
+            samples = []
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                await conn.execute(stmt)
+                samples.append((time.perf_counter() - t0) * 1000)
+            timings[name] = statistics.median(samples)
+            print(f"\n{name}: median {timings[name]:.2f} ms")
+            for line in plan:
+                print(f"    {line}")
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///bench_indexes.db")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--rooms", type=int, default=12)
+    parser.add_argument("--tasks-per-room", type=int, default=5)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.url.startswith("sqlite") and os.path.exists("bench_indexes.db"):
+        os.remove("bench_indexes.db")
+
+    engine = create_async_engine(args.url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        await seed(session, args.days, args.rooms, args.tasks_per_room, args.users)
+
+    # Vorher: ohne Indizes
+    async with engine.begin() as conn:
+        for index in model_indexes():
+            await conn.run_sync(lambda sync_conn, idx=index: idx.drop(sync_conn, checkfirst=True))
+        await conn.execute(text("ANALYZE"))
+    before = await measure(engine, "ohne Indizes", args.runs)
+
+    # Nachher: Indizes aus den Models anlegen
+    async with engine.begin() as conn:
+        for index in model_indexes():
+            await conn.run_sync(lambda sync_conn, idx=index: idx.create(sync_conn, checkfirst=True))
+        await conn.execute(text("ANALYZE"))
+    after = await measure(engine, "mit Indizes", args.runs)
+
+    print("\n=== Zusammenfassung (Median ms) ===")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<32} {before[name]:>9.2f} -> {after[name]:>9.2f}  (x{speedup:.1f})")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,7 +10,7 @@ import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.database import Base, get_db
+from app.database import Base, get_db, get_session_factory
 from app.main import app
 
 TEST_DATABASE_URL = "sqlite+aiosqlite://"
@@ -24,6 +24,17 @@ HEADERS = {"Authorization": "Bearer test-key"}
 @pytest.fixture(autouse=True)
 async def setup_database():
     """Erstellt alle Tabellen vor jedem Test, löscht sie danach."""
+    from app.services.cache_service import dashboard_cache
+    from app.services.claude_cache_service import claude_usage
+    from app.services.event_bus import event_bus
+    from app.services.leaderboard_service import leaderboard_index
+    from app.services.summary_job_service import summary_jobs
+
+    dashboard_cache.clear()
+    event_bus.clear()
+    leaderboard_index.clear()
+    summary_jobs.clear()
+    claude_usage.reset()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
@@ -51,9 +62,25 @@ async def client():
                 raise
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: TestSession
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def statement_counter():
+    """Zählt die gegen die Test-DB ausgeführten SQL-Statements."""
+    from sqlalchemy import event
+
+    statements: list[str] = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
@@ -0,0 +1,187 @@
+"""Tests für den Dashboard-Endpoint (HA-Coordinator)."""
+
+from datetime import date, timedelta
+
+import pytest
+from tests.conftest import HEADERS
+
+
+async def _seed(client, db_session, room_count=3):
+    """Hilfsfunktion: Räume, Tasks und Instanzen anlegen."""
+    from app.models.task import TaskInstance
+    from app.services.progress_service import rebuild_room_progress
+
+    user = (await client.post("/api/users", headers=HEADERS, json={"username": "dash"})).json()
+    today = date.today()
+    for i in range(room_count):
+        room = (await client.post(
+            "/api/rooms", headers=HEADERS, json={"name": f"Raum {i}", "sort_order": i}
+        )).json()
+        task = (await client.post(
+            "/api/tasks", headers=HEADERS,
+            json={"title": f"Task {i}", "room_id": room["id"], "base_points": 10 + i},
+        )).json()
+        done_task = (await client.post(
+            "/api/tasks", headers=HEADERS,
+            json={"title": f"Erledigt {i}", "room_id": room["id"]},
+        )).json()
+        db_session.add(TaskInstance(task_id=task["id"], due_date=today, status="pending"))
+        db_session.add(TaskInstance(task_id=done_task["id"], due_date=today, status="completed"))
+        db_session.add(
+            TaskInstance(task_id=task["id"], due_date=today - timedelta(days=1), status="pending")
+        )
+    # Raum ohne Aufgaben
+    await client.post("/api/rooms", headers=HEADERS, json={"name": "Leer", "sort_order": 99})
+    # Tageszähler wie nach einem Generierungslauf
+    await rebuild_room_progress(db_session)
+    await db_session.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_dashboard_empty(client):
+    """Leeres Dashboard."""
+    resp = await client.get("/api/dashboard", headers=HEADERS)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["tasks_today"] == 0
+    assert data["tasks_overdue"] == 0
+    assert data["users"] == []
+    assert data["rooms"] == []
+
+
+@pytest.mark.asyncio
+async def test_dashboard_payload(client, db_session):
+    """Dashboard gruppiert heutige offene Tasks pro Raum."""
+    user = await _seed(client, db_session)
+
+    resp = await client.get("/api/dashboard", headers=HEADERS)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["tasks_today"] == 3
+    assert data["tasks_overdue"] == 3
+    assert data["users"] == [{
+        "id": user["id"],
+        "username": "dash",
+        "display_name": "Dash",
+        "ha_user_id": None,
+        "total_points": 0,
+        "weekly_points": 0,
+        "current_streak": 0,
+    }]
+    assert [r["room_name"] for r in data["rooms"]] == ["Raum 0", "Raum 1", "Raum 2", "Leer"]
+    first = data["rooms"][0]
+    assert set(first) == {"room_id", "room_name", "ha_area_id", "icon", "progress", "tasks"}
+    assert first["progress"] == {
+        "total": 2, "completed": 1, "skipped": 0, "pending": 1, "is_complete": False,
+    }
+    assert data["rooms"][-1]["progress"]["total"] == 0
+    assert len(first["tasks"]) == 1
+    assert set(first["tasks"][0]) == {
+        "instance_id", "title", "base_points", "status", "assigned_user_id",
+    }
+    assert first["tasks"][0]["title"] == "Task 0"
+    assert first["tasks"][0]["status"] == "pending"
+    assert data["rooms"][-1]["tasks"] == []
+
+
+@pytest.mark.asyncio
+async def test_dashboard_statement_count_independent_of_rooms(
+    client, db_session, statement_counter
+):
+    """Dashboard braucht eine feste Anzahl Statements, egal wie viele Räume."""
+    await _seed(client, db_session, room_count=10)
+
+    statement_counter.clear()
+    resp = await client.get("/api/dashboard", headers=HEADERS)
+    assert resp.status_code == 200
+    assert len(resp.json()["rooms"]) == 11
+    selects = [s for s in statement_counter if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 2
+
+
+@pytest.mark.asyncio
+async def test_dashboard_served_from_snapshot(client, db_session, statement_counter):
+    """Wiederholte Polls ohne Änderung treffen die DB nicht."""
+    await _seed(client, db_session)
+    first = await client.get("/api/dashboard", headers=HEADERS)
+
+    statement_counter.clear()
+    second = await client.get("/api/dashboard", headers=HEADERS)
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert [s for s in statement_counter if s.lstrip().upper().startswith("SELECT")] == []
+
+
+@pytest.mark.asyncio
+async def test_dashboard_snapshot_invalidated_by_mutation(client, db_session):
+    """Eine Änderung über die API erhöht die Version und invalidiert den Snapshot."""
+    from app.services.cache_service import data_version
+
+    user = await _seed(client, db_session)
+    first = (await client.get("/api/dashboard", headers=HEADERS)).json()
+    instance_id = first["rooms"][0]["tasks"][0]["instance_id"]
+
+    version = data_version.value
+    resp = await client.post(
+        f"/api/instances/{instance_id}/complete",
+        headers=HEADERS,
+        json={"user_id": user["id"]},
+    )
+    assert resp.status_code == 200
+    assert data_version.value > version
+
+    second = (await client.get("/api/dashboard", headers=HEADERS)).json()
+    assert second["tasks_today"] == first["tasks_today"] - 1
+    assert second["rooms"][0]["tasks"] == []
+    assert second["users"][0]["total_points"] > 0
+
+
+@pytest.mark.asyncio
+async def test_dashboard_snapshot_expires_after_ttl(client, db_session, monkeypatch):
+    """Die TTL greift als Fallback auch ohne Versionswechsel."""
+    from app.config import settings
+
+    await _seed(client, db_session)
+    await client.get("/api/dashboard", headers=HEADERS)
+
+    # Änderung an der API vorbei — bleibt bis zum TTL-Ablauf unsichtbar
+    from app.models.user import User
+    db_session.add(User(username="direkt"))
+    await db_session.commit()
+    cached = (await client.get("/api/dashboard", headers=HEADERS)).json()
+    assert len(cached["users"]) == 1
+
+    monkeypatch.setattr(settings, "dashboard_cache_ttl", -1)
+    fresh = (await client.get("/api/dashboard", headers=HEADERS)).json()
+    assert len(fresh["users"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_dashboard_etag_not_modified(client, db_session):
+    """Dashboard liefert 304 bei passendem If-None-Match."""
+    await _seed(client, db_session)
+    first = await client.get("/api/dashboard", headers=HEADERS)
+    etag = first.headers["ETag"]
+
+    resp = await client.get("/api/dashboard", headers={**HEADERS, "If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.content == b""
+
+    await client.post("/api/users", headers=HEADERS, json={"username": "neu"})
+    resp = await client.get("/api/dashboard", headers={**HEADERS, "If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_dashboard_reports_event_sequence(client, db_session):
+    """Dashboard enthält den Event-Stand, ab dem Webhook-Deltas anwendbar sind."""
+    from app.services.event_bus import event_bus
+
+    await _seed(client, db_session)
+    event_bus.publish("task_skipped", {"instance_id": 1})
+    data = (await client.get("/api/dashboard", headers=HEADERS)).json()
+    assert data["event_epoch"] == event_bus.epoch
+    assert data["event_seq"] == event_bus.last_id
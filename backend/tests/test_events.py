@@ -0,0 +1,322 @@
+"""Tests für Event-Bus und SSE-Stream."""
+
+from datetime import date
+
+import pytest
+from tests.conftest import HEADERS
+
+from app.routers.events import event_stream
+from app.services.event_bus import EventBus, event_bus
+
+
+async def _never_disconnected():
+    return False
+
+
+async def _collect(gen, count):
+    """Hilfsfunktion: Die ersten `count` Chunks eines SSE-Generators einsammeln."""
+    chunks = []
+    async for chunk in gen:
+        chunks.append(chunk)
+        if len(chunks) == count:
+            break
+    await gen.aclose()
+    return chunks
+
+
+def test_replay_from_buffer():
+    """Replay liefert nur Events nach der angegebenen ID."""
+    bus = EventBus(buffer_size=10)
+    first = bus.publish("a", {})
+    bus.publish("b", {})
+    bus.publish("c", {})
+    replay = bus.replay(bus.event_id(first))
+    assert [e.event_type for e in replay] == ["b", "c"]
+    assert bus.replay(f"{bus.epoch}-{bus.last_id}") == []
+
+
+def test_replay_gap_detected():
+    """Aus dem Ringpuffer gefallene Events oder fremde Epoche ergeben None."""
+    bus = EventBus(buffer_size=2)
+    first = bus.publish("a", {})
+    for _ in range(3):
+        bus.publish("x", {})
+    assert bus.replay(bus.event_id(first)) is None
+    assert bus.replay("andere-1") is None
+
+
+def test_slow_subscriber_is_dropped():
+    """Eine volle Abo-Queue schließt das Abo statt zu blockieren."""
+    bus = EventBus(buffer_size=10, queue_size=1)
+    sub = bus.subscribe()
+    bus.publish("a", {})
+    bus.publish("b", {})
+    assert sub.overflowed
+    assert bus.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_after_last_event_id():
+    """Der Stream spielt verpasste Events ab Last-Event-ID nach."""
+    first = event_bus.publish("task_completed", {"instance_id": 1})
+    event_bus.publish("task_completed", {"instance_id": 2})
+
+    chunks = await _collect(
+        event_stream(event_bus.event_id(first), _never_disconnected), 2
+    )
+    assert chunks[0].startswith("retry:")
+    assert "event: task_completed" in chunks[1]
+    assert '"instance_id": 2' in chunks[1]
+
+
+@pytest.mark.asyncio
+async def test_stream_signals_resync_on_gap():
+    """Unbekannte Last-Event-ID führt zu einem resync-Event."""
+    chunks = await _collect(event_stream("veraltet-42", _never_disconnected), 2)
+    assert "event: resync" in chunks[1]
+
+
+@pytest.mark.asyncio
+async def test_completion_publishes_event_after_commit(client, db_session):
+    """Eine Erledigung landet nach dem Commit als Event im Bus."""
+    from app.models.task import TaskInstance
+
+    room = (await client.post("/api/rooms", headers=HEADERS, json={"name": "Bad"})).json()
+    user = (await client.post("/api/users", headers=HEADERS, json={"username": "ev"})).json()
+    task = (await client.post(
+        "/api/tasks", headers=HEADERS, json={"title": "Putzen", "room_id": room["id"]}
+    )).json()
+    instance = TaskInstance(task_id=task["id"], due_date=date.today(), status="pending")
+    db_session.add(instance)
+    await db_session.commit()
+
+    resp = await client.post(
+        f"/api/instances/{instance.id}/complete",
+        headers=HEADERS,
+        json={"user_id": user["id"]},
+    )
+    assert resp.status_code == 200
+
+    replay = event_bus.replay(f"{event_bus.epoch}-0")
+    completed = [e for e in replay if e.event_type == "task_completed"]
+    assert len(completed) == 1
+    assert completed[0].data["instance_id"] == instance.id
+    assert completed[0].data["user_id"] == user["id"]
+
+
+@pytest.mark.asyncio
+async def test_failed_request_publishes_nothing(client):
+    """Bei Fehlern (Rollback) werden keine Events veröffentlicht."""
+    resp = await client.post("/api/instances/999/skip", headers=HEADERS)
+    assert resp.status_code == 404
+    assert event_bus.last_id == 0
+
+
+def _webhook_transport(received: list, fail_first: int = 0):
+    """Hilfsfunktion: httpx-Transport, der Webhook-POSTs mitschreibt."""
+    import json
+
+    import httpx
+
+    attempts = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts["count"] += 1
+        if attempts["count"] <= fail_first:
+            return httpx.Response(503)
+        received.append((str(request.url), json.loads(request.content)))
+        return httpx.Response(200)
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def webhook_settings(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "ha_url", "http://ha.local")
+    monkeypatch.setattr(settings, "ha_webhook_id", "hook")
+    monkeypatch.setattr(settings, "webhook_flush_interval", 0.05)
+    monkeypatch.setattr(settings, "webhook_retry_backoff", 0.01)
+    return settings
+
+
+@pytest.mark.asyncio
+async def test_events_forwarded_as_webhooks_with_sequence(webhook_settings, monkeypatch):
+    """Events gehen mit Epoche und Sequenznummer als Webhook an HA."""
+    from app.services import webhook_service
+
+    received = []
+    dispatcher = webhook_service.WebhookDispatcher(transport=_webhook_transport(received))
+    monkeypatch.setattr(webhook_service, "webhook_dispatcher", dispatcher)
+    dispatcher.start()
+    event_bus.add_listener(webhook_service.forward_event)
+    try:
+        evt = event_bus.publish("task_completed", {"instance_id": 7, "total_points": 42})
+    finally:
+        event_bus.remove_listener(webhook_service.forward_event)
+        await dispatcher.stop()
+
+    assert received == [(
+        "http://ha.local/api/webhook/hook",
+        {
+            "event_type": "task_completed",
+            "event_epoch": event_bus.epoch,
+            "event_seq": evt.id,
+            "instance_id": 7,
+            "total_points": 42,
+        },
+    )]
+
+
+@pytest.mark.asyncio
+async def test_webhook_dispatcher_batches_and_retries(webhook_settings):
+    """Events im Flush-Fenster gehen gebündelt raus; 5xx wird wiederholt."""
+    from app.services.webhook_service import WebhookDispatcher
+
+    received = []
+    dispatcher = WebhookDispatcher(transport=_webhook_transport(received, fail_first=1))
+    dispatcher.start()
+    for i in range(3):
+        assert dispatcher.enqueue({"event_type": "task_skipped", "event_seq": i + 1})
+    assert dispatcher.metrics()["queue_depth"] == 3
+    await dispatcher.stop()
+
+    assert len(received) == 1
+    body = received[0][1]
+    assert body["event_type"] == "batch"
+    assert [e["event_seq"] for e in body["events"]] == [1, 2, 3]
+    metrics = dispatcher.metrics()
+    assert metrics["sent_events"] == 3
+    assert metrics["sent_batches"] == 1
+    assert metrics["retries"] == 1
+    assert metrics["queue_depth"] == 0
+    assert not metrics["running"]
+
+
+@pytest.mark.asyncio
+async def test_webhook_queue_is_bounded(webhook_settings, monkeypatch):
+    """Eine volle Queue verwirft Events statt unbegrenzt zu wachsen."""
+    from app.services.webhook_service import WebhookDispatcher
+
+    monkeypatch.setattr(webhook_settings, "webhook_queue_size", 2)
+    received = []
+    dispatcher = WebhookDispatcher(transport=_webhook_transport(received))
+    dispatcher.start()
+    results = [dispatcher.enqueue({"event_type": "x", "event_seq": i}) for i in range(3)]
+    await dispatcher.stop()
+
+    assert results == [True, True, False]
+    assert dispatcher.metrics()["dropped_events"] == 1
+    assert len(received) == 1
+
+
+@pytest.mark.asyncio
+async def test_completion_writes_outbox_and_marks_delivered(
+    client, db_session, webhook_settings, monkeypatch
+):
+    """Die Completion schreibt die Outbox-Zeile mit; nach Zustellung ist sie markiert."""
+    from sqlalchemy import select
+
+    from app.models.completion import WebhookOutbox
+    from app.models.task import TaskInstance
+    from app.services import webhook_service
+    from tests.conftest import TestSession
+
+    received = []
+    dispatcher = webhook_service.WebhookDispatcher(transport=_webhook_transport(received))
+    monkeypatch.setattr(webhook_service, "webhook_dispatcher", dispatcher)
+    dispatcher.start(TestSession)
+    event_bus.add_listener(webhook_service.forward_event)
+
+    room = (await client.post("/api/rooms", headers=HEADERS, json={"name": "Bad"})).json()
+    user = (await client.post("/api/users", headers=HEADERS, json={"username": "ob"})).json()
+    task = (await client.post(
+        "/api/tasks", headers=HEADERS, json={"title": "Putzen", "room_id": room["id"]}
+    )).json()
+    instance = TaskInstance(task_id=task["id"], due_date=date.today(), status="pending")
+    db_session.add(instance)
+    await db_session.commit()
+    try:
+        resp = await client.post(
+            f"/api/instances/{instance.id}/complete", headers=HEADERS, json={"user_id": user["id"]}
+        )
+        assert resp.status_code == 200
+    finally:
+        event_bus.remove_listener(webhook_service.forward_event)
+        await dispatcher.stop()
+
+    rows = (await db_session.execute(
+        select(WebhookOutbox).where(WebhookOutbox.event_type == "task_completed")
+    )).scalars().all()
+    assert len(rows) == 1
+    assert rows[0].payload["instance_id"] == instance.id
+    assert rows[0].delivered_at is not None
+    assert rows[0].attempts == 1
+    assert any(body.get("instance_id") == instance.id for _, body in received)
+    assert dispatcher.metrics()["latency_max_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_outbox_sweep_redelivers_and_purge(client, db_session, webhook_settings):
+    """Unzugestellte Events liefert der Sweep nach; zugestellte räumt der Purge ab."""
+    from datetime import datetime, timedelta
+
+    from app.models.completion import WebhookOutbox
+    from app.services.webhook_service import WebhookDispatcher, purge_webhook_outbox
+    from tests.conftest import TestSession
+
+    old = datetime.utcnow() - timedelta(minutes=5)
+    db_session.add_all([
+        WebhookOutbox(event_type="task_skipped", payload={"instance_id": 3}, created_at=old),
+        WebhookOutbox(
+            event_type="task_skipped", payload={"instance_id": 4},
+            created_at=old - timedelta(days=2), delivered_at=old - timedelta(days=2),
+        ),
+    ])
+    await db_session.commit()
+
+    resp = await client.get("/api/webhooks/status", headers=HEADERS)
+    assert resp.json()["outbox_backlog"] == 1
+
+    received = []
+    dispatcher = WebhookDispatcher(transport=_webhook_transport(received))
+    dispatcher.start(TestSession)
+    assert await dispatcher.sweep() == 1
+    # Schon eingereiht: ein zweiter Sweep liefert nicht doppelt
+    assert await dispatcher.sweep() == 0
+    await dispatcher.stop()
+
+    assert received[0][1] == {"instance_id": 3, "event_type": "task_skipped", "redelivered": True}
+    assert dispatcher.metrics()["redelivered_events"] == 1
+    resp = await client.get("/api/webhooks/status", headers=HEADERS)
+    assert resp.json()["outbox_backlog"] == 0
+
+    delivered, expired = await purge_webhook_outbox(db_session)
+    await db_session.commit()
+    assert (delivered, expired) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_outbox_keeps_failed_events(db_session, webhook_settings, monkeypatch):
+    """Schlägt die Zustellung fehl, bleibt die Zeile unzugestellt mit Versuchszähler."""
+    import httpx
+
+    from app.models.completion import WebhookOutbox
+    from app.services.webhook_service import WebhookDispatcher
+    from tests.conftest import TestSession
+
+    monkeypatch.setattr(webhook_settings, "webhook_max_retries", 0)
+    row = WebhookOutbox(event_type="task_skipped", payload={"instance_id": 5})
+    db_session.add(row)
+    await db_session.commit()
+
+    dispatcher = WebhookDispatcher(transport=httpx.MockTransport(lambda r: httpx.Response(503)))
+    dispatcher.start(TestSession)
+    dispatcher.enqueue({"event_type": "task_skipped", "instance_id": 5}, row.id)
+    await dispatcher.stop()
+
+    await db_session.refresh(row)
+    assert row.delivered_at is None
+    assert row.attempts == 1
+    assert row.last_attempt_at is not None
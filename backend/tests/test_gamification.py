@@ -61,3 +61,179 @@ async def test_achievement_progress(client):
     resp = await client.get(f"/api/achievements/{user_id}/progress", headers=HEADERS)
     assert resp.status_code == 200
     assert isinstance(resp.json(), list)
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_etag(client):
+    """Leaderboards liefern 304 bei unverändertem Datenstand."""
+    await client.post("/api/users", headers=HEADERS, json={"username": "etaguser"})
+    for path in ("/api/leaderboard", "/api/leaderboard/weekly"):
+        first = await client.get(path, headers=HEADERS)
+        resp = await client.get(path, headers={**HEADERS, "If-None-Match": first.headers["ETag"]})
+        assert resp.status_code == 304
+
+
+async def _seed_completions(db_session, room_counts: dict[str, int]):
+    """Legt einen User mit erledigten Instanzen je Raum an."""
+    from datetime import date, timedelta
+
+    from app.models.completion import TaskCompletion
+    from app.models.room import Room
+    from app.models.task import Task, TaskInstance
+    from app.models.user import User
+    from app.services.stats_service import rebuild_user_daily_stats
+
+    user = User(username="sammler", display_name="Sammler", current_streak=3)
+    db_session.add(user)
+    await db_session.flush()
+    rooms = {}
+    for name, count in room_counts.items():
+        room = Room(name=name)
+        db_session.add(room)
+        await db_session.flush()
+        rooms[name] = room.id
+        task = Task(title=f"Task {name}", room_id=room.id)
+        db_session.add(task)
+        await db_session.flush()
+        for i in range(count):
+            instance = TaskInstance(
+                task_id=task.id, due_date=date.today() - timedelta(days=i), status="completed"
+            )
+            db_session.add(instance)
+            await db_session.flush()
+            db_session.add(TaskCompletion(
+                task_instance_id=instance.id, user_id=user.id, points_earned=10
+            ))
+    await rebuild_user_daily_stats(db_session)
+    return user, rooms
+
+
+@pytest.mark.asyncio
+async def test_achievements_unlocked_from_counter_snapshot(db_session):
+    """Alle Kriterien-Typen werden gegen den Zähler-Snapshot geprüft."""
+    from app.models.completion import Achievement
+    from app.services.achievement_service import check_and_unlock_achievements
+
+    user, rooms = await _seed_completions(db_session, {"Küche": 3, "Bad": 1})
+    db_session.add_all([
+        Achievement(name="Gesamt 4", criteria={"type": "total_tasks", "value": 4}),
+        Achievement(name="Gesamt 5", criteria={"type": "total_tasks", "value": 5}),
+        Achievement(name="Küche 3", criteria={"type": "room_tasks", "value": 3, "room_id": rooms["Küche"]}),
+        Achievement(name="Bad 2", criteria={"type": "room_tasks", "value": 2, "room_id": rooms["Bad"]}),
+        Achievement(name="Irgendein Raum 3", criteria={"type": "room_tasks", "value": 3}),
+        Achievement(name="Streak 3", criteria={"type": "streak", "value": 3}),
+        Achievement(name="Unbekannt", criteria={"type": "mystery", "value": 0}),
+    ])
+    await db_session.flush()
+
+    unlocked = await check_and_unlock_achievements(db_session, user)
+    assert {a.name for a in unlocked} == {"Gesamt 4", "Küche 3", "Irgendein Raum 3", "Streak 3"}
+    assert user.total_points == 4 * 50
+
+    await db_session.flush()
+    assert await check_and_unlock_achievements(db_session, user) == []
+
+
+@pytest.mark.asyncio
+async def test_achievement_check_query_count_constant(db_session, statement_counter):
+    """Die Anzahl der Abfragen hängt nicht von der Zahl der Achievements ab."""
+    from app.models.completion import Achievement
+    from app.services.achievement_service import check_and_unlock_achievements
+
+    user, _ = await _seed_completions(db_session, {"Küche": 2})
+
+    async def count_selects(n_achievements: int) -> int:
+        db_session.add_all([
+            Achievement(name=f"A{i}", criteria={"type": kind, "value": 1000})
+            for i in range(n_achievements)
+            for kind in ("total_tasks", "room_tasks", "streak", "weekly_winner")
+        ])
+        await db_session.flush()
+        statement_counter.clear()
+        await check_and_unlock_achievements(db_session, user)
+        return len([s for s in statement_counter if s.lstrip().upper().startswith("SELECT")])
+
+    assert await count_selects(1) == await count_selects(25) == 4
+
+
+def test_ranked_scores():
+    """Rangliste: gleiche Punkte teilen sich den Platz, Updates verschieben Einträge."""
+    from app.services.leaderboard_service import RankedScores
+
+    ranked = RankedScores({1: 30, 2: 50, 3: 30})
+    assert ranked.top(0, 10) == [(1, 2, 50), (2, 1, 30), (2, 3, 30)]
+    assert ranked.rank(3) == 2
+
+    ranked.add(3, 25)
+    ranked.add(4, 5)
+    assert ranked.rank(3) == 1
+    assert ranked.rank(2) == 2
+    assert ranked.top(1, 2) == [(2, 2, 50), (3, 1, 30)]
+
+    ranked.discard(2)
+    assert ranked.rank(2) is None
+    assert [user_id for _, user_id, _ in ranked.top(0, 10)] == [3, 1, 4]
+
+
+@pytest.mark.asyncio
+async def test_window_leaderboard(client, db_session):
+    """Zeitfenster-Leaderboard aus dem Index, inkrementell per Completion-Event."""
+    from datetime import date, timedelta
+
+    from app.models.completion import UserDailyStats
+    from app.models.task import TaskInstance
+    from app.services.event_bus import event_bus
+    from app.services.leaderboard_service import apply_event
+    from app.services.stats_service import rollup_today
+
+    today = rollup_today()
+    anna = (await client.post("/api/users", headers=HEADERS, json={"username": "anna"})).json()["id"]
+    ben = (await client.post("/api/users", headers=HEADERS, json={"username": "ben"})).json()["id"]
+    room_id = (await client.post("/api/rooms", headers=HEADERS, json={"name": "Küche"})).json()["id"]
+    db_session.add_all([
+        UserDailyStats(user_id=anna, day=today, room_id=room_id, completions=1, points=10),
+        UserDailyStats(user_id=ben, day=today - timedelta(days=10), room_id=room_id, completions=3, points=40),
+        UserDailyStats(user_id=anna, day=today - timedelta(days=45), room_id=room_id, completions=9, points=90),
+    ])
+    await db_session.commit()
+
+    resp = await client.get("/api/leaderboard/window/today", headers=HEADERS)
+    data = resp.json()
+    assert data["start_date"] == data["end_date"] == today.isoformat()
+    assert [(e["username"], e["points"]) for e in data["entries"]] == [("anna", 10)]
+
+    resp = await client.get("/api/leaderboard/window/rolling_30d", headers=HEADERS)
+    assert [(e["rank"], e["username"]) for e in resp.json()["entries"]] == [(1, "ben"), (2, "anna")]
+
+    resp = await client.get(
+        "/api/leaderboard/window/range",
+        headers=HEADERS,
+        params={"start": (today - timedelta(days=60)).isoformat(), "end": today.isoformat(), "limit": 1},
+    )
+    data = resp.json()
+    assert data["total"] == 2
+    assert [(e["username"], e["points"]) for e in data["entries"]] == [("anna", 100)]
+
+    resp = await client.get("/api/leaderboard/window/range", headers=HEADERS)
+    assert resp.status_code == 422
+
+    # Completion wird über den Event-Listener ohne Neuaufbau eingerechnet
+    task = (await client.post("/api/tasks", headers=HEADERS, json={"title": "Spülen", "room_id": room_id})).json()
+    instance = TaskInstance(task_id=task["id"], due_date=today, status="pending")
+    db_session.add(instance)
+    await db_session.commit()
+    event_bus.add_listener(apply_event)
+    try:
+        resp = await client.post(
+            f"/api/instances/{instance.id}/complete", headers=HEADERS, json={"user_id": ben}
+        )
+        points = resp.json()["completion"]["points_earned"]
+    finally:
+        event_bus.remove_listener(apply_event)
+
+    resp = await client.get(f"/api/leaderboard/window/rolling_30d/users/{ben}", headers=HEADERS)
+    assert resp.json()["rank"] == 1
+    assert resp.json()["points"] == 40 + points
+    resp = await client.get(f"/api/leaderboard/window/today/users/{ben}", headers=HEADERS)
+    assert resp.json()["points"] == points
+    assert resp.json()["total"] == 2
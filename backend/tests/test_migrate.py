@@ -0,0 +1,103 @@
+"""Tests für den Schema-Abgleich beim Start."""
+
+import pytest
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+from app.migrate import SchemaOutdatedError, alembic_config, ensure_schema
+
+
+def test_new_database_is_created_and_stamped(tmp_path):
+    """Eine leere Datenbank wird angelegt und auf head gestempelt."""
+    from alembic.script import ScriptDirectory
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    with engine.begin() as conn:
+        ensure_schema(conn)
+    with engine.connect() as conn:
+        assert inspect(conn).has_table("users")
+        head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+        assert MigrationContext.configure(conn).get_current_revision() == head
+        # Zweiter Start: nichts zu tun
+        ensure_schema(conn)
+
+
+def test_outdated_database_refuses_start(tmp_path):
+    """Bestehende Tabellen ohne (aktuelle) Revision brechen den Start ab."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+    with engine.begin() as conn, pytest.raises(SchemaOutdatedError, match="app.migrate"):
+        ensure_schema(conn)
+
+
+def test_index_migration_deduplicates_instances(tmp_path, monkeypatch):
+    """Doppelte Instanzen: es bleibt eine pro Task und Tag, bevorzugt die mit Completion."""
+    from datetime import date
+
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy.orm import Session
+
+    from app.config import settings
+    from app.database import Base
+    from app.migrate import BACKEND_DIR
+    from app.models import Room, Task, TaskCompletion, TaskInstance, User
+
+    db_path = tmp_path / "legacy.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_task_instances_task_id_due_date"))
+
+    day = date(2026, 1, 5)
+    with Session(engine) as session:
+        user = User(username="dup")
+        room = Room(name="Bad")
+        session.add_all([user, room])
+        session.flush()
+        tasks = [Task(title=f"T{i}", room_id=room.id) for i in range(3)]
+        session.add_all(tasks)
+        session.flush()
+
+        def instance(task, status):
+            inst = TaskInstance(task_id=task.id, due_date=day, status=status)
+            session.add(inst)
+            session.flush()
+            return inst
+
+        def complete(inst):
+            session.add(TaskCompletion(task_instance_id=inst.id, user_id=user.id, points_earned=10))
+
+        # Niedrige ID offen, höhere erledigt
+        pending_first = instance(tasks[0], "pending")
+        completed_second = instance(tasks[0], "completed")
+        complete(completed_second)
+        # Beide erledigt
+        both_first = instance(tasks[1], "completed")
+        both_second = instance(tasks[1], "completed")
+        complete(both_first)
+        complete(both_second)
+        # Beide offen
+        open_first = instance(tasks[2], "pending")
+        instance(tasks[2], "pending")
+        session.commit()
+        expected = {completed_second.id, both_first.id, open_first.id}
+        expected_targets = sorted([completed_second.id, both_first.id, both_first.id])
+        dropped = pending_first.id
+
+    monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{db_path}")
+    config = Config()  # ohne alembic.ini: kein fileConfig, Logging der Tests bleibt
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.upgrade(config, "3f9a2c1d7b10")
+
+    with engine.connect() as conn:
+        ids = set(conn.execute(text("SELECT id FROM task_instances")).scalars())
+        completion_targets = sorted(
+            conn.execute(text("SELECT task_instance_id FROM task_completions")).scalars()
+        )
+        indexes = {i["name"] for i in inspect(conn).get_indexes("task_instances")}
+    assert ids == expected
+    assert dropped not in ids
+    assert completion_targets == expected_targets
+    assert "uq_task_instances_task_id_due_date" in indexes
@@ -91,3 +91,147 @@ async def test_sync_rooms(client):
     assert len(data2["created"]) == 0
     assert len(data2["updated"]) == 1
     assert data2["updated"][0]["name"] == "Küche NEU"
+
+
+async def _progress(client, room_id):
+    resp = await client.get("/api/rooms/progress", headers=HEADERS)
+    assert resp.status_code == 200
+    return next(p for p in resp.json() if p["room_id"] == room_id)
+
+
+@pytest.mark.asyncio
+async def test_room_progress_tracks_instances(client):
+    """Tageszähler folgen Generierung, Completion, Skip und Task-Änderungen."""
+    from datetime import date
+
+    room = (await client.post("/api/rooms", headers=HEADERS, json={"name": "Küche"})).json()
+    other = (await client.post("/api/rooms", headers=HEADERS, json={"name": "Bad"})).json()
+    user = (await client.post("/api/users", headers=HEADERS, json={"username": "prog"})).json()
+    tasks = [
+        (await client.post(
+            "/api/tasks", headers=HEADERS,
+            json={"title": f"Task {i}", "room_id": room["id"], "recurrence": "daily"},
+        )).json()
+        for i in range(3)
+    ]
+    await client.post(
+        "/api/instances/generate", headers=HEADERS, json={"start_date": date.today().isoformat()}
+    )
+    progress = await _progress(client, room["id"])
+    assert (progress["total"], progress["completed"], progress["pending"]) == (3, 0, 3)
+
+    instances = (await client.get("/api/instances/today", headers=HEADERS)).json()
+    by_task = {i["task_id"]: i["id"] for i in instances}
+    await client.post(
+        f"/api/instances/{by_task[tasks[0]['id']]}/complete", headers=HEADERS,
+        json={"user_id": user["id"]},
+    )
+    await client.post(f"/api/instances/{by_task[tasks[1]['id']]}/skip", headers=HEADERS)
+    progress = await _progress(client, room["id"])
+    assert (progress["completed"], progress["skipped"], progress["pending"]) == (1, 1, 1)
+
+    # Task in anderen Raum verschieben: Zähler beider Räume werden neu aufgebaut
+    await client.patch(f"/api/tasks/{tasks[2]['id']}", headers=HEADERS, json={"room_id": other["id"]})
+    assert (await _progress(client, room["id"]))["total"] == 2
+    assert (await _progress(client, other["id"]))["total"] == 1
+
+    await client.delete(f"/api/tasks/{tasks[1]['id']}", headers=HEADERS)
+    progress = await _progress(client, room["id"])
+    assert (progress["total"], progress["completed"], progress["skipped"]) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_room_progress_completion_bonus_from_counter(client):
+    """Der Raum-Bonus greift, sobald der Tageszähler komplett ist."""
+    from datetime import date
+
+    room = (await client.post("/api/rooms", headers=HEADERS, json={"name": "Flur"})).json()
+    user = (await client.post("/api/users", headers=HEADERS, json={"username": "bonus"})).json()
+    for i in range(2):
+        await client.post(
+            "/api/tasks", headers=HEADERS,
+            json={"title": f"Flur {i}", "room_id": room["id"], "recurrence": "daily"},
+        )
+    await client.post(
+        "/api/instances/generate", headers=HEADERS, json={"start_date": date.today().isoformat()}
+    )
+    instances = (await client.get("/api/instances/today", headers=HEADERS)).json()
+
+    bonuses = []
+    for inst in instances:
+        resp = await client.post(
+            f"/api/instances/{inst['id']}/complete", headers=HEADERS, json={"user_id": user["id"]}
+        )
+        bonuses.append(resp.json()["bonus_breakdown"]["room_completion_bonus"])
+    assert bonuses == [0.0, 0.5]
+    assert (await _progress(client, room["id"]))["is_complete"] is True
+
+
+@pytest.mark.asyncio
+async def test_room_sync_full_and_delta(client):
+    """Voller Sync legt Räume an; ein Delta benennt um und meldet entfernte Areas."""
+    await client.post("/api/rooms", headers=HEADERS, json={"name": "Küche"})
+    resp = await client.post("/api/rooms/sync", headers=HEADERS, json={"areas": [
+        {"area_id": "kitchen", "name": "Küche"},
+        {"area_id": "bath", "name": "Bad"},
+    ]})
+    data = resp.json()
+    assert [r["name"] for r in data["created"]] == ["Bad"]
+    assert data["created"][0]["point_multiplier"] == 1.0
+    assert [r["ha_area_id"] for r in data["updated"]] == ["kitchen"]
+    # Verknüpfung nur über den Namen wird gemeldet
+    assert len(data["warnings"]) == 1 and "kitchen" in data["warnings"][0]
+
+    resp = await client.post("/api/rooms/sync", headers=HEADERS, json={
+        "areas": [{"area_id": "bath", "name": "Badezimmer"}],
+        "removed": ["kitchen"],
+        "full": False,
+    })
+    data = resp.json()
+    assert data["created"] == []
+    assert [r["name"] for r in data["updated"]] == ["Badezimmer"]
+    assert len(data["warnings"]) == 1 and "kitchen" in data["warnings"][0]
+
+
+@pytest.mark.asyncio
+async def test_room_sync_delta_removed_unlinked(client):
+    """Delta-Sync meldet entfernte Areas auch, wenn kein Raum mit ihnen verknüpft ist."""
+    await client.post("/api/rooms/sync", headers=HEADERS, json={"areas": [
+        {"area_id": "bath", "name": "Bad"},
+    ]})
+    resp = await client.post("/api/rooms/sync", headers=HEADERS, json={
+        "areas": [],
+        "removed": ["bath", "garage"],
+        "full": False,
+    })
+    warnings = resp.json()["warnings"]
+    assert len(warnings) == 2
+    assert "'Bad'" in warnings[0] and "bath" in warnings[0]
+    assert warnings[1] == "Entfernte HA-Area garage ist mit keinem Raum verknüpft."
+
+
+@pytest.mark.asyncio
+async def test_room_sync_renamed_area(client):
+    """Umbenannte Area folgt der ha_area_id — auch wenn ein Raum den alten Namen trägt."""
+    await client.post("/api/rooms/sync", headers=HEADERS, json={"areas": [
+        {"area_id": "kitchen", "name": "Küche"},
+    ]})
+    resp = await client.post("/api/rooms/sync", headers=HEADERS, json={"areas": [
+        {"area_id": "kitchen", "name": "Wohnküche"},
+    ]})
+    data = resp.json()
+    assert data["created"] == []
+    assert [(r["ha_area_id"], r["name"]) for r in data["updated"]] == [("kitchen", "Wohnküche")]
+    assert data["warnings"] == []
+
+    # Neue Area mit dem Namen eines verknüpften Raums: Umhängen nur über den
+    # Namen wird gemeldet, die alte Area gilt nicht als gelöscht
+    resp = await client.post("/api/rooms/sync", headers=HEADERS, json={"areas": [
+        {"area_id": "kitchen_2", "name": "Wohnküche"},
+    ]})
+    data = resp.json()
+    assert [r["ha_area_id"] for r in data["updated"]] == ["kitchen_2"]
+    assert data["warnings"] == [
+        "Raum 'Wohnküche' nur über den Namen mit HA-Area verknüpft "
+        "(ha_area_id=kitchen_2, bisher kitchen). Bitte prüfen."
+    ]
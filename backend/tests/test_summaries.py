@@ -21,12 +21,219 @@ async def test_latest_summary_not_found(client):
 
 @pytest.mark.asyncio
 async def test_generate_summary_without_claude_key(client):
-    """Zusammenfassung ohne Claude-Key nutzt Fallback-Text."""
+    """Generierung läuft als Job; ohne Claude-Key mit Fallback-Text."""
+    from app.services.summary_job_service import summary_jobs
+
     resp = await client.post("/api/summaries/generate", headers=HEADERS)
+    assert resp.status_code == 202
+    job = resp.json()
+    assert job["status"] in ("queued", "running")
+    assert job["summary"] is None
+
+    await summary_jobs.wait(summary_jobs.get(job["job_id"]))
+    resp = await client.get(f"/api/summaries/jobs/{job['job_id']}", headers=HEADERS)
     assert resp.status_code == 200
     data = resp.json()
-    assert "summary" in data
-    assert "tokens_used" in data
+    assert data["status"] == "done"
     assert data["tokens_used"] == 0
     assert "Wochen-Zusammenfassung" in data["summary"]["summary_text"]
     assert "Claude API-Key" in data["summary"]["summary_text"]
+
+    resp = await client.get("/api/summaries/latest", headers=HEADERS)
+    assert resp.json()["id"] == data["summary"]["id"]
+
+
+@pytest.mark.asyncio
+async def test_generate_summary_deduplicates_week(client):
+    """Anfragen für dieselbe Woche teilen sich den aktiven Job."""
+    from datetime import date
+
+    from app.services.summary_job_service import summary_jobs
+    from tests.conftest import TestSession
+
+    first = summary_jobs.submit(TestSession, date(2026, 10, 12))
+    second = summary_jobs.submit(TestSession, date(2026, 10, 12))
+    other = summary_jobs.submit(TestSession, date(2026, 10, 5))
+    assert second is first
+    assert other is not first
+
+    for job in (first, other):
+        assert (await summary_jobs.wait(job)).status == "done"
+    resp = await client.get("/api/summaries", headers=HEADERS)
+    assert [s["week_start"] for s in resp.json()] == ["2026-10-12", "2026-10-05"]
+
+    # Abgeschlossene Jobs werden nicht wiederverwendet
+    assert summary_jobs.submit(TestSession, date(2026, 10, 12)) is not first
+    await summary_jobs.wait(summary_jobs.submit(TestSession, date(2026, 10, 12)))
+
+
+@pytest.mark.asyncio
+async def test_summary_job_not_found(client):
+    resp = await client.get("/api/summaries/jobs/unbekannt", headers=HEADERS)
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_gather_weekly_stats_constant_queries(client, db_session, statement_counter):
+    """Wochenstatistik aus Rollup und Tageszählern mit fester Anzahl Abfragen."""
+    from datetime import date, timedelta
+
+    from app.models.task import TaskInstance
+    from app.services.claude_service import gather_weekly_stats, week_bounds
+    from app.services.progress_service import rebuild_room_progress
+
+    user_ids = [
+        (await client.post("/api/users", headers=HEADERS, json={"username": name})).json()["id"]
+        for name in ("anna", "ben", "carla")
+    ]
+    instance_ids = []
+    for room_name in ("Küche", "Bad"):
+        room_id = (await client.post("/api/rooms", headers=HEADERS, json={"name": room_name})).json()["id"]
+        for i in range(2):
+            task = (await client.post(
+                "/api/tasks", headers=HEADERS, json={"title": f"{room_name} {i}", "room_id": room_id}
+            )).json()
+            instance = TaskInstance(task_id=task["id"], due_date=date.today(), status="pending")
+            db_session.add(instance)
+            await db_session.flush()
+            instance_ids.append(instance.id)
+    await rebuild_room_progress(db_session)
+    await db_session.commit()
+
+    await client.post(f"/api/instances/{instance_ids[0]}/complete", headers=HEADERS, json={"user_id": user_ids[0]})
+    await client.post(f"/api/instances/{instance_ids[2]}/complete", headers=HEADERS, json={"user_id": user_ids[1]})
+    await client.post(f"/api/instances/{instance_ids[3]}/skip", headers=HEADERS)
+
+    week_start, week_end = week_bounds()
+    statement_counter.clear()
+    stats = await gather_weekly_stats(db_session, week_start, week_end)
+    assert len(statement_counter) == 3
+
+    assert [(u["name"], u["completions"]) for u in stats["users"]] == [("Anna", 1), ("Ben", 1), ("Carla", 0)]
+    rooms = {r["name"]: r for r in stats["rooms"]}
+    assert rooms["Küche"] == {"name": "Küche", "completed": 1, "pending": 1, "skipped": 0}
+    assert rooms["Bad"] == {"name": "Bad", "completed": 1, "pending": 0, "skipped": 1}
+    assert stats["total_tasks"] == 4
+    assert stats["completed_tasks"] == 2
+    assert stats["completion_rate_percent"] == 50.0
+
+    # Ein längerer Zeitraum kostet dieselben Abfragen
+    statement_counter.clear()
+    await gather_weekly_stats(db_session, week_start - timedelta(days=365), week_end)
+    assert len(statement_counter) == 3
+
+
+class _FakeMessages:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        from types import SimpleNamespace
+
+        self.calls += 1
+        text = '{"summary_text": "Starke Woche!", "suggested_tasks": []}'
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=text)],
+            usage=SimpleNamespace(input_tokens=120, output_tokens=30),
+        )
+
+
+@pytest.mark.asyncio
+async def test_claude_response_cache(client, monkeypatch):
+    """Gleiche Statistik wird kein zweites Mal an Claude geschickt."""
+    from types import SimpleNamespace
+
+    from app.config import settings
+    from app.services import claude_service
+    from app.services.claude_service import generate_weekly_summary
+    from tests.conftest import TestSession
+
+    messages = _FakeMessages()
+    monkeypatch.setattr(settings, "claude_api_key", "test")
+    monkeypatch.setattr(claude_service, "get_claude_client", lambda: SimpleNamespace(messages=messages))
+
+    summary, tokens_used = await generate_weekly_summary(TestSession)
+    assert summary.summary_text == "Starke Woche!"
+    assert tokens_used == 150
+
+    summary, tokens_used = await generate_weekly_summary(TestSession)
+    assert summary.summary_text == "Starke Woche!"
+    assert tokens_used == 0
+    assert messages.calls == 1
+
+    resp = await client.get("/api/summaries/claude-usage", headers=HEADERS)
+    data = resp.json()
+    assert data["entries"] == 1
+    assert data["total_hits"] == 1
+    assert data["total_tokens_saved"] == 150
+    assert data["requests"] == 2
+    assert data["hit_rate"] == 0.5
+    assert data["input_tokens"] == 120
+
+
+@pytest.mark.asyncio
+async def test_claude_cache_eviction(db_session, monkeypatch):
+    """Abgelaufene und überzählige Einträge werden beim Speichern entfernt."""
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import select
+
+    from app.config import settings
+    from app.models.completion import ClaudeResponseCache
+    from app.services.claude_cache_service import lookup_cached_response, store_cached_response
+    from tests.conftest import TestSession
+
+    monkeypatch.setattr(settings, "claude_cache_max_entries", 2)
+    db_session.add(ClaudeResponseCache(
+        cache_key="alt", model="m", response_text="x",
+        created_at=datetime.utcnow() - timedelta(hours=settings.claude_cache_ttl_hours + 1),
+    ))
+    await db_session.commit()
+    assert await lookup_cached_response(TestSession, "alt") is None
+
+    for key in ("a", "b", "c"):
+        await store_cached_response(TestSession, key, "m", key, 10, 5)
+
+    result = await db_session.execute(select(ClaudeResponseCache.cache_key))
+    assert set(result.scalars().all()) == {"b", "c"}
+
+
+def test_compact_stats_within_budget():
+    """Große Haushalte: Nullzeilen fallen weg, Top-N wird bis zum Budget gekürzt."""
+    import json
+
+    from app.services.claude_service import compact_stats, estimate_tokens
+
+    stats = {
+        "week_start": "2026-10-12",
+        "week_end": "2026-10-18",
+        "users": [
+            {"name": f"User {i}", "completions": i % 5, "points_earned": (i % 5) * 10,
+             "current_streak": 0, "weekly_points": (i % 5) * 10}
+            for i in range(60)
+        ],
+        "rooms": [
+            {"name": f"Raum {i}", "completed": i % 3, "pending": i % 4, "skipped": 0}
+            for i in range(80)
+        ],
+        "achievements_unlocked": [{"achievement": "Fleißig", "user": "User 4"}] * 30,
+        "total_tasks": 500,
+        "completed_tasks": 300,
+        "completion_rate_percent": 60.0,
+    }
+    verbose = json.dumps(stats, ensure_ascii=False)
+
+    text = compact_stats(stats, token_budget=300, top_n=20)
+    payload = json.loads(text)
+    assert estimate_tokens(text) <= 300
+    assert estimate_tokens(text) < estimate_tokens(verbose) / 5
+    assert payload["users"]["cols"][0] == "name"
+    # Top-User nach Punkten, Räume mit den meisten offenen Aufgaben zuerst
+    assert all(row[2] == 40 for row in payload["users"]["rows"])
+    assert payload["rooms"]["rows"][0][2] == 3
+    n = len(payload["users"]["rows"])
+    assert payload["omitted"]["users"] == 60 - n
+    assert payload["omitted"]["achievements"] == 30 - len(payload["achievements"]["rows"])
+
+    small = compact_stats({**stats, "users": stats["users"][:3], "rooms": [], "achievements_unlocked": []}, 300, 20)
+    assert json.loads(small)["omitted"] == {"users": 1, "rooms": 0, "achievements": 0}
@@ -96,6 +96,89 @@ async def test_instances_today(client, db_session):
     assert data[0]["status"] == "pending"
 
 
+@pytest.mark.asyncio
+async def test_list_instances_keyset_pagination(client, db_session):
+    """Instanz-Liste seitenweise per Cursor, gefiltert auf einen Datumsbereich."""
+    from datetime import timedelta
+
+    from app.models.task import TaskInstance
+
+    room_id = await _create_room(client)
+    tasks = [await _create_task(client, room_id, title=f"Task {i}") for i in range(2)]
+    today = date.today()
+    for offset in range(5):
+        for task in tasks:
+            db_session.add(TaskInstance(
+                task_id=task["id"], due_date=today - timedelta(days=offset), status="completed"
+            ))
+    # Ohne Fälligkeit: kommen ans Ende der ungefilterten Liste
+    db_session.add_all([TaskInstance(task_id=tasks[0]["id"], due_date=None) for _ in range(3)])
+    await db_session.commit()
+
+    params = {"start_date": (today - timedelta(days=3)).isoformat(), "limit": 3}
+    seen = []
+    while True:
+        resp = await client.get("/api/instances", headers=HEADERS, params=params)
+        assert resp.status_code == 200
+        seen.extend((i["due_date"], i["id"]) for i in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["after"] = cursor
+
+    assert len(seen) == 8
+    assert seen == sorted(seen)
+    assert seen[0][0] == (today - timedelta(days=3)).isoformat()
+
+    params = {"limit": 4}
+    seen = []
+    while True:
+        resp = await client.get("/api/instances", headers=HEADERS, params=params)
+        seen.extend((i["due_date"], i["id"]) for i in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["after"] = cursor
+    assert len(seen) == 13
+    assert len(set(seen)) == 13
+    assert [due for due, _ in seen[-3:]] == [None, None, None]
+    assert seen[:10] == sorted(seen[:10])
+
+    resp = await client.get("/api/instances", headers=HEADERS, params={"after": "gestern"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_next_cursor_exposed_to_browsers(client):
+    """Browser anderer Origins dürfen X-Next-Cursor und ETag lesen (CORS)."""
+    resp = await client.get(
+        "/api/instances", headers={**HEADERS, "Origin": "http://frontend.local"}
+    )
+    exposed = resp.headers["access-control-expose-headers"].lower()
+    assert "x-next-cursor" in exposed
+    assert "etag" in exposed
+
+
+@pytest.mark.asyncio
+async def test_list_instances_ndjson_stream(client, db_session):
+    """Mit Accept: application/x-ndjson kommt eine JSON-Zeile pro Instanz."""
+    import json
+
+    room_id = await _create_room(client)
+    task = await _create_task(client, room_id)
+    instance_id = await _create_instance(client, task["id"], db_session)
+    await db_session.commit()
+
+    resp = await client.get(
+        "/api/instances", headers={**HEADERS, "Accept": "application/x-ndjson"}
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row["id"] for row in rows] == [instance_id]
+    assert rows[0]["task"]["title"] == "Spülen"
+
+
 @pytest.mark.asyncio
 async def test_complete_instance(client, db_session):
     """Task-Instanz abschließen mit Bonus-Breakdown."""
@@ -167,3 +250,349 @@ async def test_assign_instance(client, db_session):
     )
     assert resp.status_code == 200
     assert resp.json()["assigned_user_id"] == user_id
+
+
+@pytest.mark.asyncio
+async def test_instances_today_etag(client, db_session):
+    """Heutige Instanzen liefern 304 bis zur nächsten Änderung."""
+    room_id = await _create_room(client)
+    task = await _create_task(client, room_id)
+    instance_id = await _create_instance(client, task["id"], db_session)
+    await db_session.commit()
+
+    first = await client.get("/api/instances/today", headers=HEADERS)
+    etag = first.headers["ETag"]
+    resp = await client.get("/api/instances/today", headers={**HEADERS, "If-None-Match": etag})
+    assert resp.status_code == 304
+
+    await client.post(f"/api/instances/{instance_id}/skip", headers=HEADERS)
+    resp = await client.get("/api/instances/today", headers={**HEADERS, "If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()[0]["status"] == "skipped"
+
+
+@pytest.mark.asyncio
+async def test_generate_instances_recurrence_rules(client, db_session):
+    """Generierung beachtet daily/weekly/monthly/once und inaktive Tasks."""
+    from sqlalchemy import select
+
+    from app.models.task import TaskInstance
+    from app.services.task_service import generate_task_instances_for_date
+
+    target = date.today()
+    room_id = await _create_room(client)
+    daily = await _create_task(client, room_id, "Täglich", recurrence="daily")
+    weekly = await _create_task(
+        client, room_id, "Heute", recurrence="weekly", recurrence_day=target.weekday()
+    )
+    await _create_task(
+        client, room_id, "Morgen", recurrence="weekly",
+        recurrence_day=(target.weekday() + 1) % 7,
+    )
+    monthly = await _create_task(
+        client, room_id, "Monatlich", recurrence="monthly", recurrence_day=target.day
+    )
+    once = await _create_task(client, room_id, "Einmalig", recurrence="once")
+    inactive = await _create_task(client, room_id, "Inaktiv", recurrence="daily")
+    await client.patch(f"/api/tasks/{inactive['id']}", headers=HEADERS, json={"is_active": False})
+
+    count = await generate_task_instances_for_date(db_session, target)
+    await db_session.commit()
+    assert count == 4
+
+    result = await db_session.execute(select(TaskInstance.task_id, TaskInstance.due_date))
+    rows = set(result.all())
+    assert rows == {
+        (daily["id"], target),
+        (weekly["id"], target),
+        (monthly["id"], target),
+        (once["id"], target),
+    }
+
+
+@pytest.mark.asyncio
+async def test_generate_instances_is_idempotent(client, db_session, statement_counter):
+    """Zweiter Lauf erzeugt keine Duplikate und braucht nur ein Statement."""
+    from app.services.task_service import generate_task_instances_for_date
+
+    room_id = await _create_room(client)
+    for i in range(5):
+        await _create_task(client, room_id, f"Task {i}", recurrence="daily")
+    await _create_task(client, room_id, "Einmalig", recurrence="once")
+
+    target = date.today()
+    assert await generate_task_instances_for_date(db_session, target) == 6
+    await db_session.commit()
+
+    statement_counter.clear()
+    assert await generate_task_instances_for_date(db_session, target) == 0
+    assert len(statement_counter) == 1
+
+    # Einmalige Tasks bekommen auch an anderen Tagen keine weitere Instanz
+    next_day = await generate_task_instances_for_date(db_session, date(2099, 1, 1))
+    assert next_day == 5
+
+
+@pytest.mark.asyncio
+async def test_generate_range_endpoint(client, db_session):
+    """Admin-Endpoint erzeugt Instanzen für einen Bereich in einem Durchgang."""
+    from datetime import timedelta
+
+    room_id = await _create_room(client)
+    await _create_task(client, room_id, "Täglich", recurrence="daily")
+    await _create_task(client, room_id, "Einmalig", recurrence="once")
+    today = date.today()
+
+    resp = await client.post(
+        "/api/instances/generate",
+        headers=HEADERS,
+        json={"start_date": today.isoformat(), "end_date": (today + timedelta(days=6)).isoformat()},
+    )
+    assert resp.status_code == 200
+    # 7x täglich + 1x einmalig (nur heute)
+    assert resp.json()["created"] == 8
+
+    resp = await client.post(
+        "/api/instances/generate", headers=HEADERS,
+        json={"start_date": today.isoformat(), "end_date": (today - timedelta(days=1)).isoformat()},
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_generate_future_range_creates_once_task(client, db_session):
+    """Vorausplanung: einmalige Tasks bekommen genau eine Instanz am ersten Tag."""
+    from datetime import timedelta
+
+    from sqlalchemy import select
+
+    from app.models.task import TaskInstance
+
+    room_id = await _create_room(client)
+    await _create_task(client, room_id, "Täglich", recurrence="daily")
+    once = await _create_task(client, room_id, "Einmalig", recurrence="once")
+    start = date.today() + timedelta(days=3)
+    body = {"start_date": start.isoformat(), "end_date": (start + timedelta(days=6)).isoformat()}
+
+    resp = await client.post("/api/instances/generate", headers=HEADERS, json=body)
+    assert resp.json()["created"] == 8
+    result = await db_session.execute(
+        select(TaskInstance.due_date).where(TaskInstance.task_id == once["id"])
+    )
+    assert result.scalars().all() == [start]
+
+    body = {"start_date": (start + timedelta(days=7)).isoformat(), "end_date": (start + timedelta(days=7)).isoformat()}
+    resp = await client.post("/api/instances/generate", headers=HEADERS, json=body)
+    assert resp.json()["created"] == 1
+
+
+@pytest.mark.asyncio
+async def test_backfill_skips_days_before_task_creation(client, db_session):
+    """Backfill holt verpasste Tage nach, aber nicht vor Erstellung des Tasks."""
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import select
+
+    from app.models.task import Task, TaskInstance
+    from app.services.task_service import backfill_task_instances
+
+    room_id = await _create_room(client)
+    old = await _create_task(client, room_id, "Alt", recurrence="daily")
+    new = await _create_task(client, room_id, "Neu", recurrence="daily")
+    today = date.today()
+
+    task = await db_session.get(Task, old["id"])
+    task.created_at = datetime.utcnow() - timedelta(days=30)
+    # Letzte Generierung vor 4 Tagen
+    db_session.add(TaskInstance(task_id=old["id"], due_date=today - timedelta(days=4)))
+    await db_session.commit()
+
+    start, end, count = await backfill_task_instances(
+        db_session, today, max_backfill_days=7, horizon_days=2
+    )
+    await db_session.commit()
+    assert start == today - timedelta(days=3)
+    assert end == today + timedelta(days=2)
+
+    result = await db_session.execute(
+        select(TaskInstance.task_id, TaskInstance.due_date).where(
+            TaskInstance.due_date > today - timedelta(days=4)
+        )
+    )
+    rows = result.all()
+    assert sorted(d for t, d in rows if t == old["id"]) == [
+        today + timedelta(days=n) for n in range(-3, 3)
+    ]
+    assert sorted(d for t, d in rows if t == new["id"]) == [
+        today + timedelta(days=n) for n in range(0, 3)
+    ]
+    assert count == 9
+
+
+@pytest.mark.asyncio
+async def test_update_recurrence_drops_pregenerated_instances(client, db_session):
+    """Regeländerung entfernt vorausgeplante offene Instanzen."""
+    from datetime import timedelta
+
+    from sqlalchemy import select
+
+    from app.models.task import TaskInstance
+
+    room_id = await _create_room(client)
+    task = await _create_task(client, room_id, "Täglich", recurrence="daily")
+    today = date.today()
+    await client.post(
+        "/api/instances/generate", headers=HEADERS,
+        json={"start_date": today.isoformat(), "end_date": (today + timedelta(days=3)).isoformat()},
+    )
+    await client.patch(f"/api/tasks/{task['id']}", headers=HEADERS, json={"is_active": False})
+
+    result = await db_session.execute(select(TaskInstance.due_date))
+    assert [row[0] for row in result.all()] == [today]
+
+
+@pytest.mark.asyncio
+async def test_complete_instance_unknown_user(client, db_session):
+    """Unbekannter User gibt 404 zurück, die Instanz bleibt offen."""
+    room_id = await _create_room(client)
+    task = await _create_task(client, room_id)
+    instance_id = await _create_instance(client, task["id"], db_session)
+
+    resp = await client.post(
+        f"/api/instances/{instance_id}/complete", headers=HEADERS, json={"user_id": 999}
+    )
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Benutzer nicht gefunden"
+
+
+@pytest.mark.asyncio
+async def test_complete_instance_room_completion_bonus(client, db_session):
+    """Der letzte offene Task eines Raums bekommt den Raum-Bonus."""
+    from app.models.task import TaskInstance
+
+    room_id = await _create_room(client)
+    user_id = await _create_user(client)
+    first = await _create_task(client, room_id, title="Spülen")
+    second = await _create_task(client, room_id, title="Wischen")
+    first_id = await _create_instance(client, first["id"], db_session)
+    second_id = await _create_instance(client, second["id"], db_session)
+    await db_session.commit()
+
+    resp = await client.post(
+        f"/api/instances/{first_id}/complete", headers=HEADERS, json={"user_id": user_id}
+    )
+    assert resp.json()["bonus_breakdown"]["room_completion_bonus"] == 0.0
+
+    resp = await client.post(
+        f"/api/instances/{second_id}/complete", headers=HEADERS, json={"user_id": user_id}
+    )
+    assert resp.json()["bonus_breakdown"]["room_completion_bonus"] == 0.5
+    instance = await db_session.get(TaskInstance, second_id)
+    await db_session.refresh(instance)
+    assert instance.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_complete_instance_statement_count_constant(client, db_session, statement_counter):
+    """Eine Completion braucht unabhängig von Historie und Achievements gleich viele Statements.
+
+    Ein kalter Raum-Tageszähler kostet genau einen Upsert mehr, ein
+    freigeschaltetes Achievement genau zwei (INSERT und Belohnung am User).
+    """
+    from sqlalchemy import delete
+
+    from app.models.completion import Achievement
+    from app.models.room import RoomDayProgress
+    from app.services.progress_service import rebuild_room_progress
+
+    room_id = await _create_room(client)
+    user_id = await _create_user(client)
+
+    async def complete_and_count(
+        n_achievements: int = 0, warm: bool = True, unlock: bool = False
+    ) -> int:
+        # Eigener Task pro Durchlauf: eine zweite Instanz desselben Tasks am
+        # selben Tag verbietet der Unique-Index
+        task = await _create_task(client, room_id, title=f"Task {len(statement_counter)}")
+        db_session.add_all([
+            Achievement(
+                name=f"A{task['id']}-{i}",
+                criteria={"type": "total_tasks", "value": 1 if unlock and i == 0 else 1000},
+            )
+            for i in range(n_achievements)
+        ])
+        instance_id = await _create_instance(client, task["id"], db_session)
+        # Wie nach einem Generierungslauf: Raum-Tageszähler sind vorhanden
+        await rebuild_room_progress(db_session)
+        if not warm:
+            await db_session.execute(delete(RoomDayProgress))
+        await db_session.commit()
+        statement_counter.clear()
+        resp = await client.post(
+            f"/api/instances/{instance_id}/complete", headers=HEADERS, json={"user_id": user_id}
+        )
+        assert resp.status_code == 200
+        assert len(resp.json()["unlocked_achievements"]) == int(unlock)
+        return len(statement_counter)
+
+    # Erste Completion des Users (Streak-Start), danach der Normalfall
+    await complete_and_count()
+    baseline = await complete_and_count(1)
+    assert baseline == 10
+    assert await complete_and_count(30) == baseline
+    assert await complete_and_count(warm=False) == baseline + 1
+    assert await complete_and_count(1, unlock=True) == baseline + 2
+
+
+@pytest.mark.asyncio
+async def test_complete_batch(client, db_session):
+    """Batch-Completion: Ergebnis pro Eintrag, Raum-Bonus in Reihenfolge, ein Event."""
+    from app.services.event_bus import event_bus
+
+    room_id = await _create_room(client)
+    user_id = await _create_user(client)
+    other_id = await _create_user(client, username="zweiter")
+    tasks = [await _create_task(client, room_id, title=f"Task {i}") for i in range(3)]
+    instance_ids = [await _create_instance(client, t["id"], db_session) for t in tasks]
+    await db_session.commit()
+    last_event = event_bus.last_id
+
+    resp = await client.post(
+        "/api/instances/complete-batch",
+        headers=HEADERS,
+        json={"items": [
+            {"instance_id": instance_ids[0], "user_id": user_id},
+            {"instance_id": instance_ids[1], "user_id": other_id, "notes": "nebenbei"},
+            {"instance_id": instance_ids[1], "user_id": user_id},
+            {"instance_id": 999, "user_id": user_id},
+            {"instance_id": instance_ids[2], "user_id": user_id},
+        ]},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    results = data["results"]
+    assert [r["success"] for r in results] == [True, True, False, False, True]
+    assert results[2]["error"] == "Task ist nicht mehr offen"
+    assert results[3]["error"] == "Task-Instanz nicht gefunden"
+    assert results[1]["completion"]["notes"] == "nebenbei"
+    bonuses = [r["bonus_breakdown"]["room_completion_bonus"] for r in results if r["success"]]
+    assert bonuses == [0.0, 0.0, 0.5]
+
+    users = {u["user_id"]: u for u in data["users"]}
+    assert set(users) == {user_id, other_id}
+    assert users[user_id]["streak"]["current_streak"] == 1
+    expected = results[0]["completion"]["points_earned"] + results[4]["completion"]["points_earned"]
+    assert users[user_id]["total_points"] == expected
+
+    events = event_bus.replay(f"{event_bus.epoch}-{last_event}")
+    assert [e.event_type for e in events] == ["tasks_completed"]
+    assert [c["instance_id"] for c in events[0].data["completions"]] == [
+        instance_ids[0], instance_ids[1], instance_ids[2]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_complete_batch_rejects_empty(client):
+    """Leere Batch-Anfrage wird abgelehnt."""
+    resp = await client.post("/api/instances/complete-batch", headers=HEADERS, json={"items": []})
+    assert resp.status_code == 422
@@ -95,3 +95,204 @@ async def test_user_stats(client):
     assert data["tasks_completed_total"] == 0
     assert data["tasks_completed_this_week"] == 0
     assert data["achievements_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_list_users_etag(client):
+    """User-Liste liefert 304 bis sich Daten ändern."""
+    await client.post("/api/users", headers=HEADERS, json={"username": "etag1"})
+    first = await client.get("/api/users", headers=HEADERS)
+    etag = first.headers["ETag"]
+
+    resp = await client.get("/api/users", headers={**HEADERS, "If-None-Match": etag})
+    assert resp.status_code == 304
+
+    await client.post("/api/users", headers=HEADERS, json={"username": "etag2"})
+    resp = await client.get("/api/users", headers={**HEADERS, "If-None-Match": etag})
+    assert resp.status_code == 200
+    assert len(resp.json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_streak_incremental(db_session):
+    """Streak zählt aufeinanderfolgende Tage und beginnt nach einer Lücke neu."""
+    from datetime import date, timedelta
+
+    from app.models.user import User
+    from app.services.streak_service import update_user_streak
+
+    user = User(username="streaker", display_name="Streaker")
+    db_session.add(user)
+    await db_session.flush()
+
+    day = date(2026, 3, 1)
+    assert (await update_user_streak(db_session, user, day)).current_streak == 1
+    # Zweite Completion am selben Tag ändert nichts
+    assert (await update_user_streak(db_session, user, day)).current_streak == 1
+    assert (await update_user_streak(db_session, user, day + timedelta(days=1))).current_streak == 2
+    result = await update_user_streak(db_session, user, day + timedelta(days=2))
+    assert result.current_streak == 3
+    assert result.streak_bonus_active is True
+
+    result = await update_user_streak(db_session, user, day + timedelta(days=5))
+    assert result.current_streak == 1
+    assert result.longest_streak == 3
+    assert user.last_completion_date == day + timedelta(days=5)
+
+
+@pytest.mark.asyncio
+async def test_expire_stale_streaks(db_session):
+    """Streaks ohne Completion gestern oder heute werden auf 0 gesetzt."""
+    from datetime import date, timedelta
+
+    from app.models.user import User
+    from app.services.streak_service import expire_stale_streaks
+
+    today = date(2026, 3, 10)
+    active = User(username="aktiv", current_streak=4, last_completion_date=today - timedelta(days=1))
+    stale = User(username="alt", current_streak=4, longest_streak=4, last_completion_date=today - timedelta(days=3))
+    db_session.add_all([active, stale])
+    await db_session.flush()
+
+    assert await expire_stale_streaks(db_session, today) == 1
+    await db_session.refresh(active)
+    await db_session.refresh(stale)
+    assert active.current_streak == 4
+    assert stale.current_streak == 0
+    assert stale.longest_streak == 4
+
+
+@pytest.mark.asyncio
+async def test_recompute_streaks(client, db_session):
+    """Recompute baut Streak-Zustand aus der Completion-Historie neu auf."""
+    from datetime import date, datetime, timedelta
+
+    from app.models.completion import TaskCompletion
+    from app.models.user import User
+
+    resp = await client.post("/api/users", headers=HEADERS, json={"username": "historie"})
+    user_id = resp.json()["id"]
+
+    today = date.today()
+    days = [today - timedelta(days=n) for n in (6, 5, 4, 3, 1, 0)]
+    for i, day in enumerate(days):
+        db_session.add(TaskCompletion(
+            task_instance_id=i + 1,
+            user_id=user_id,
+            completed_at=datetime.combine(day, datetime.min.time()).replace(hour=12),
+            points_earned=10,
+        ))
+    await db_session.flush()
+
+    resp = await client.post("/api/users/streaks/recompute", headers=HEADERS)
+    assert resp.status_code == 200
+    assert resp.json()["users"] == 1
+
+    user = await db_session.get(User, user_id)
+    await db_session.refresh(user)
+    assert user.current_streak == 2
+    assert user.longest_streak == 4
+    assert user.last_completion_date == today
+
+
+@pytest.mark.asyncio
+async def test_user_stats_from_rollup(client, db_session):
+    """Completions pflegen das Statistik-Rollup; Rebuild liefert dieselben Zeilen."""
+    from datetime import date
+
+    from sqlalchemy import select
+
+    from app.models.completion import UserDailyStats
+    from app.models.task import TaskInstance
+
+    user_id = (await client.post("/api/users", headers=HEADERS, json={"username": "rollup"})).json()["id"]
+    room_ids = []
+    instance_ids = []
+    for name in ("Küche", "Bad"):
+        room_id = (await client.post("/api/rooms", headers=HEADERS, json={"name": name})).json()["id"]
+        room_ids.append(room_id)
+        for i in range(2 if name == "Küche" else 1):
+            task = (await client.post(
+                "/api/tasks", headers=HEADERS, json={"title": f"{name} {i}", "room_id": room_id}
+            )).json()
+            instance = TaskInstance(task_id=task["id"], due_date=date.today(), status="pending")
+            db_session.add(instance)
+            await db_session.flush()
+            instance_ids.append(instance.id)
+    await db_session.commit()
+
+    resp = await client.post(
+        f"/api/instances/{instance_ids[0]}/complete", headers=HEADERS, json={"user_id": user_id}
+    )
+    assert resp.status_code == 200
+    resp = await client.post(
+        "/api/instances/complete-batch",
+        headers=HEADERS,
+        json={"items": [{"instance_id": i, "user_id": user_id} for i in instance_ids[1:]]},
+    )
+    assert resp.status_code == 200
+
+    resp = await client.get(f"/api/users/{user_id}/stats", headers=HEADERS)
+    data = resp.json()
+    assert data["tasks_completed_total"] == 3
+    assert data["tasks_completed_this_week"] == 3
+    assert data["favorite_room"] == "Küche"
+
+    query = select(
+        UserDailyStats.user_id, UserDailyStats.day, UserDailyStats.room_id,
+        UserDailyStats.completions, UserDailyStats.points, UserDailyStats.bonus_points,
+    ).order_by(UserDailyStats.room_id)
+    maintained = (await db_session.execute(query)).all()
+    assert [(row.room_id, row.completions) for row in maintained] == [(room_ids[0], 2), (room_ids[1], 1)]
+
+    resp = await client.post("/api/users/stats/rebuild", headers=HEADERS)
+    assert resp.status_code == 200
+    assert resp.json()["rows"] == 2
+    db_session.expire_all()
+    assert (await db_session.execute(query)).all() == maintained
+
+
+@pytest.mark.asyncio
+async def test_user_sync_delta(client, statement_counter):
+    """Delta-Sync: vergebene Usernames in einer Abfrage, Umbenennung, entfernte Personen."""
+    await client.post("/api/users", headers=HEADERS, json={"username": "lukas"})
+    await client.post("/api/users/sync", headers=HEADERS, json={
+        "persons": [{"person_id": "person.anna", "name": "Anna"}],
+    })
+
+    statement_counter.clear()
+    resp = await client.post("/api/users/sync", headers=HEADERS, json={
+        "persons": [
+            {"person_id": "person.lukas", "name": "Lukas"},
+            {"person_id": "person.mia", "name": "Mia"},
+            {"person_id": "person.anna", "name": "Anna B."},
+        ],
+        "removed": ["person.ben"],
+        "full": False,
+    })
+    data = resp.json()
+    assert sorted(u["username"] for u in data["created"]) == ["lukas_ha", "mia"]
+    assert [u["display_name"] for u in data["updated"]] == ["Anna B."]
+    # Entfernte Person ohne User wird gemeldet, nicht stillschweigend verworfen
+    assert data["warnings"] == ["Entfernte HA-Person person.ben ist mit keinem Benutzer verknüpft."]
+    selects = [s for s in statement_counter if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 2
+
+
+@pytest.mark.asyncio
+async def test_user_sync_delta_removed(client):
+    """Delta-Sync mit `removed`: verknüpfter User bleibt, wird aber gemeldet."""
+    await client.post("/api/users/sync", headers=HEADERS, json={
+        "persons": [{"person_id": "person.anna", "name": "Anna"}],
+    })
+    resp = await client.post("/api/users/sync", headers=HEADERS, json={
+        "persons": [],
+        "removed": ["person.anna"],
+        "full": False,
+    })
+    data = resp.json()
+    assert data["created"] == [] and data["updated"] == []
+    assert len(data["warnings"]) == 1
+    assert "'Anna'" in data["warnings"][0] and "person.anna" in data["warnings"][0]
+    resp = await client.get("/api/users", headers=HEADERS)
+    assert [u["ha_user_id"] for u in resp.json()] == ["person.anna"]
@@ -1,12 +1,14 @@
 import type {
 	User, UserCreate, UserUpdate, UserStats,
-	Room, RoomCreate, RoomUpdate,
+	Room, RoomCreate, RoomUpdate, RoomProgress,
 	Task, TaskCreate, TaskUpdate,
 	TaskInstanceWithDetails,
 	CompleteRequest, ExtendedCompletionResponse,
+	BatchCompleteItem, BatchCompleteResponse,
 	Achievement, UserAchievement, AchievementProgress,
+	LeaderboardWindow, LeaderboardWindowResponse, LeaderboardRankResponse,
 	DashboardResponse, HealthResponse, TaskInstance,
-	WeeklySummary, GenerateSummaryResponse
+	WeeklySummary, SummaryJob, InstancePage, InstanceListParams
 } from './types';
 
 type Fetch = typeof fetch;
@@ -21,7 +23,7 @@ class ApiError extends Error {
 export { ApiError };
 
 export function createApiClient(fetchFn: Fetch, baseUrl: string, apiKey: string) {
-	async function request<T>(method: string, path: string, body?: unknown): Promise<T> {
+	async function send(method: string, path: string, body?: unknown): Promise<Response> {
 		const res = await fetchFn(`${baseUrl}${path}`, {
 			method,
 			headers: {
@@ -39,11 +41,32 @@ export function createApiClient(fetchFn: Fetch, baseUrl: string, apiKey: string)
 			} catch { /* ignore */ }
 			throw new ApiError(res.status, detail);
 		}
+		return res;
+	}
 
+	async function request<T>(method: string, path: string, body?: unknown): Promise<T> {
+		const res = await send(method, path, body);
 		if (res.status === 204) return undefined as T;
 		return res.json();
 	}
 
+	/** Eine Seite nach (due_date, id); nextCursor als `after` für die nächste Seite. */
+	async function listInstances(params?: InstanceListParams): Promise<InstancePage> {
+		const qs = new URLSearchParams();
+		if (params?.room_id != null) qs.set('room_id', String(params.room_id));
+		if (params?.user_id != null) qs.set('user_id', String(params.user_id));
+		if (params?.status) qs.set('status', params.status);
+		if (params?.due_date) qs.set('due_date', params.due_date);
+		if (params?.start_date) qs.set('start_date', params.start_date);
+		if (params?.end_date) qs.set('end_date', params.end_date);
+		if (params?.after) qs.set('after', params.after);
+		if (params?.limit != null) qs.set('limit', String(params.limit));
+		const q = qs.toString();
+		const res = await send('GET', `/api/instances${q ? '?' + q : ''}`);
+		const items: TaskInstanceWithDetails[] = await res.json();
+		return { items, nextCursor: res.headers.get('X-Next-Cursor') };
+	}
+
 	return {
 		health: {
 			check: () => request<HealthResponse>('GET', '/api/health')
@@ -63,6 +86,8 @@ export function createApiClient(fetchFn: Fetch, baseUrl: string, apiKey: string)
 
 		rooms: {
 			list: () => request<Room[]>('GET', '/api/rooms'),
+			progress: (day?: string) =>
+				request<RoomProgress[]>('GET', `/api/rooms/progress${day ? `?day=${day}` : ''}`),
 			create: (data: RoomCreate) => request<Room>('POST', '/api/rooms', data),
 			update: (id: number, data: RoomUpdate) => request<Room>('PATCH', `/api/rooms/${id}`, data),
 			delete: (id: number) => request<void>('DELETE', `/api/rooms/${id}`)
@@ -83,18 +108,23 @@ export function createApiClient(fetchFn: Fetch, baseUrl: string, apiKey: string)
 		},
 
 		instances: {
-			list: (params?: { room_id?: number; user_id?: number; status?: string; due_date?: string }) => {
-				const qs = new URLSearchParams();
-				if (params?.room_id != null) qs.set('room_id', String(params.room_id));
-				if (params?.user_id != null) qs.set('user_id', String(params.user_id));
-				if (params?.status) qs.set('status', params.status);
-				if (params?.due_date) qs.set('due_date', params.due_date);
-				const q = qs.toString();
-				return request<TaskInstanceWithDetails[]>('GET', `/api/instances${q ? '?' + q : ''}`);
+			list: listInstances,
+			/** Alle Treffer: folgt nextCursor, bis der Server keine weitere Seite meldet. */
+			listAll: async (params?: Omit<InstanceListParams, 'after'>): Promise<TaskInstanceWithDetails[]> => {
+				const items: TaskInstanceWithDetails[] = [];
+				let after: string | undefined;
+				do {
+					const page = await listInstances({ ...params, after });
+					items.push(...page.items);
+					after = page.nextCursor ?? undefined;
+				} while (after);
+				return items;
 			},
 			today: () => request<TaskInstanceWithDetails[]>('GET', '/api/instances/today'),
 			complete: (id: number, data: CompleteRequest) =>
 				request<ExtendedCompletionResponse>('POST', `/api/instances/${id}/complete`, data),
+			completeBatch: (items: BatchCompleteItem[]) =>
+				request<BatchCompleteResponse>('POST', '/api/instances/complete-batch', { items }),
 			skip: (id: number) => request<TaskInstance>('POST', `/api/instances/${id}/skip`),
 			assign: (id: number, userId: number) =>
 				request<TaskInstance>('POST', `/api/instances/${id}/assign`, { user_id: userId })
@@ -107,14 +137,34 @@ export function createApiClient(fetchFn: Fetch, baseUrl: string, apiKey: string)
 			},
 			latest: () => request<WeeklySummary>('GET', '/api/summaries/latest'),
 			generate: (weekStart?: string) =>
-				request<GenerateSummaryResponse>('POST', '/api/summaries/generate',
+				request<SummaryJob>('POST', '/api/summaries/generate',
 					weekStart ? { week_start: weekStart } : undefined
-				)
+				),
+			job: (jobId: string) => request<SummaryJob>('GET', `/api/summaries/jobs/${jobId}`)
 		},
 
 		gamification: {
 			leaderboard: () => request<User[]>('GET', '/api/leaderboard'),
 			leaderboardWeekly: () => request<User[]>('GET', '/api/leaderboard/weekly'),
+			leaderboardWindow: (
+				window: LeaderboardWindow,
+				params: { start?: string; end?: string; offset?: number; limit?: number } = {}
+			) => {
+				const qs = new URLSearchParams(
+					Object.entries(params)
+						.filter(([, v]) => v !== undefined)
+						.map(([k, v]) => [k, String(v)])
+				).toString();
+				return request<LeaderboardWindowResponse>(
+					'GET', `/api/leaderboard/window/${window}${qs ? `?${qs}` : ''}`
+				);
+			},
+			leaderboardRank: (window: LeaderboardWindow, userId: number, start?: string, end?: string) => {
+				const qs = start && end ? `?start=${start}&end=${end}` : '';
+				return request<LeaderboardRankResponse>(
+					'GET', `/api/leaderboard/window/${window}/users/${userId}${qs}`
+				);
+			},
 			achievements: () => request<Achievement[]>('GET', '/api/achievements'),
 			userAchievements: (userId: number) =>
 				request<UserAchievement[]>('GET', `/api/achievements/${userId}`),
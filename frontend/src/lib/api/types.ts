@@ -58,6 +58,18 @@ export interface RoomUpdate {
 	ha_area_id?: string | null;
 }
 
+export interface RoomProgress {
+	room_id: number;
+	room_name: string;
+	icon: string;
+	day: string;
+	total: number;
+	completed: number;
+	skipped: number;
+	pending: number;
+	is_complete: boolean;
+}
+
 // --- Task ---
 export type Recurrence = 'once' | 'daily' | 'weekly' | 'monthly';
 export type TaskStatus = 'pending' | 'completed' | 'skipped';
@@ -114,6 +126,22 @@ export interface TaskInstanceWithDetails extends TaskInstance {
 	assigned_user: User | null;
 }
 
+export interface InstanceListParams {
+	room_id?: number;
+	user_id?: number;
+	status?: string;
+	due_date?: string;
+	start_date?: string;
+	end_date?: string;
+	after?: string;
+	limit?: number;  // ohne Angabe: 500 je Seite
+}
+
+export interface InstancePage {
+	items: TaskInstanceWithDetails[];
+	nextCursor: string | null;  // null = letzte Seite
+}
+
 // --- Completion ---
 export interface CompleteRequest {
 	user_id: number;
@@ -161,6 +189,34 @@ export interface ExtendedCompletionResponse {
 	unlocked_achievements: UnlockedAchievement[];
 }
 
+export interface BatchCompleteItem {
+	instance_id: number;
+	user_id: number;
+	notes?: string | null;
+}
+
+export interface BatchCompleteItemResult {
+	instance_id: number;
+	user_id: number;
+	success: boolean;
+	error: string | null;
+	completion: CompletionResponse | null;
+	bonus_breakdown: BonusBreakdown | null;
+}
+
+export interface BatchUserResult {
+	user_id: number;
+	total_points: number;
+	weekly_points: number;
+	streak: StreakUpdate;
+	unlocked_achievements: UnlockedAchievement[];
+}
+
+export interface BatchCompleteResponse {
+	results: BatchCompleteItemResult[];
+	users: BatchUserResult[];
+}
+
 // --- Achievement ---
 export interface Achievement {
 	id: number;
@@ -188,6 +244,37 @@ export interface AchievementProgress {
 	progress_percent: number;
 }
 
+// --- Leaderboard ---
+
+export type LeaderboardWindow = 'today' | 'week' | 'month' | 'rolling_30d' | 'range';
+
+export interface LeaderboardEntry {
+	rank: number;
+	user_id: number;
+	username: string;
+	display_name: string | null;
+	avatar_url: string | null;
+	points: number;
+}
+
+export interface LeaderboardWindowResponse {
+	window: LeaderboardWindow;
+	start_date: string;
+	end_date: string;
+	total: number;
+	entries: LeaderboardEntry[];
+}
+
+export interface LeaderboardRankResponse {
+	window: LeaderboardWindow;
+	start_date: string;
+	end_date: string;
+	total: number;
+	user_id: number;
+	rank: number | null;
+	points: number;
+}
+
 // --- Summary ---
 export interface SuggestedTask {
 	title: string;
@@ -206,9 +293,15 @@ export interface WeeklySummary {
 	generated_at: string;
 }
 
-export interface GenerateSummaryResponse {
-	summary: WeeklySummary;
+export interface SummaryJob {
+	job_id: string;
+	status: 'queued' | 'running' | 'done' | 'failed';
+	week_start: string;
+	created_at: string;
+	finished_at: string | null;
+	error: string | null;
 	tokens_used: number;
+	summary: WeeklySummary | null;
 }
 
 // --- Dashboard ---
@@ -3,23 +3,19 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
 
-import aiohttp
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers import area_registry as ar
-from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.components import webhook
-from homeassistant.helpers.event import async_track_time_interval
 
 from .api import ChoreQuestApiClient, ChoreQuestApiError
-from .const import CONF_API_KEY, CONF_BACKEND_URL, CONF_WEBHOOK_ID, DOMAIN, SYNC_INTERVAL_HOURS
+from .const import CONF_API_KEY, CONF_BACKEND_URL, CONF_WEBHOOK_ID, DOMAIN
 from .coordinator import ChoreQuestCoordinator
+from .sync import ChoreQuestRegistrySync
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,7 +31,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         session,
     )
 
-    coordinator = ChoreQuestCoordinator(hass, client)
+    coordinator = ChoreQuestCoordinator(
+        hass, client, webhook_enabled=bool(entry.data.get(CONF_WEBHOOK_ID))
+    )
     await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})
@@ -62,14 +60,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Services registrieren
     _register_services(hass, entry)
 
-    # Periodischer Re-Sync alle 24h
-    async def _periodic_sync(_now) -> None:
-        await _run_sync(hass, client)
-
-    unsub = async_track_time_interval(
-        hass, _periodic_sync, timedelta(hours=SYNC_INTERVAL_HOURS)
-    )
-    hass.data[DOMAIN][entry.entry_id]["unsub_sync"] = unsub
+    # Areas/Personen abgleichen: jetzt als Delta zum letzten Stand, danach bei
+    # jeder Änderung in der Area- bzw. Entity-Registry
+    registry_sync = ChoreQuestRegistrySync(hass, client, entry.entry_id)
+    await registry_sync.async_start()
+    hass.data[DOMAIN][entry.entry_id]["registry_sync"] = registry_sync
 
     return True
 
@@ -79,9 +74,10 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         data = hass.data[DOMAIN].pop(entry.entry_id)
-        unsub = data.get("unsub_sync")
-        if unsub:
-            unsub()
+        await data["coordinator"].async_shutdown()
+        registry_sync = data.get("registry_sync")
+        if registry_sync:
+            registry_sync.async_stop()
         # Webhook deregistrieren
         webhook_id = data.get("webhook_id")
         if webhook_id:
@@ -99,17 +95,58 @@ async def _handle_webhook(
         _LOGGER.warning("Webhook: Ungültiges JSON empfangen")
         return
 
-    event_type = data.get("event_type", "unknown")
-    _LOGGER.debug("Webhook empfangen: %s", event_type)
+    # Das Backend bündelt Events eines Flush-Fensters zu einem "batch"
+    events = data.get("events", []) if data.get("event_type") == "batch" else [data]
+    _LOGGER.debug("Webhook empfangen: %d Event(s)", len(events))
 
-    # HA-Event feuern für Automationen
-    hass.bus.async_fire(f"chorequest_{event_type}", data)
+    # HA-Events feuern für Automationen
+    for event in events:
+        for event_type, event_data in _bus_events(event):
+            hass.bus.async_fire(f"chorequest_{event_type}", event_data)
 
-    # Coordinator refreshen für alle Entries
+    # Deltas anwenden; nur bei Lücke oder unbekanntem Event komplett neu laden —
+    # gebündelt über Webhooks hinweg, die kurz hintereinander eintreffen
     for entry_data in hass.data.get(DOMAIN, {}).values():
         if isinstance(entry_data, dict) and "coordinator" in entry_data:
-            coordinator = entry_data["coordinator"]
-            await coordinator.async_request_refresh()
+            coordinator: ChoreQuestCoordinator = entry_data["coordinator"]
+            coordinator.async_note_webhook()
+            applied = [coordinator.async_apply_event(event) for event in events]
+            if not all(applied):
+                coordinator.async_schedule_refresh()
+
+
+def _bus_events(event: dict) -> list[tuple[str, dict]]:
+    """HA-Events zu einem Backend-Event.
+
+    Eine Batch-Completion (tasks_completed) feuert neben dem gebündelten Event
+    je Completion ein task_completed und je Freischaltung ein
+    achievement_unlocked — wie Einzel-Completions, inkl. der Punktestände.
+    """
+    event_type = event.get("event_type", "unknown")
+    fired = [(event_type, event)]
+    if event_type != "tasks_completed":
+        return fired
+
+    common = {key: event[key] for key in ("event_epoch", "event_seq", "redelivered") if key in event}
+    totals = {
+        user["user_id"]: {
+            key: user[key]
+            for key in ("total_points", "weekly_points", "current_streak")
+            if key in user
+        }
+        for user in event.get("users", [])
+    }
+    for completion in event.get("completions", []):
+        fired.append(("task_completed", {
+            **completion, **totals.get(completion.get("user_id"), {}), **common,
+            "event_type": "task_completed",
+        }))
+    for achievement in event.get("achievements", []):
+        fired.append(("achievement_unlocked", {
+            **achievement, **totals.get(achievement.get("user_id"), {}), **common,
+            "event_type": "achievement_unlocked",
+        }))
+    return fired
 
 
 def _register_services(hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -124,20 +161,46 @@ def _register_services(hass: HomeAssistant, entry: ConfigEntry) -> None:
         try:
             await client.complete_task(instance_id, user_id, notes)
             coordinator: ChoreQuestCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+            coordinator.async_note_activity()
             await coordinator.async_request_refresh()
         except ChoreQuestApiError as err:
             _LOGGER.error("Fehler beim Abschließen der Aufgabe: %s", err)
 
+    async def handle_complete_tasks(call: ServiceCall) -> None:
+        """Service: Mehrere Aufgaben in einem Request als erledigt markieren."""
+        user_id = call.data["user_id"]
+        notes = call.data.get("notes")
+        items = [
+            {"instance_id": instance_id, "user_id": user_id, "notes": notes}
+            for instance_id in call.data["instance_ids"]
+        ]
+        client: ChoreQuestApiClient = hass.data[DOMAIN][entry.entry_id]["client"]
+        try:
+            result = await client.complete_tasks(items)
+        except ChoreQuestApiError as err:
+            _LOGGER.error("Fehler beim Abschließen der Aufgaben: %s", err)
+            return
+        for item in result.get("results", []):
+            if not item.get("success"):
+                _LOGGER.warning(
+                    "Aufgabe %s nicht abgeschlossen: %s", item.get("instance_id"), item.get("error")
+                )
+        coordinator: ChoreQuestCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        coordinator.async_note_activity()
+        await coordinator.async_request_refresh()
+
     async def handle_refresh_tasks(call: ServiceCall) -> None:
         """Service: Dashboard-Daten neu laden."""
         coordinator: ChoreQuestCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        coordinator.async_note_activity()
         await coordinator.async_request_refresh()
 
     async def handle_sync_rooms(call: ServiceCall) -> None:
-        """Service: Räume und Benutzer synchronisieren."""
-        client: ChoreQuestApiClient = hass.data[DOMAIN][entry.entry_id]["client"]
-        await _run_sync(hass, client)
+        """Service: Räume und Benutzer synchronisieren (Delta oder mit full voll)."""
+        registry_sync: ChoreQuestRegistrySync = hass.data[DOMAIN][entry.entry_id]["registry_sync"]
+        await registry_sync.async_sync(full=call.data["full"])
         coordinator: ChoreQuestCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        coordinator.async_note_activity()
         await coordinator.async_request_refresh()
 
     if not hass.services.has_service(DOMAIN, "complete_task"):
@@ -154,43 +217,30 @@ def _register_services(hass: HomeAssistant, entry: ConfigEntry) -> None:
             ),
         )
 
+    if not hass.services.has_service(DOMAIN, "complete_tasks"):
+        hass.services.async_register(
+            DOMAIN,
+            "complete_tasks",
+            handle_complete_tasks,
+            schema=vol.Schema(
+                {
+                    vol.Required("instance_ids"): vol.All(
+                        [vol.Coerce(int)], vol.Length(min=1, max=100)
+                    ),
+                    vol.Required("user_id"): int,
+                    vol.Optional("notes"): str,
+                }
+            ),
+        )
+
     if not hass.services.has_service(DOMAIN, "refresh_tasks"):
         hass.services.async_register(DOMAIN, "refresh_tasks", handle_refresh_tasks)
 
     if not hass.services.has_service(DOMAIN, "sync_rooms"):
-        hass.services.async_register(DOMAIN, "sync_rooms", handle_sync_rooms)
-
+        hass.services.async_register(
+            DOMAIN,
+            "sync_rooms",
+            handle_sync_rooms,
+            schema=vol.Schema({vol.Optional("full", default=False): bool}),
+        )
 
-async def _run_sync(hass: HomeAssistant, client: ChoreQuestApiClient) -> None:
-    """Synchronisiert Areas und Personen mit dem Backend."""
-    try:
-        # Areas synchronisieren
-        area_reg = ar.async_get(hass)
-        areas = [
-            {"area_id": area.id, "name": area.name}
-            for area in area_reg.async_list_areas()
-        ]
-        if areas:
-            result = await client.sync_rooms(areas)
-            _LOGGER.info(
-                "Re-Sync Räume: %d erstellt, %d aktualisiert",
-                len(result.get("created", [])),
-                len(result.get("updated", [])),
-            )
-
-        # Personen synchronisieren
-        entity_reg = er.async_get(hass)
-        persons = []
-        for entity in entity_reg.entities.values():
-            if entity.domain == "person":
-                name = entity.name or entity.original_name or entity.entity_id
-                persons.append({"person_id": entity.entity_id, "name": name})
-        if persons:
-            result = await client.sync_users(persons)
-            _LOGGER.info(
-                "Re-Sync Benutzer: %d erstellt, %d aktualisiert",
-                len(result.get("created", [])),
-                len(result.get("updated", [])),
-            )
-    except ChoreQuestApiError as err:
-        _LOGGER.error("Sync fehlgeschlagen: %s", err)
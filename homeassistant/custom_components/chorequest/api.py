@@ -25,18 +25,32 @@ class ChoreQuestApiClient:
         self._base_url = base_url.rstrip("/")
         self._api_key = api_key
         self._session = session
+        # Letzte Antwort pro GET-Pfad: path -> (ETag, Payload)
+        self._etag_cache: dict[str, tuple[str, Any]] = {}
+        self.not_modified_count = 0
 
     @property
     def _headers(self) -> dict[str, str]:
         return {"Authorization": f"Bearer {self._api_key}"}
 
     async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
-        """Führt einen API-Request durch."""
+        """Führt einen API-Request durch.
+
+        GET-Requests senden If-None-Match; bei 304 wird der zuletzt
+        empfangene Payload wiederverwendet.
+        """
         url = f"{self._base_url}{path}"
+        headers = self._headers
+        cached = self._etag_cache.get(path) if method == "GET" else None
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
         try:
             async with self._session.request(
-                method, url, headers=self._headers, **kwargs
+                method, url, headers=headers, **kwargs
             ) as resp:
+                if resp.status == 304 and cached is not None:
+                    self.not_modified_count += 1
+                    return cached[1]
                 if resp.status == 401:
                     raise ChoreQuestAuthError("Ungültiger API-Key")
                 if resp.status >= 400:
@@ -46,7 +60,11 @@ class ChoreQuestApiClient:
                     )
                 if resp.status == 204:
                     return None
-                return await resp.json()
+                data = await resp.json()
+                etag = resp.headers.get("ETag")
+                if method == "GET" and etag:
+                    self._etag_cache[path] = (etag, data)
+                return data
         except aiohttp.ClientError as err:
             raise ChoreQuestApiError(f"Verbindungsfehler: {err}") from err
 
@@ -69,13 +87,25 @@ class ChoreQuestApiClient:
         """Holt alle Benutzer."""
         return await self._request("GET", "/api/users")
 
-    async def sync_rooms(self, areas: list[dict[str, str]]) -> dict[str, Any]:
-        """Synchronisiert HA-Areas als Räume."""
-        return await self._request("POST", "/api/rooms/sync", json={"areas": areas})
-
-    async def sync_users(self, persons: list[dict[str, str]]) -> dict[str, Any]:
-        """Synchronisiert HA-Personen als Benutzer."""
-        return await self._request("POST", "/api/users/sync", json={"persons": persons})
+    async def sync_rooms(
+        self, areas: list[dict[str, str]], removed: list[str] | None = None, full: bool = True
+    ) -> dict[str, Any]:
+        """Synchronisiert HA-Areas als Räume (voll oder als Delta)."""
+        return await self._request(
+            "POST",
+            "/api/rooms/sync",
+            json={"areas": areas, "removed": removed or [], "full": full},
+        )
+
+    async def sync_users(
+        self, persons: list[dict[str, str]], removed: list[str] | None = None, full: bool = True
+    ) -> dict[str, Any]:
+        """Synchronisiert HA-Personen als Benutzer (voll oder als Delta)."""
+        return await self._request(
+            "POST",
+            "/api/users/sync",
+            json={"persons": persons, "removed": removed or [], "full": full},
+        )
 
     async def complete_task(self, instance_id: int, user_id: int, notes: str | None = None) -> dict[str, Any]:
         """Markiert eine Task-Instanz als erledigt."""
@@ -84,6 +114,13 @@ class ChoreQuestApiClient:
             payload["notes"] = notes
         return await self._request("POST", f"/api/instances/{instance_id}/complete", json=payload)
 
+    async def complete_tasks(self, items: list[dict[str, Any]]) -> dict[str, Any]:
+        """Markiert mehrere Task-Instanzen in einem Request als erledigt.
+
+        items: Liste von {"instance_id", "user_id", optional "notes"}.
+        """
+        return await self._request("POST", "/api/instances/complete-batch", json={"items": items})
+
     async def get_instances_today(self) -> list[dict[str, Any]]:
         """Holt die heutigen Task-Instanzen."""
         return await self._request("GET", "/api/instances/today")
@@ -8,4 +8,9 @@ CONF_API_KEY = "api_key"
 CONF_WEBHOOK_ID = "webhook_id"
 
 DEFAULT_SCAN_INTERVAL = 60  # Sekunden
-SYNC_INTERVAL_HOURS = 24  # Stunden zwischen Area/Person-Syncs
+MIN_SCAN_INTERVAL = 15  # Sekunden, solange Webhooks ausbleiben
+MAX_SCAN_INTERVAL = 600  # Sekunden, bei ruhigen Daten und funktionierenden Webhooks
+ACTIVITY_WINDOW = 300  # Sekunden nach Aktivität, in denen nicht zurückgefahren wird
+WEBHOOK_GRACE = 5  # Sekunden, die ein Webhook nach einer Änderung unterwegs sein darf
+WEBHOOK_REFRESH_DELAY = 0.5  # Sekunden, in denen Refresh-Anfragen aus Webhooks gebündelt werden
+SYNC_DELAY = 2  # Sekunden, in denen Registry-Änderungen zu einem Sync gebündelt werden
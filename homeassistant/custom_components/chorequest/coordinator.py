@@ -2,23 +2,39 @@
 
 from __future__ import annotations
 
+import copy
 import logging
+import time
 from datetime import timedelta
 from typing import Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .api import ChoreQuestApiClient, ChoreQuestApiError
-from .const import DEFAULT_SCAN_INTERVAL, DOMAIN
+from .const import (
+    ACTIVITY_WINDOW,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    MAX_SCAN_INTERVAL,
+    MIN_SCAN_INTERVAL,
+    WEBHOOK_GRACE,
+    WEBHOOK_REFRESH_DELAY,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Felder eines Users, die Webhook-Events als absolute Werte mitliefern
+_USER_TOTAL_KEYS = ("total_points", "weekly_points", "current_streak")
+
 
 class ChoreQuestCoordinator(DataUpdateCoordinator[dict[str, Any]]):
-    """Koordinator, der Dashboard-Daten vom Backend pollt."""
+    """Koordinator, der Dashboard-Daten vom Backend pollt und Webhook-Deltas anwendet."""
 
-    def __init__(self, hass: HomeAssistant, client: ChoreQuestApiClient) -> None:
+    def __init__(
+        self, hass: HomeAssistant, client: ChoreQuestApiClient, webhook_enabled: bool = False
+    ) -> None:
         super().__init__(
             hass,
             _LOGGER,
@@ -26,10 +42,220 @@ class ChoreQuestCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
         )
         self.client = client
+        self._event_epoch: str | None = None
+        self._event_seq: int | None = None
+        self._scheduled_refresh: CALLBACK_TYPE | None = None
+        # Zähler für Webhook-Refreshes (Diagnose)
+        self.refresh_requested = 0
+        self.refresh_suppressed = 0
+        self.refresh_executed = 0
+        # Adaptives Polling: None = noch kein Webhook empfangen (Zustand unbekannt)
+        self._webhook_enabled = webhook_enabled
+        self.webhooks_healthy: bool | None = None
+        self._last_webhook = 0.0
+        self._last_activity = time.monotonic()
+
+    @callback
+    def async_note_webhook(self) -> None:
+        """Ein Webhook ist angekommen: Webhooks funktionieren, es gibt Aktivität."""
+        self._last_webhook = self._last_activity = time.monotonic()
+        self.webhooks_healthy = True
+        self._tighten_interval()
+
+    @callback
+    def async_note_activity(self) -> None:
+        """Lokale Aktion (Service-Aufruf): wieder im Standard-Intervall pollen."""
+        self._last_activity = time.monotonic()
+        self._tighten_interval()
+
+    def _tighten_interval(self) -> None:
+        if self.update_interval is not None and self.update_interval > timedelta(
+            seconds=DEFAULT_SCAN_INTERVAL
+        ):
+            self.update_interval = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+
+    def _adapt_interval(self, changed: bool, missed: bool) -> None:
+        """Wählt das nächste Poll-Intervall.
+
+        Verpasst ein Poll Änderungen, die per Webhook hätten kommen müssen,
+        wird aggressiv gepollt. Bei funktionierenden Webhooks und unveränderten
+        Daten ohne kürzliche Aktivität verdoppelt sich das Intervall bis
+        MAX_SCAN_INTERVAL. Ohne (bisher empfangene) Webhooks bleibt es beim
+        Standard.
+        """
+        now = time.monotonic()
+        if missed:
+            self.webhooks_healthy = False
+        if not self._webhook_enabled or self.webhooks_healthy is None:
+            seconds = DEFAULT_SCAN_INTERVAL
+        elif not self.webhooks_healthy:
+            seconds = MIN_SCAN_INTERVAL
+        elif changed or now - self._last_activity < ACTIVITY_WINDOW:
+            seconds = DEFAULT_SCAN_INTERVAL
+        else:
+            current = self.update_interval.total_seconds() if self.update_interval else 0
+            seconds = min(max(current, DEFAULT_SCAN_INTERVAL) * 2, MAX_SCAN_INTERVAL)
+        interval = timedelta(seconds=seconds)
+        if interval != self.update_interval:
+            _LOGGER.debug("Poll-Intervall: %s s", seconds)
+            self.update_interval = interval
+
+    @callback
+    def async_schedule_refresh(self) -> None:
+        """Plant einen Voll-Refresh nach kurzer Wartezeit.
+
+        Weitere Anfragen bis dahin (Webhook-Bursts, z. B. Completion plus
+        Achievement) werden zusammengefasst und nur mitgezählt.
+        """
+        self.refresh_requested += 1
+        if self._scheduled_refresh is not None:
+            self.refresh_suppressed += 1
+            return
+        self._scheduled_refresh = async_call_later(
+            self.hass, WEBHOOK_REFRESH_DELAY, self._async_scheduled_refresh
+        )
+
+    async def _async_scheduled_refresh(self, _now) -> None:
+        # Vor dem Laden freigeben: Events während des Fetches planen einen neuen Refresh
+        self._scheduled_refresh = None
+        self.refresh_executed += 1
+        await self.async_refresh()
+
+    async def async_shutdown(self) -> None:
+        """Geplanten Refresh verwerfen und Coordinator beenden."""
+        if self._scheduled_refresh is not None:
+            self._scheduled_refresh()
+            self._scheduled_refresh = None
+        await super().async_shutdown()
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Holt aktuelle Dashboard-Daten vom Backend."""
         try:
-            return await self.client.get_dashboard()
+            data = await self.client.get_dashboard()
         except ChoreQuestApiError as err:
             raise UpdateFailed(f"Fehler beim Abrufen der Dashboard-Daten: {err}") from err
+        epoch, seq = data.get("event_epoch"), data.get("event_seq")
+        changed = data != self.data
+        # Events, die im Backend passiert sind, aber nicht per Webhook ankamen
+        # (Backend-Neustart ausgenommen; noch unterwegs befindliche Webhooks toleriert)
+        missed = (
+            self._webhook_enabled
+            and self.webhooks_healthy is not None
+            and epoch == self._event_epoch
+            and seq is not None
+            and self._event_seq is not None
+            and seq > self._event_seq
+            and time.monotonic() - self._last_webhook > WEBHOOK_GRACE
+        )
+        self._event_epoch = epoch
+        self._event_seq = seq
+        self._adapt_interval(changed, missed)
+        return data
+
+    @callback
+    def async_apply_event(self, event: dict[str, Any]) -> bool:
+        """Patcht die Daten mit einem Webhook-Delta.
+
+        Gibt False zurück, wenn ein Voll-Refresh nötig ist (Lücke in der
+        Sequenz, Backend-Neustart oder nicht anwendbares Event).
+        """
+        epoch = event.get("event_epoch")
+        seq = event.get("event_seq")
+        if self.data is None or seq is None or epoch != self._event_epoch:
+            return False
+        if self._event_seq is None:
+            return False
+        if seq <= self._event_seq:
+            # Bereits im zuletzt geladenen Stand enthalten
+            return True
+        if seq != self._event_seq + 1:
+            _LOGGER.debug("Event-Lücke (%s -> %s), lade neu", self._event_seq, seq)
+            return False
+
+        patched = _apply_delta(self.data, event)
+        if patched is None:
+            return False
+        self._event_seq = seq
+        self.async_set_updated_data(patched)
+        return True
+
+
+def _apply_delta(data: dict[str, Any], event: dict[str, Any]) -> dict[str, Any] | None:
+    """Wendet ein Event auf eine Kopie der Dashboard-Daten an (None = nicht möglich)."""
+    event_type = event.get("event_type")
+    new_data = copy.deepcopy(data)
+
+    if event_type in ("task_completed", "task_skipped"):
+        # Nur heutige offene Instanzen sind im Dashboard aufgelistet; alles andere
+        # (z.B. überfällige) beeinflusst Zähler, die wir nicht sicher kennen
+        room = _remove_instance(new_data, event.get("instance_id"))
+        if room is None:
+            return None
+        _count_progress(room, "completed" if event_type == "task_completed" else "skipped")
+        new_data["tasks_today"] = max(0, new_data.get("tasks_today", 0) - 1)
+        if event.get("user_id") is not None and not _update_user(new_data, event):
+            return None
+        return new_data
+
+    if event_type == "tasks_completed":
+        # Gebündelte Batch-Completion: wie task_completed, nur für mehrere Instanzen
+        for completion in event.get("completions", []):
+            room = _remove_instance(new_data, completion.get("instance_id"))
+            if room is None:
+                return None
+            _count_progress(room, "completed")
+            new_data["tasks_today"] = max(0, new_data.get("tasks_today", 0) - 1)
+        for user in event.get("users", []):
+            if not _update_user(new_data, user):
+                return None
+        return new_data
+
+    if event_type == "instance_assigned":
+        for room in new_data.get("rooms", []):
+            for task in room.get("tasks", []):
+                if task["instance_id"] == event.get("instance_id"):
+                    task["assigned_user_id"] = event.get("user_id")
+        return new_data
+
+    if event_type == "achievement_unlocked":
+        return new_data if _update_user(new_data, event) else None
+
+    if event_type == "points_reset":
+        for user in new_data.get("users", []):
+            user["weekly_points"] = 0
+        return new_data
+
+    return None
+
+
+def _remove_instance(data: dict[str, Any], instance_id: int | None) -> dict[str, Any] | None:
+    """Entfernt eine offene Instanz und gibt ihren Raum zurück (None = nicht gefunden)."""
+    for room in data.get("rooms", []):
+        tasks = room.get("tasks", [])
+        for idx, task in enumerate(tasks):
+            if task["instance_id"] == instance_id:
+                del tasks[idx]
+                return room
+    return None
+
+
+def _count_progress(room: dict[str, Any], key: str) -> None:
+    """Zählt eine heute erledigte/übersprungene Instanz im Raum-Fortschritt mit."""
+    progress = room.get("progress")
+    if not progress:
+        return
+    progress[key] = progress.get(key, 0) + 1
+    progress["pending"] = max(0, progress.get("pending", 0) - 1)
+    total = progress.get("total", 0)
+    progress["is_complete"] = total > 0 and progress.get("completed", 0) >= total
+
+
+def _update_user(data: dict[str, Any], event: dict[str, Any]) -> bool:
+    for user in data.get("users", []):
+        if user["id"] == event.get("user_id"):
+            for key in _USER_TOTAL_KEYS:
+                if key in event:
+                    user[key] = event[key]
+            data["users"].sort(key=lambda u: u.get("total_points", 0), reverse=True)
+            return True
+    return False
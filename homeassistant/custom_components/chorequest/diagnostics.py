@@ -0,0 +1,32 @@
+"""Diagnose-Daten der ChoreQuest-Integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import ChoreQuestCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Zustand des Coordinators inkl. Zähler für Webhook-Refreshes."""
+    coordinator: ChoreQuestCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    return {
+        "last_update_success": coordinator.last_update_success,
+        "event_epoch": coordinator._event_epoch,
+        "event_seq": coordinator._event_seq,
+        "update_interval_seconds": (
+            coordinator.update_interval.total_seconds() if coordinator.update_interval else None
+        ),
+        "webhooks_healthy": coordinator.webhooks_healthy,
+        "refresh": {
+            "requested": coordinator.refresh_requested,
+            "suppressed": coordinator.refresh_suppressed,
+            "executed": coordinator.refresh_executed,
+        },
+    }
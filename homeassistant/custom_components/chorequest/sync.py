@@ -0,0 +1,142 @@
+"""Inkrementeller Abgleich von HA-Areas und Personen mit dem Backend."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .api import ChoreQuestApiClient, ChoreQuestApiError
+from .const import DOMAIN, SYNC_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+def _current_areas(hass: HomeAssistant) -> dict[str, str]:
+    return {area.id: area.name for area in ar.async_get(hass).async_list_areas()}
+
+
+def _current_persons(hass: HomeAssistant) -> dict[str, str]:
+    return {
+        entity.entity_id: entity.name or entity.original_name or entity.entity_id
+        for entity in er.async_get(hass).entities.values()
+        if entity.domain == "person"
+    }
+
+
+def _diff(previous: dict[str, str], current: dict[str, str]) -> tuple[dict[str, str], list[str]]:
+    """Neue bzw. umbenannte Einträge und entfernte IDs."""
+    changed = {key: name for key, name in current.items() if previous.get(key) != name}
+    removed = sorted(previous.keys() - current.keys())
+    return changed, removed
+
+
+class ChoreQuestRegistrySync:
+    """Hält Räume und Benutzer im Backend aktuell, ausgelöst durch Registry-Events.
+
+    Der zuletzt übertragene Stand wird im HA-Storage gespeichert; gesendet
+    werden nur neue, umbenannte und entfernte Areas/Personen. Ohne
+    gespeicherten Stand (erster Start) oder auf Anforderung wird voll
+    synchronisiert.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: ChoreQuestApiClient, entry_id: str) -> None:
+        self.hass = hass
+        self.client = client
+        self._store: Store[dict[str, dict[str, str]]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.sync"
+        )
+        self._synced: dict[str, dict[str, str]] = {}
+        self._lock = asyncio.Lock()
+        self._scheduled: CALLBACK_TYPE | None = None
+        self._unsub: list[CALLBACK_TYPE] = []
+
+    async def async_start(self) -> None:
+        """Lädt den letzten Stand, gleicht ab und abonniert Registry-Änderungen."""
+        self._synced = await self._store.async_load() or {}
+        await self.async_sync()
+        self._unsub = [
+            self.hass.bus.async_listen(ar.EVENT_AREA_REGISTRY_UPDATED, self._async_area_updated),
+            self.hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_entity_updated),
+        ]
+
+    @callback
+    def async_stop(self) -> None:
+        for unsub in self._unsub:
+            unsub()
+        self._unsub = []
+        if self._scheduled is not None:
+            self._scheduled()
+            self._scheduled = None
+
+    @callback
+    def _async_area_updated(self, event: Event) -> None:
+        self._async_schedule()
+
+    @callback
+    def _async_entity_updated(self, event: Event) -> None:
+        entity_ids = (event.data.get("entity_id"), event.data.get("old_entity_id"))
+        if any(entity_id and entity_id.startswith("person.") for entity_id in entity_ids):
+            self._async_schedule()
+
+    @callback
+    def _async_schedule(self) -> None:
+        # Mehrere Änderungen kurz hintereinander (z. B. beim Anlegen) bündeln
+        if self._scheduled is None:
+            self._scheduled = async_call_later(self.hass, SYNC_DELAY, self._async_scheduled_sync)
+
+    async def _async_scheduled_sync(self, _now) -> None:
+        self._scheduled = None
+        await self.async_sync()
+
+    async def async_sync(self, full: bool = False) -> None:
+        """Überträgt Änderungen seit dem letzten Sync (oder alles bei full)."""
+        async with self._lock:
+            updated = False
+            for kind, current, send, key in (
+                ("areas", _current_areas(self.hass), self.client.sync_rooms, "area_id"),
+                ("persons", _current_persons(self.hass), self.client.sync_users, "person_id"),
+            ):
+                updated |= await self._async_sync_kind(kind, current, send, key, full)
+            if updated:
+                await self._store.async_save(self._synced)
+
+    async def _async_sync_kind(
+        self, kind: str, current: dict[str, str], send: Any, key: str, full: bool
+    ) -> bool:
+        previous = self._synced.get(kind)
+        full = full or previous is None
+        if full:
+            changed, removed = current, []
+        else:
+            changed, removed = _diff(previous, current)
+            if not changed and not removed:
+                return False
+
+        items = [{key: item_id, "name": name} for item_id, name in changed.items()]
+        try:
+            if items or not full:
+                result = await send(items, removed, full)
+                _LOGGER.info(
+                    "Sync %s (%s): %d erstellt, %d aktualisiert",
+                    kind,
+                    "voll" if full else "Delta",
+                    len(result.get("created", [])),
+                    len(result.get("updated", [])),
+                )
+                for warning in result.get("warnings", []):
+                    _LOGGER.warning(warning)
+        except ChoreQuestApiError as err:
+            _LOGGER.error("Sync %s fehlgeschlagen: %s", kind, err)
+            return False
+
+        self._synced[kind] = current
+        return True